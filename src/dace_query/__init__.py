@@ -1,8 +1,16 @@
 from __future__ import annotations
 
-from dace_query.dace import Dace
-from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
 from .__version__ import (
     __version__,
     __title__
 )
+
+__all__ = ['Dace', 'DaceClass', 'AsyncDaceClass', '__version__', '__title__']
+
+# The dace module and its instance are loaded on first use, keeping the import of the package fast
+__getattr__ = lazy_attributes(__name__, imports={
+    'Dace': 'dace_query.dace',
+    'DaceClass': 'dace_query.dace',
+    'AsyncDaceClass': 'dace_query.async_dace',
+})
@@ -1 +1,8 @@
-from dace_query.astrometry.astrometry import Astrometry, AstrometryClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['AstrometryClass', 'Astrometry']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'AstrometryClass': 'dace_query.astrometry.astrometry',
+    'Astrometry': 'dace_query.astrometry.astrometry',
+})
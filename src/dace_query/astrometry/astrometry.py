@@ -4,14 +4,17 @@ import json
 import logging
 
 # import re
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.table import Table
-from astroquery.simbad import Simbad
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from astropy.table import Table
+    from pandas import DataFrame
 
 ASTROMETRY_DEFAULT_LIMIT = 10000
 
@@ -48,7 +51,7 @@ class AstrometryClass:
         self.__ASTROMETRY_API = "astrom-webapp"
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -84,7 +87,8 @@ class AstrometryClass:
         if not isinstance(id, str):
             raise TypeError("The identifier must be a string.")
 
-        # Query SIMBAD
+        # Query SIMBAD, astroquery being imported on first use only
+        from astroquery.simbad import Simbad
         custom_simbad = Simbad()
         custom_simbad.add_votable_fields("ids")
         result = custom_simbad.query_object(id)
@@ -310,6 +314,7 @@ class AstrometryClass:
         filters: Optional[dict] = None,
         sort: Optional[dict] = None,
         output_format: Optional[str] = None,
+        columns: Optional[list[str]] = None,
     ) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
         """
         Query the astrometry database to retrieve data in the chosen format.
@@ -326,6 +331,8 @@ class AstrometryClass:
         :type sort: Optional[dict]
         :param output_format: Type of data returns
         :type output_format: Optional[str]
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: The desired data in the chosen output format
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -348,9 +355,11 @@ class AstrometryClass:
                     "limit": str(limit),
                     "filters": json.dumps(filters),
                     "sort": json.dumps(sort),
+                    "col": columns,
                 },
             ),
             output_format=output_format,
+            columns=columns,
         )
 
     def get_gaia_timeseries(
@@ -385,7 +394,5 @@ class AstrometryClass:
         )
 
 
-Astrometry: AstrometryClass = AstrometryClass()
-"""
-Astrometry instance
-"""
+# Astrometry instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Astrometry': AstrometryClass})
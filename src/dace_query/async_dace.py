@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib
+import inspect
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from dace_query.dace import DaceClass
+
+DEFAULT_MAX_CONCURRENCY = 16
+
+# Attribute name of each module on the asynchronous client, with the module path and class used to build it
+ASYNC_MODULES = {
+    'astrometry': ('dace_query.astrometry', 'AstrometryClass'),
+    'atmospheric_spectroscopy': ('dace_query.atmosphericSpectroscopy', 'AtmosphericSpectroscopyClass'),
+    'atom': ('dace_query.opacity', 'AtomClass'),
+    'catalog': ('dace_query.catalog', 'CatalogClass'),
+    'cheops': ('dace_query.cheops', 'CheopsClass'),
+    'exoplanet': ('dace_query.exoplanet', 'ExoplanetClass'),
+    'imaging': ('dace_query.imaging', 'ImagingClass'),
+    'lossy': ('dace_query.lossy', 'LossyClass'),
+    'molecule': ('dace_query.opacity', 'MoleculeClass'),
+    'monitoring': ('dace_query.monitoring', 'MonitoringClass'),
+    'opendata': ('dace_query.opendata', 'OpenDataClass'),
+    'photometry': ('dace_query.photometry', 'PhotometryClass'),
+    'population': ('dace_query.population', 'PopulationClass'),
+    'spectroscopy': ('dace_query.spectroscopy', 'SpectroscopyClass'),
+    'sun': ('dace_query.sun', 'SunClass'),
+    'target': ('dace_query.target', 'TargetClass'),
+    'tess': ('dace_query.tess', 'TessClass'),
+}
+
+
+class AsyncDaceClass:
+    """
+    The asynchronous dace class.
+    Exposes every module (spectroscopy, cheops, tess, ...) with awaitable versions of all its methods, so that
+    queries can be awaited concurrently from an event loop. The methods iterating over results (e.g. ``iter_query``)
+    are asynchronous iterators instead, used with ``async for``.
+
+    The client is backed by threads, not asyncio-native : the blocking HTTP calls, sharing the pooled sessions of one
+    dace instance, run on a thread pool of ``max_concurrency`` threads. Each query in flight holds a thread of the
+    pool, which bounds their number, the other queries waiting their turn in the pool queue without holding any
+    thread. The client is not tied to an event loop, and can be used by successive ``asyncio.run`` calls.
+
+    >>> import asyncio
+    >>> from dace_query import AsyncDaceClass
+    >>> async def get_all_timeseries(targets):
+    ...     async with AsyncDaceClass(max_concurrency=32) as async_dace:
+    ...         return await asyncio.gather(*(async_dace.spectroscopy.get_timeseries(target) for target in targets))
+    >>> # values = asyncio.run(get_all_timeseries(['HD40307', 'HD10700']))
+    """
+
+    def __init__(self, dace_instance: Optional[DaceClass] = None,
+                 max_concurrency: Optional[int] = DEFAULT_MAX_CONCURRENCY):
+        """
+        Create an asynchronous client which uses a specified dace instance.
+
+        :param dace_instance: A dace object, by default a new one whose connection pool fits the concurrency
+        :type dace_instance: Optional[DaceClass]
+        :param max_concurrency: The maximum number of queries in flight
+        :type max_concurrency: Optional[int]
+
+        >>> from dace_query.async_dace import AsyncDaceClass
+        >>> async_dace = AsyncDaceClass(max_concurrency=8)
+        """
+        if dace_instance is None:
+            self.dace = DaceClass(pool_size=max_concurrency)
+            self.__owns_dace = True
+        elif isinstance(dace_instance, DaceClass):
+            self.dace = dace_instance
+            self.__owns_dace = False
+        else:
+            raise Exception("Dace instance is not valid")
+
+        self.max_concurrency = max_concurrency
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='dace-async')
+        self.__modules = {}
+
+    def __getattr__(self, name: str) -> AsyncModule:
+        if name not in ASYNC_MODULES:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        if name not in self.__modules:
+            module_path, class_name = ASYNC_MODULES[name]
+            module_class = getattr(importlib.import_module(module_path), class_name)
+            self.__modules[name] = AsyncModule(module_class(dace_instance=self.dace), self)
+        return self.__modules[name]
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking dace call on the thread pool, without blocking the event loop, once a thread is free.
+
+        :param function: The function to call
+        :type function: Callable
+        :return: The result of the function
+
+        >>> from dace_query.async_dace import AsyncDaceClass
+        >>> from dace_query.exoplanet import Exoplanet
+        >>> # values = await AsyncDaceClass().run(Exoplanet.query_database, limit=10)
+        """
+        # The thread pool alone bounds the calls in flight, an asyncio primitive would tie the client to one loop
+        return await asyncio.get_running_loop().run_in_executor(self.__executor,
+                                                                functools.partial(function, *args, **kwargs))
+
+    async def close(self) -> None:
+        """
+        Wait for the running calls, then release the threads and, if owned, the HTTP sessions.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.__executor.shutdown, True))
+        if self.__owns_dace:
+            self.dace.close()
+
+    async def __aenter__(self) -> AsyncDaceClass:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class AsyncModule:
+    """
+    An awaitable view of a module object (e.g. a SpectroscopyClass): each public method returns a coroutine running
+    the original method through the asynchronous client. The methods returning an iterator return an asynchronous
+    iterator, each item being pulled on the thread pool, so that the iteration never blocks the event loop.
+    """
+
+    def __init__(self, module: Any, async_dace: AsyncDaceClass):
+        self.module = module
+        self.async_dace = async_dace
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.module, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        if returns_iterator(attribute):
+            @functools.wraps(attribute)
+            async def iterating_method(*args, **kwargs):
+                iterator = await self.async_dace.run(attribute, *args, **kwargs)
+                try:
+                    while True:
+                        item = await self.async_dace.run(next, iterator, _EXHAUSTED)
+                        if item is _EXHAUSTED:
+                            return
+                        yield item
+                finally:
+                    # Release what the iterator holds (e.g. its pending queries) when the caller stops early
+                    close = getattr(iterator, 'close', None)
+                    if close is not None:
+                        await self.async_dace.run(close)
+
+            return iterating_method
+
+        @functools.wraps(attribute)
+        async def awaitable_method(*args, **kwargs):
+            return await self.async_dace.run(attribute, *args, **kwargs)
+
+        return awaitable_method
+
+
+# Returned by next() once an iterator is exhausted, a StopIteration cannot cross the executor future
+_EXHAUSTED = object()
+
+
+def returns_iterator(function: Callable) -> bool:
+    """Internal stuff"""
+    """
+    Whether a method returns an iterator, being a generator function or annotated as returning an Iterator
+    """
+    if inspect.isgeneratorfunction(function):
+        return True
+    try:
+        annotation = inspect.signature(function).return_annotation
+    except (TypeError, ValueError):
+        return False
+    return re.match(r'(typing\.|collections\.abc\.)?(Iterator|Generator)\b', str(annotation)) is not None
@@ -1,2 +1,8 @@
-from dace_query.atmosphericSpectroscopy.atmosphericSpectroscopy import AtmosphericSpectroscopyClass, \
-    AtmosphericSpectroscopy
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['AtmosphericSpectroscopyClass', 'AtmosphericSpectroscopy']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'AtmosphericSpectroscopyClass': 'dace_query.atmosphericSpectroscopy.atmosphericSpectroscopy',
+    'AtmosphericSpectroscopy': 'dace_query.atmosphericSpectroscopy.atmosphericSpectroscopy',
+})
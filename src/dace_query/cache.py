@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+DEFAULT_CACHE_TTL = 3600
+
+DEFAULT_CACHE_MAX_SIZE_MB = 512
+
+CACHE_FILE_SUFFIX = '.cache'
+
+
+class ResponseCache:
+    """
+    The response cache.
+    Stores the raw responses of DACE queries on disk so that repeated queries are answered without any network call.
+
+    Each entry lives in a per API sub-directory of the cache directory. An entry expires once it is older than the TTL
+    of its API, and the least recently used entries are evicted when the cache grows over its maximum size.
+
+    TTLs can be set by api name (e.g. 'exo-webapp') or by api name and endpoint prefix (e.g. 'obs-webapp/catalog'),
+    the most specific one being used.
+
+    >>> from dace_query.cache import ResponseCache
+    >>> cache = ResponseCache(directory='/tmp/dace-cache', ttl=3600, api_ttls={'obs-webapp/catalog': 86400})
+    """
+
+    def __init__(self,
+                 directory: Optional[Union[Path, str]] = None,
+                 ttl: Optional[float] = DEFAULT_CACHE_TTL,
+                 api_ttls: Optional[dict[str, float]] = None,
+                 max_size_mb: Optional[float] = DEFAULT_CACHE_MAX_SIZE_MB):
+        """
+        Create a response cache stored in the specified directory.
+
+        :param directory: The cache directory (default ~/.cache/dace-query)
+        :type directory: Optional[Union[Path, str]]
+        :param ttl: The default time to live of an entry, in seconds
+        :type ttl: Optional[float]
+        :param api_ttls: Time to live by api name or api name and endpoint prefix, in seconds
+        :type api_ttls: Optional[dict[str, float]]
+        :param max_size_mb: The maximum size of the cache, in MB
+        :type max_size_mb: Optional[float]
+        """
+        self.directory = Path(Path.home(), '.cache', 'dace-query') if directory is None else Path(
+            directory).expanduser()
+        self.ttl = ttl
+        self.api_ttls = {} if api_ttls is None else dict(api_ttls)
+        self.max_size = int(max_size_mb * 1048576)
+        self.__lock = threading.Lock()
+        self.__size = sum(entry.stat().st_size for entry in self.__entries())
+
+    @staticmethod
+    def make_key(api_name: str, endpoint: str, params: Optional[dict] = None, identity: Optional[str] = None,
+                 **extra) -> str:
+        """Internal stuff"""
+        canonical = json.dumps({
+            'api_name': api_name,
+            'endpoint': endpoint,
+            'params': {key: value for key, value in (params or {}).items() if value is not None},
+            'identity': identity,
+            **extra
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get_ttl(self, api_name: str, endpoint: Optional[str] = '') -> float:
+        """Internal stuff"""
+        location = f'{api_name}/{endpoint}'
+        matches = [name for name in self.api_ttls if name == api_name or location.startswith(name)]
+        return self.api_ttls[max(matches, key=len)] if matches else self.ttl
+
+    def get(self, api_name: str, key: str, endpoint: Optional[str] = '') -> Optional[bytes]:
+        """
+        Get the content cached under the key, None if it is missing or expired.
+
+        :param api_name: The api name the entry belongs to
+        :type api_name: str
+        :param key: The entry key
+        :type key: str
+        :param endpoint: The endpoint the entry belongs to, used to find its TTL
+        :type endpoint: Optional[str]
+        :return: The cached content
+        :rtype: Optional[bytes]
+        """
+        path = self.__path(api_name, key)
+        try:
+            stat = path.stat()
+            now = time.time()
+            if now - stat.st_mtime > self.get_ttl(api_name, endpoint):
+                self.__remove(path)
+                return None
+            content = path.read_bytes()
+            # The access time records the last use (for LRU eviction), the modification time the storage (for TTL)
+            os.utime(path, (now, stat.st_mtime))
+            return content
+        except FileNotFoundError:
+            return None
+
+    def put(self, api_name: str, key: str, content: bytes) -> None:
+        """
+        Store the content under the key and evict the least recently used entries if the cache is full.
+
+        :param api_name: The api name the entry belongs to
+        :type api_name: str
+        :param key: The entry key
+        :type key: str
+        :param content: The content to store
+        :type content: bytes
+        """
+        if len(content) > self.max_size:
+            return
+        path = self.__path(api_name, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+        temporary_path.write_bytes(content)
+        with self.__lock:
+            previous_size = path.stat().st_size if path.exists() else 0
+            os.replace(temporary_path, path)
+            self.__size += len(content) - previous_size
+            if self.__size > self.max_size:
+                self.__evict()
+
+    def invalidate(self, api_name: Optional[str] = None) -> None:
+        """
+        Remove the cached entries of an api, or of every api when none is specified.
+
+        :param api_name: The api name (e.g. 'obs-webapp')
+        :type api_name: Optional[str]
+
+        >>> from dace_query.cache import ResponseCache
+        >>> ResponseCache(directory='/tmp/dace-cache').invalidate('exo-webapp')
+        """
+        for entry in self.__entries(api_name):
+            self.__remove(entry)
+
+    def __evict(self) -> None:
+        """Internal stuff"""
+        entries = sorted(((entry.stat(), entry) for entry in self.__entries()), key=lambda item: item[0].st_atime)
+        for stat, entry in entries:
+            if self.__size <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            self.__size -= stat.st_size
+
+    def __remove(self, path: Path) -> None:
+        """Internal stuff"""
+        with self.__lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                self.__size -= size
+            except FileNotFoundError:
+                pass
+
+    def __entries(self, api_name: Optional[str] = None) -> list[Path]:
+        """Internal stuff"""
+        directory = self.directory if api_name is None else Path(self.directory, api_name)
+        return list(directory.rglob(f'*{CACHE_FILE_SUFFIX}'))
+
+    def __path(self, api_name: str, key: str) -> Path:
+        """Internal stuff"""
+        return Path(self.directory, api_name, f'{key}{CACHE_FILE_SUFFIX}')
@@ -1 +1,8 @@
-from dace_query.catalog.catalog import Catalog, CatalogClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['CatalogClass', 'Catalog']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'CatalogClass': 'dace_query.catalog.catalog',
+    'Catalog': 'dace_query.catalog.catalog',
+})
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from astropy.table import Table
+    from pandas import DataFrame
 
 CATALOG_DEFAULT_LIMIT = 10000
 
@@ -39,7 +43,7 @@ class CatalogClass:
         self.__OBSERVATION_API = 'obs-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -59,7 +63,8 @@ class CatalogClass:
                        limit: Optional[int] = CATALOG_DEFAULT_LIMIT,
                        filters: Optional[dict] = None,
                        sort: Optional[dict] = None,
-                       output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+                       output_format: Optional[str] = None,
+                       columns: Optional[list[str]] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
         """
         Query the catalog database to retrieve data in the chosen format.
 
@@ -79,6 +84,8 @@ class CatalogClass:
         :type sort: Optional[dict]
         :param output_format: Type of data returns
         :type output_format: str
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: The desired data in the chosen output format
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -100,12 +107,11 @@ class CatalogClass:
                 params={
                     'limit': str(limit),
                     'filters': json.dumps(filters),
-                    'sort': json.dumps(sort)
+                    'sort': json.dumps(sort),
+                    'col': columns
                 }
-            ), output_format=output_format)
+            ), output_format=output_format, columns=columns)
 
 
-Catalog: CatalogClass = CatalogClass()
-"""
-Catalog instance
-"""
+# Catalog instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Catalog': CatalogClass})
@@ -1 +1,8 @@
-from dace_query.cheops.cheops import Cheops, CheopsClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['CheopsClass', 'Cheops']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'CheopsClass': 'dace_query.cheops.cheops',
+    'Cheops': 'dace_query.cheops.cheops',
+})
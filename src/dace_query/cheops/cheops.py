@@ -2,26 +2,36 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Union, Optional
+from io import BytesIO
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.coordinates import SkyCoord, Angle
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
-from dace_query.dace import NoDataException
+import dace_query.dace
+from dace_query.dace import DaceClass, NoDataException
+from dace_query.lazy import lazy_attributes
+from dace_query.mixins import PagesMixin, RegionsMixin
+
+if TYPE_CHECKING:
+    from astropy.coordinates import SkyCoord, Angle
+    from astropy.table import Table
+    from pandas import DataFrame
 
 CHEOPS_DEFAULT_LIMIT = 10000
 
+# The objects a diagnostic movie can be returned as, being neither a FITS file nor an archive
+MOVIE_IN_MEMORY_TYPES = ('bytes', 'bytesio')
+
 
-class CheopsClass:
+class CheopsClass(PagesMixin, RegionsMixin):
     """
     The cheops class.
     Use to retrieve data from the cheops module.
 
     **A cheops instance is already provided, to use it :**
     """
+    DEFAULT_LIMIT = CHEOPS_DEFAULT_LIMIT
+    PAGE_KEY = 'date_mjd_start'
     __ACCEPTED_FILE_TYPES = ['lightcurves', 'images', 'reports', 'full', 'sub', 'all']
     __ACCEPTED_CATALOGS = ['planet', 'stellar']
 
@@ -39,7 +49,7 @@ class CheopsClass:
         self.__CHEOPS_API = 'cheops-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -59,7 +69,8 @@ class CheopsClass:
                        limit: Optional[int] = CHEOPS_DEFAULT_LIMIT,
                        filters: Optional[dict] = None,
                        sort: Optional[dict] = None,
-                       output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+                       output_format: Optional[str] = None,
+                       columns: Optional[list[str]] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
         """
         Query the cheops database to retrieve available visits in the chosen format.
 
@@ -75,6 +86,8 @@ class CheopsClass:
         :type sort: Optional[dict]
         :param output_format: Type of data returns
         :type output_format: Optional[str]
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: The desired data in the chosen output format
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -94,9 +107,10 @@ class CheopsClass:
                 params={
                     'limit': str(limit),
                     'filters': json.dumps(filters),
-                    'sort': json.dumps(sort)
+                    'sort': json.dumps(sort),
+                    'col': columns
                 }
-            ), output_format=output_format)
+            ), output_format=output_format, columns=columns)
 
     def query_catalog(self,
                       catalog: str,
@@ -245,7 +259,9 @@ class CheopsClass:
                  file_type: str,
                  filters: Optional[dict] = None,
                  output_directory: Optional[str] = None,
-                 output_filename: Optional[str] = None) -> None:
+                 output_filename: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 merge: Optional[bool] = False) -> Optional[dict]:
         """
         Download CHEOPS products (FITS, PDF,...) for specific visits and save it locally depending on the specified
         arguments.
@@ -264,11 +280,18 @@ class CheopsClass:
         :type output_directory: Optional[str]
         :param output_filename: The filename for the download
         :type output_filename: Optional[str]
-        :return: None
+        :param batch_size: Split the download into archives of at most this number of files, prepared and downloaded
+            concurrently
+        :type batch_size: Optional[int]
+        :param merge: Extract the archives of the batches into the output directory
+        :type merge: Optional[bool]
+        :return: The manifest of the batches when downloading by batches, None otherwise
+        :rtype: Optional[dict]
 
         >>> from dace_query.cheops import Cheops
         >>> filters_to_use = {'file_key': {'contains': 'CH_PR300001_TG000301_V0000'}}
         >>> # Cheops.download('all', filters_to_use, output_directory='/tmp', output_filename='cheops.tar.gz')
+        >>> # Cheops.download('lightcurves', filters_to_use, output_directory='/tmp', batch_size=100, merge=True)
 
         """
         if file_type not in self.__ACCEPTED_FILE_TYPES:
@@ -279,19 +302,26 @@ class CheopsClass:
         cheops_data = self.query_database(filters=filters, output_format='dict')
 
         files = cheops_data.get('file_rootpath', [])
+        if batch_size is not None:
+            return self.dace.download_batches(
+                api_name=self.__CHEOPS_API,
+                obs_type='photometry',
+                files=files,
+                prepare=lambda batch_files: self.__prepare_download(file_type, batch_files),
+                batch_size=batch_size,
+                output_directory=output_directory,
+                output_filename=output_filename,
+                merge=merge
+            )
 
-        download_id = self.dace.request_post(
-            api_name=self.__CHEOPS_API,
-            endpoint='download',
-            data=json.dumps({'fileType': file_type, 'files': files})
-        )
+        download_id = self.__prepare_download(file_type, files)
         if not download_id:
             return None
 
         self.dace.persist_file_on_disk(
             api_name=self.__CHEOPS_API,
             obs_type='photometry',
-            download_id=download_id['key'],
+            download_id=download_id,
             output_directory=output_directory,
             output_filename=output_filename
         )
@@ -300,7 +330,9 @@ class CheopsClass:
                        files: list,
                        file_type: Optional[str] = 'all',
                        output_directory: Optional[str] = None,
-                       output_filename: Optional[str] = None):
+                       output_filename: Optional[str] = None,
+                       extract: Optional[bool] = False,
+                       member_filter: Optional[Union[str, list[str]]] = None):
         """
         Download reduction products specified in argument for the list of raw specified and save it locally.
 
@@ -316,6 +348,12 @@ class CheopsClass:
         :type output_directory: Optional[str]
         :param output_filename: The file for the download
         :type output_filename: Optional[str]
+        :param extract: Extract the files of the archive into the output directory while downloading it, instead of
+            saving the archive
+        :type extract: Optional[bool]
+        :param member_filter: When extracting, only keep the files matching these glob patterns
+            (e.g. '*_SCI_COR_Lightcurve-DEFAULT_*.fits')
+        :type member_filter: Optional[Union[str, list[str]]]
         :return: None
 
         >>> from dace_query.cheops import Cheops
@@ -326,31 +364,42 @@ class CheopsClass:
         if files is None:
             raise NoDataException
         files = list(map(lambda file: f'{file}.fits' if not file.endswith('.fits') else file, files))
-        download_response = self.dace.request_post(
-            api_name=self.__CHEOPS_API,
-            endpoint='download',
-            data=json.dumps(
-                {'fileType': file_type, 'files': files}
-            )
-        )
-        if not download_response:
+        download_id = self.__prepare_download(file_type, files)
+        if not download_id:
             return None
         self.dace.persist_file_on_disk(
             api_name=self.__CHEOPS_API,
             obs_type='photometry',
-            download_id=download_response['key'],
+            download_id=download_id,
             output_directory=output_directory,
-            output_filename=output_filename
+            output_filename=output_filename,
+            extract=extract,
+            member_filter=member_filter
+        )
+
+    def __prepare_download(self, file_type: str, files: list[str]) -> Optional[str]:
+        """Internal stuff"""
+        download_response = self.dace.request_post(
+            api_name=self.__CHEOPS_API,
+            endpoint='download',
+            data=json.dumps({'fileType': file_type, 'files': files})
         )
+        if not download_response:
+            return None
+        return download_response['key']
 
     def download_diagnostic_movie(self,
                                   file_key: str,
                                   aperture: Optional[str] = 'default',
                                   output_directory: Optional[str] = None,
-                                  output_filename: Optional[str] = None) -> None:
+                                  output_filename: Optional[str] = None,
+                                  in_memory: Optional[str] = None) -> Optional[Union[bytes, BytesIO]]:
         """
         Download diagnostic movie for a Cheops file_key.
 
+        The movie can also be returned in memory, without touching the disk, as raw bytes (``in_memory='bytes'``) or a
+        file-like object (``in_memory='bytesio'``).
+
         Aperture types available are [ 'default', 'optimal, 'rinf', 'rsup' ].
 
         :param file_key: The cheops visit file key
@@ -361,12 +410,28 @@ class CheopsClass:
         :type output_directory: Optional[str]
         :param output_filename:  The filename for the download
         :type output_filename: Optional[str]
-        :return: None
+        :param in_memory: Return the movie instead of saving it, as 'bytes' or 'bytesio'
+        :type in_memory: Optional[str]
+        :return: The movie content when returned in memory, None otherwise
+        :rtype: Optional[Union[bytes, BytesIO]]
+        :raises ValueError: if in_memory is neither 'bytes' nor 'bytesio'
 
         >>> from dace_query.cheops import Cheops
         >>> # Cheops.download_diagnostic_movie(file_key='CH_PR100018_TG027204_V0200', output_directory='/tmp', output_filename='cheops_movie.mp4')
+        >>> # movie = Cheops.download_diagnostic_movie(file_key='CH_PR100018_TG027204_V0200', in_memory='bytes')
 
         """
+        if in_memory is not None:
+            if in_memory not in MOVIE_IN_MEMORY_TYPES:
+                raise ValueError('in_memory must be one of these values : ' + ','.join(MOVIE_IN_MEMORY_TYPES))
+            return self.dace.download_to_memory(
+                api_name=self.__CHEOPS_API,
+                endpoint=f'diagnosticMovie/{file_key}',
+                params={
+                    'aperture': str(aperture)
+                },
+                in_memory=in_memory
+            )
         self.dace.download_file(
             api_name=self.__CHEOPS_API,
             endpoint=f'diagnosticMovie/{file_key}',
@@ -405,7 +470,5 @@ class CheopsClass:
         )
 
 
-Cheops: CheopsClass = CheopsClass()
-"""
-Cheops instance
-"""
+# Cheops instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Cheops': CheopsClass})
@@ -5,26 +5,61 @@ import hashlib
 import json
 import logging
 import re
+import tarfile
+import threading
 import time
 import urllib.parse
-from collections import defaultdict
+from collections import Counter, defaultdict
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from functools import partial
 from pathlib import Path
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional, Union
 
 import numpy as np
 import requests
-from astropy.coordinates import SkyCoord, Angle
-from astropy.table import Table
-from pandas import DataFrame
 from requests import RequestException, HTTPError
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 
 from dace_query.__version__ import __version__, __title__, __py_version__
+from dace_query.cache import ResponseCache, DEFAULT_CACHE_TTL, DEFAULT_CACHE_MAX_SIZE_MB
+from dace_query.retry import RetryPolicy, DEFAULT_MAX_ATTEMPTS, DEFAULT_BACKOFF, DEFAULT_MAX_BACKOFF
+from dace_query.throttle import Throttle
+from dace_query.filters import QueryResults, DEFAULT_QUERY_RESULTS_MAX_ENTRIES, DEFAULT_QUERY_RESULTS_TTL, \
+    get_row_identity
+from dace_query.decoders import JSON_MEDIA_TYPE, JsonDecoder, format_accept, get_media_type
+from dace_query.instrumentation import Observer, Span
+from dace_query.download import RangeDownload, DownloadSizeError, DEFAULT_DOWNLOAD_CONNECTIONS, \
+    DEFAULT_DOWNLOAD_CHUNK_SIZE_MB, IN_MEMORY_TYPES, PART_SUFFIX, JOURNAL_SUFFIX, extract_tar, match_member, \
+    split_filename
+from dace_query.lazy import lazy_attributes
+
+# pandas and astropy are imported by the conversions needing them only, importing them takes most of the startup time
+if TYPE_CHECKING:
+    from astropy.coordinates import SkyCoord, Angle
+    from astropy.io import fits
+    from astropy.table import Table
+    from pandas import DataFrame
 
 COORDINATES_DB_COLUMN = 'obj_pos_coordinates_hms_dms'
 
 MB_SIZE = 1048576
 
+DEFAULT_POOL_SIZE = 10
+
+DEFAULT_PAGE_SIZE = 5000
+
+# The value vectors a DACE parameter may hold, with the numpy dtype used to decode them ('NaN' strings included)
+PARAMETER_VALUES_TYPES = (
+    ('doubleValues', np.float64),
+    ('floatValues', np.float64),
+    ('intValues', None),
+    ('stringValues', None),
+    ('boolValues', np.bool_),
+)
+
 
 class NoDataException(Exception):
     """Raised when no data are provided"""
@@ -67,6 +102,74 @@ class DaceClass:
         cheops-webapp = https://cheops-webapp.obsuksprd2.unige.ch/
         monitoring-webapp = https://pipe-webapp.obsuksprd2.unige.ch/
 
+        [http]
+
+        pool_size = 10
+        accept_encoding = auto
+
+        [throttle]
+
+        rate = 0
+        burst = 0
+        max_in_flight = 0
+
+        [throttle.obs-webapp]
+
+        rate = 20
+        max_in_flight = 8
+
+        [json]
+
+        decoder = auto
+
+        [retry]
+
+        max_attempts = 3
+        backoff = 0.5
+        max_backoff = 30
+
+        [download]
+
+        connections = 4
+        chunk_size_mb = 8
+
+        [cache]
+
+        enabled = false
+        directory = ~/.cache/dace-query
+        ttl = 3600
+        max_size_mb = 512
+
+        [cache.ttl]
+
+        exo-webapp = 86400
+        obs-webapp/catalog = 86400
+
+    The optional **[http]** section tunes the HTTP connections. Each API host gets its own keep-alive session whose
+    connection pool holds up to ``pool_size`` connections, shared by every thread using the dace instance. The query
+    responses are requested compressed with the ``accept_encoding`` codings, by default every coding supported by the
+    installed libraries (gzip and deflate, plus br with brotli and zstd with zstandard), and decompressed while they
+    are received ; ``identity`` disables the compression.
+
+    The optional **[throttle]** section limits the requests sent to each API host : at most ``rate`` requests per
+    second (with bursts of up to ``burst`` requests) and ``max_in_flight`` concurrent requests, 0 meaning no limit. A
+    **[throttle.<api name>]** section overrides these limits for a specific API. The limits are shared by every thread
+    and asynchronous task using the dace instance (see :meth:`set_throttle` and :meth:`get_throttle_metrics`).
+
+    The optional **[json]** section selects the library decoding the json responses (see
+    :class:`dace_query.decoders.JsonDecoder`) : by default the fastest one installed (orjson, msgspec or the standard
+    json module).
+
+    The optional **[retry]** section configures the retries of the requests failing with a transient error (see
+    :class:`dace_query.retry.RetryPolicy`), ``max_attempts = 1`` disabling them.
+
+    The optional **[download]** section tunes the file downloads. When the server accepts range requests, a file larger
+    than ``chunk_size_mb`` is fetched as byte ranges over ``connections`` parallel connections, and an interrupted
+    download resumes where it stopped.
+
+    The optional **[cache]** section enables an on-disk cache of the query responses (see :meth:`enable_cache`), the
+    **[cache.ttl]** section overriding the time to live (in seconds) of the responses of specific APIs or endpoints.
+
     **A dace instance is already provided, to use it :**
 
     >>> from dace_query import Dace
@@ -74,7 +177,8 @@ class DaceClass:
 
     """
 
-    def __init__(self, dace_rc_config_path: Optional[Path] = None, config_path: Optional[Path] = None):
+    def __init__(self, dace_rc_config_path: Optional[Path] = None, config_path: Optional[Path] = None,
+                 pool_size: Optional[int] = None):
         """
         Create a configurable dace object which loads the user's .dacerc and the config file specified in arguments.
 
@@ -82,6 +186,8 @@ class DaceClass:
         :type dace_rc_config_path: Optional[Path]
         :param config_path: The config.ini filepath, defines which DACE endpoints to use.
         :type config_path: Optional[Path]
+        :param pool_size: The maximum number of connections kept alive per API host (overrides the config file)
+        :type pool_size: Optional[int]
 
         >>> from dace_query import DaceClass
         >>> from pathlib import Path
@@ -122,6 +228,434 @@ class DaceClass:
             endpoints_config.read(endpoints_path)
             self.__cfg = endpoints_config
 
+        # One pooled keep-alive session per API host, created on first use
+        if pool_size is None:
+            pool_size = self.get_config_int('http', 'pool_size', DEFAULT_POOL_SIZE)
+        self.pool_size = pool_size
+        accept_encoding = self.get_config_str('http', 'accept_encoding', 'auto')
+        self.accept_encoding = ACCEPT_ENCODING if accept_encoding == 'auto' else accept_encoding
+        self.__sessions = {}
+        self.__throttles = {}
+        self.__sessions_lock = threading.Lock()
+
+        # Decoding of the responses, json unless a decoder of a more compact encoding is registered
+        self.json_decoder = JsonDecoder(self.get_config_str('json', 'decoder', 'auto'))
+        self.decoders = {}
+
+        # Retries of the transient errors
+        self.retry = RetryPolicy(
+            max_attempts=self.get_config_int('retry', 'max_attempts', DEFAULT_MAX_ATTEMPTS),
+            backoff=self.get_config_float('retry', 'backoff', DEFAULT_BACKOFF),
+            max_backoff=self.get_config_float('retry', 'max_backoff', DEFAULT_MAX_BACKOFF),
+            log=self.log
+        )
+
+        # Parallel range downloads
+        self.download_connections = self.get_config_int('download', 'connections', DEFAULT_DOWNLOAD_CONNECTIONS)
+        self.download_chunk_size = self.get_config_int('download', 'chunk_size_mb',
+                                                       DEFAULT_DOWNLOAD_CHUNK_SIZE_MB) * MB_SIZE
+
+        # Observers of the timing spans of the calls
+        self.observers = []
+        self.__call_context = threading.local()
+
+        # Optional in-memory results of the last queries, answering the narrower ones
+        self.query_results = None
+
+        # Optional on-disk response cache
+        self.cache = None
+        self.__cache_bypass = threading.local()
+        if self.__cfg is not None and self.__cfg.getboolean('cache', 'enabled', fallback=False):
+            self.enable_cache(
+                directory=self.__cfg.get('cache', 'directory', fallback=None),
+                ttl=self.__cfg.getfloat('cache', 'ttl', fallback=DEFAULT_CACHE_TTL),
+                api_ttls={api_name: float(ttl) for api_name, ttl in self.__cfg.items('cache.ttl')}
+                if self.__cfg.has_section('cache.ttl') else None,
+                max_size_mb=self.__cfg.getfloat('cache', 'max_size_mb', fallback=DEFAULT_CACHE_MAX_SIZE_MB)
+            )
+
+    def get_config_str(self, section: str, option: str, fallback: str) -> str:
+        """Internal stuff"""
+        if self.__cfg is None:
+            return fallback
+        return self.__cfg.get(section, option, fallback=fallback)
+
+    def get_config_int(self, section: str, option: str, fallback: int) -> int:
+        """Internal stuff"""
+        if self.__cfg is None:
+            return fallback
+        return self.__cfg.getint(section, option, fallback=fallback)
+
+    def get_config_float(self, section: str, option: str, fallback: float) -> float:
+        """Internal stuff"""
+        if self.__cfg is None:
+            return fallback
+        return self.__cfg.getfloat(section, option, fallback=fallback)
+
+    def get_session(self, api_name: str) -> requests.Session:
+        """Internal stuff"""
+        session = self.__sessions.get(api_name)
+        if session is None:
+            with self.__sessions_lock:
+                session = self.__sessions.get(api_name)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self.__sessions[api_name] = session
+        return session
+
+    def add_observer(self, observer: Observer) -> None:
+        """
+        Add an observer receiving the timing spans of the calls : the request (with the bytes received and the cache
+        hit or miss), the json decoding, the decoding of the parameters and the conversion to the output format (with
+        the number of rows and columns).
+
+        :param observer: The observer
+        :type observer: Observer
+
+        >>> from dace_query import Dace
+        >>> from dace_query.instrumentation import TimingAggregator
+        >>> aggregator = TimingAggregator()
+        >>> Dace.add_observer(aggregator)
+        """
+        self.observers.append(observer)
+
+    def remove_observer(self, observer: Observer) -> None:
+        """
+        Remove an observer added with :meth:`add_observer`.
+
+        :param observer: The observer
+        :type observer: Observer
+        """
+        self.observers.remove(observer)
+
+    def register_decoder(self, media_type: str, decode: Callable[[bytes], dict]) -> None:
+        """
+        Register the decoder of an encoding of the responses (e.g. protobuf). The encodings of the registered decoders
+        are requested in their registration order through the Accept header, json being the last resort : a server
+        not supporting them answers in json, still decoded by :attr:`json_decoder`.
+
+        The decoder returns the same structure as the json responses. The values of the parameters may be numpy
+        arrays, which are then used as columns without conversion.
+
+        :param media_type: The media type of the encoding (e.g. 'application/x-protobuf')
+        :type media_type: str
+        :param decode: The function decoding a response body
+        :type decode: Callable[[bytes], dict]
+
+        >>> from dace_query import Dace
+        >>> Dace.register_decoder('application/x-protobuf', decode_parameters) # doctest: +SKIP
+        """
+        if get_media_type(media_type) == JSON_MEDIA_TYPE:
+            raise ValueError('The json responses are decoded by the json decoder, see Dace.json_decoder')
+        self.decoders[get_media_type(media_type)] = decode
+
+    def unregister_decoder(self, media_type: str) -> None:
+        """
+        Remove a decoder registered with :meth:`register_decoder`.
+
+        :param media_type: The media type of the encoding
+        :type media_type: str
+        """
+        self.decoders.pop(get_media_type(media_type), None)
+
+    def get_throttle(self, api_name: str) -> Throttle:
+        """Internal stuff"""
+        throttle = self.__throttles.get(api_name)
+        if throttle is None:
+            with self.__sessions_lock:
+                throttle = self.__throttles.get(api_name)
+                if throttle is None:
+                    max_in_flight = self.__get_throttle_option(api_name, 'max_in_flight')
+                    throttle = Throttle(rate=self.__get_throttle_option(api_name, 'rate'),
+                                        burst=self.__get_throttle_option(api_name, 'burst'),
+                                        max_in_flight=None if max_in_flight is None else int(max_in_flight))
+                    self.__throttles[api_name] = throttle
+        return throttle
+
+    def set_throttle(self, api_name: str, rate: Optional[float] = None, burst: Optional[float] = None,
+                     max_in_flight: Optional[int] = None) -> Throttle:
+        """
+        Limit the requests sent to an API host, overriding the limits of the config file. A missing or zero limit means
+        no limit.
+
+        :param api_name: The api name (e.g. 'obs-webapp')
+        :type api_name: str
+        :param rate: The maximum number of requests per second
+        :type rate: Optional[float]
+        :param burst: The maximum number of requests let through at once by the rate limit
+        :type burst: Optional[float]
+        :param max_in_flight: The maximum number of concurrent requests
+        :type max_in_flight: Optional[int]
+        :return: The throttle of the API host
+        :rtype: Throttle
+
+        >>> from dace_query import Dace
+        >>> throttle = Dace.set_throttle('obs-webapp', rate=20, max_in_flight=8)
+        """
+        throttle = Throttle(rate=rate, burst=burst, max_in_flight=max_in_flight)
+        with self.__sessions_lock:
+            self.__throttles[api_name] = throttle
+        return throttle
+
+    def get_throttle_metrics(self) -> dict[str, dict[str, float]]:
+        """
+        Get, for each API host queried, the number of requests sent, the requests in flight and the time spent waiting
+        for the rate and concurrency limits.
+
+        :return: The metrics by api name (times in seconds)
+        :rtype: dict[str, dict[str, float]]
+
+        >>> from dace_query import Dace
+        >>> metrics = Dace.get_throttle_metrics()
+        """
+        with self.__sessions_lock:
+            throttles = dict(self.__throttles)
+        return {api_name: throttle.get_metrics() for api_name, throttle in throttles.items()}
+
+    def close(self) -> None:
+        """
+        Close every HTTP session opened by this dace instance and release their pooled connections.
+
+        >>> from dace_query import DaceClass
+        >>> dace_instance = DaceClass()
+        >>> dace_instance.close()
+        """
+        with self.__sessions_lock:
+            sessions, self.__sessions = self.__sessions, {}
+        for session in sessions.values():
+            session.close()
+
+    def enable_cache(self,
+                     directory: Optional[Union[Path, str]] = None,
+                     ttl: Optional[float] = DEFAULT_CACHE_TTL,
+                     api_ttls: Optional[dict[str, float]] = None,
+                     max_size_mb: Optional[float] = DEFAULT_CACHE_MAX_SIZE_MB) -> ResponseCache:
+        """
+        Enable the on-disk cache of the query responses.
+
+        Responses are cached by api, endpoint, query parameters and user, so that private and public data never mix.
+        Downloads are never cached.
+
+        :param directory: The cache directory (default ~/.cache/dace-query)
+        :type directory: Optional[Union[Path, str]]
+        :param ttl: The default time to live of a response, in seconds
+        :type ttl: Optional[float]
+        :param api_ttls: Time to live by api name (e.g. 'exo-webapp') or endpoint (e.g. 'obs-webapp/catalog')
+        :type api_ttls: Optional[dict[str, float]]
+        :param max_size_mb: The maximum size of the cache, the least recently used responses being evicted first
+        :type max_size_mb: Optional[float]
+        :return: The response cache
+        :rtype: ResponseCache
+
+        >>> from dace_query import Dace
+        >>> cache = Dace.enable_cache(directory='/tmp/dace-cache', api_ttls={'exo-webapp': 86400})
+        >>> Dace.disable_cache()
+        """
+        self.cache = ResponseCache(directory=directory, ttl=ttl, api_ttls=api_ttls, max_size_mb=max_size_mb)
+        return self.cache
+
+    def disable_cache(self) -> None:
+        """
+        Disable the on-disk cache of the query responses. Cached responses are kept on disk.
+
+        >>> from dace_query import Dace
+        >>> Dace.disable_cache()
+        """
+        self.cache = None
+
+    def enable_query_reuse(self, max_entries: Optional[int] = DEFAULT_QUERY_RESULTS_MAX_ENTRIES,
+                           ttl: Optional[float] = DEFAULT_QUERY_RESULTS_TTL) -> QueryResults:
+        """
+        Keep the results of the last queries in memory and answer the narrower queries from them, without calling
+        DACE : a query whose filters are tighter than those of a previous query on the same database (with the same
+        other parameters) is evaluated on the client from its results, if they were complete (fewer rows than their
+        limit) and younger than the TTL. The queries not using the cache (e.g. the synchronisation of the time series)
+        are neither answered from nor kept in the results. See :class:`dace_query.filters.QueryResults`.
+
+        :param max_entries: The maximum number of results kept, the least recently used ones being dropped
+        :type max_entries: Optional[int]
+        :param ttl: The time to live of the results, in seconds (None to keep them until dropped)
+        :type ttl: Optional[float]
+        :return: The kept query results
+        :rtype: QueryResults
+
+        >>> from dace_query import Dace
+        >>> from dace_query.exoplanet import Exoplanet
+        >>> results = Dace.enable_query_reuse()
+        >>> values = Exoplanet.query_database(limit=100000, filters={'obj_orb_period_day': {'max': 10}})
+        >>> # Answered from the previous results
+        >>> values = Exoplanet.query_database(limit=100, filters={'obj_orb_period_day': {'min': 2, 'max': 5}},
+        ...                                   sort={'obj_phys_mass_mjup': 'desc'})
+        """
+        self.query_results = QueryResults(max_entries=max_entries, ttl=ttl)
+        return self.query_results
+
+    def disable_query_reuse(self) -> None:
+        """
+        Stop reusing the results of the previous queries, and forget them.
+
+        >>> from dace_query import Dace
+        >>> Dace.disable_query_reuse()
+        """
+        self.query_results = None
+
+    @contextmanager
+    def bypass_cache(self):
+        """
+        Within this context, queries of the current thread skip the cached responses and the reused query results,
+        and always call DACE. The fresh responses still replace the cached ones.
+
+        >>> from dace_query import Dace
+        >>> from dace_query.exoplanet import Exoplanet
+        >>> with Dace.bypass_cache():
+        ...     values = Exoplanet.query_database(limit=10)
+        """
+        previous_state = getattr(self.__cache_bypass, 'enabled', False)
+        self.__cache_bypass.enabled = True
+        try:
+            yield
+        finally:
+            self.__cache_bypass.enabled = previous_state
+
+    def run_concurrently(self, function: Callable, items: Iterable,
+                         max_workers: Optional[int] = None) -> Iterator[tuple[Any, Any, Optional[Exception]]]:
+        """Internal stuff"""
+        """
+        Call the function on every item from a bounded thread pool (by default as large as the connection pool) and
+        yield (item, result, error) tuples as soon as each call completes. A failing call does not stop the others.
+        """
+        with ThreadPoolExecutor(max_workers=self.pool_size if max_workers is None else max_workers) as executor:
+            futures = {executor.submit(function, item): item for item in items}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        yield futures[future], future.result(), None
+                    except Exception as e:
+                        yield futures[future], None, e
+            finally:
+                # Stop the pending calls if the caller stops iterating
+                for future in futures:
+                    future.cancel()
+
+    def iter_pages(self, query: Callable[..., dict[str, np.ndarray]],
+                   default_key: str,
+                   filters: Optional[dict] = None,
+                   sort: Optional[dict] = None,
+                   page_size: Optional[int] = DEFAULT_PAGE_SIZE,
+                   output_format: Optional[str] = None) -> Iterator:
+        """Internal stuff"""
+        """
+        Page through a query_database like function (called with limit, filters, sort and output_format='numpy') with
+        keyset pagination: the rows are sorted on a key column (the first sort column if any, otherwise the default key
+        column, ascending) and each page asks for the rows from the last key seen onwards. The rows sharing the
+        boundary key are not repeated, whatever their order among the rows sharing it : the rows already yielded are
+        recognized by their values. The pages can only follow keys shared by fewer than page_size rows.
+        The rows whose key is missing (None, NaN) cannot be ordered, they are left out of the pages and yielded last,
+        in one page, which they must not fill.
+        """
+        filters = {} if filters is None else filters
+        sort = {default_key: 'asc'} if not sort else sort
+        key, direction = next(iter(sort.items()))
+        bound = 'max' if str(direction).lower() == 'desc' else 'min'
+
+        last_value, yielded_at_last_value = None, Counter()
+        while True:
+            page_filters = dict(filters)
+            page_filters[key] = {**filters.get(key, {}), 'empty': False}
+            if last_value is not None:
+                page_filters[key][bound] = last_value
+            page = query(limit=page_size, filters=page_filters, sort=sort, output_format='numpy')
+            keys = page.get(key)
+            if keys is None or len(keys) == 0:
+                break
+            keys = np.asarray(keys)
+            full = len(keys) >= page_size
+            boundary_value = keys[-1].item() if isinstance(keys[-1], np.generic) else keys[-1]
+            if full and keys[0] == keys[-1]:
+                raise ValueError(f'At least {page_size} rows share the value {boundary_value} of {key}, '
+                                 f'use a larger page size or a more selective sort column')
+            if full and (boundary_value is None or isinstance(boundary_value, float) and
+                         not np.isfinite(boundary_value)):
+                raise ValueError(f'The pages cannot follow the rows missing a value of {key}')
+
+            # Skip the rows of the boundary value already yielded by the previous pages
+            kept = np.ones(len(keys), dtype=bool)
+            if last_value is not None:
+                for row in np.flatnonzero(keys == last_value):
+                    identity = get_row_identity(page, row)
+                    if yielded_at_last_value[identity]:
+                        yielded_at_last_value[identity] -= 1
+                        kept[row] = False
+            if kept.any():
+                yield self.convert_to_format({column: np.asarray(values)[kept] for column, values in page.items()}
+                                             if not kept.all() else page, output_format)
+            if not full:
+                break
+
+            if boundary_value != last_value:
+                yielded_at_last_value = Counter()
+            for row in np.flatnonzero((keys == keys[-1]) & kept):
+                yielded_at_last_value[get_row_identity(page, row)] += 1
+            last_value = boundary_value
+
+        page = query(limit=page_size, filters={**filters, key: {**filters.get(key, {}), 'empty': True}}, sort=sort,
+                     output_format='numpy')
+        rows = len(next(iter(page.values()), ()))
+        if rows >= page_size:
+            raise ValueError(f'At least {page_size} rows miss a value of {key}, use a larger page size or filter them '
+                             f'out with {{\'{key}\': {{\'empty\': False}}}}')
+        if rows:
+            yield self.convert_to_format(page, output_format)
+
+    def query_regions(self, query: Callable[..., dict[str, np.ndarray]],
+                      sky_coords: SkyCoord,
+                      radius: Angle,
+                      limit: Optional[int] = None,
+                      filters: Optional[dict] = None,
+                      merge_radius: Optional[Angle] = None,
+                      max_workers: Optional[int] = None,
+                      output_format: Optional[str] = None):
+        """Internal stuff"""
+        """
+        Search the regions around many positions with a query_database like function (called with limit, filters and
+        output_format='numpy') : the nearby positions are grouped into cones (see dace_query.regions.group_regions),
+        searched concurrently, and the rows found are matched with the positions on their exact separation. Each match
+        is a row of the results, whose 'source_index' column is the index of its position, the rows being ordered by
+        position.
+        """
+        from dace_query.regions import group_regions, match_sources
+
+        def query_cone(cone):
+            cone_filters = dict(filters or {})
+            cone_filters[COORDINATES_DB_COLUMN] = {'ra': cone.ra, 'dec': cone.dec, 'radius': cone.radius}
+            return query(limit=limit, filters=cone_filters, output_format='numpy')
+
+        cones = group_regions(sky_coords, radius, merge_radius=merge_radius)
+        source_indices, parts = [], []
+        for cone, data, error in self.run_concurrently(query_cone, cones, max_workers=max_workers):
+            if error is not None:
+                raise error
+            rows = len(next(iter(data.values()), ()))
+            if limit is not None and rows >= limit:
+                self.log.warning('The cone of %s sources around (%.5f, %.5f) reached the limit of %s rows, some '
+                                 'matches may be missing : use a larger limit or a smaller merge radius',
+                                 len(cone.sources), cone.ra, cone.dec, limit)
+            if rows == 0:
+                continue
+            sources, matched_rows = match_sources(sky_coords, cone, data[COORDINATES_DB_COLUMN], radius)
+            source_indices.append(sources)
+            parts.append({column: np.asarray(values)[matched_rows] for column, values in data.items()})
+
+        source_index = np.concatenate(source_indices) if source_indices else np.zeros(0, dtype=np.intp)
+        order = np.argsort(source_index, kind='stable')
+        results = {'source_index': source_index[order]}
+        for column in (parts[0] if parts else ()):
+            results[column] = np.concatenate([part[column] for part in parts])[order]
+        return self.convert_to_format(results, output_format)
+
     @staticmethod
     def transform_dict_to_encoded_json(dict_to_transform: Union[set, dict]) -> str:
         """Internal stuff"""
@@ -133,154 +667,312 @@ class DaceClass:
         return {COORDINATES_DB_COLUMN: {'ra': sky_coord.ra.degree, 'dec': sky_coord.dec.degree,
                                         'radius': angle.degree}}
 
-    def transform_to_format(self, json_data: dict, output_format: Optional[str] = None):
+    def transform_to_format(self, json_data: dict, output_format: Optional[str] = None,
+                            columns: Optional[Iterable[str]] = None):
         """Internal stuff"""
-        data = self.parse_parameters(json_data)
-        return self.convert_to_format(data, output_format)
+        # The spans are attributed to the last request of the thread, whose response is being transformed
+        api_name = getattr(self.__call_context, 'api_name', None)
+        endpoint = getattr(self.__call_context, 'endpoint', None)
+        with self.__span('parse_parameters', api_name, endpoint) as span:
+            data = self.parse_parameters(json_data, columns=columns)
+            span.update(rows=len(next(iter(data.values()), ())), columns=len(data))
+        with self.__span('convert_to_format', api_name, endpoint, output_format=output_format, rows=span['rows'],
+                         columns=span['columns']):
+            return self.convert_to_format(data, output_format)
 
-    def parse_parameters(self, json_data: dict) -> dict[str, list]:
+    def parse_parameters(self, json_data: dict, columns: Optional[Iterable[str]] = None) -> dict[str, np.ndarray]:
         """Internal stuff"""
         """
         Internally DACE data are provided using protobuf. The format is a list of parameters. Here we parse
-        these data to give to the user something more readable and ignore the internal stuff
+        these data to give to the user something more readable and ignore the internal stuff.
+        Each parameter is decoded once into a typed numpy column, run-length occurrences being expanded by numpy.
+        The values may already be numpy arrays when the response was decoded by a registered decoder.
+        When columns are given, the other parameters are skipped without being decoded, the errors of a parameter
+        being kept with it (or alone when only its '_err' column is given).
         """
-        data = defaultdict(list)
+        data = defaultdict(partial(np.ndarray, 0))
         if 'parameters' not in json_data:
             return data
         parameters = json_data.get('parameters')
+        columns = None if columns is None else set(columns)
         for parameter in parameters:
             variable_name = parameter.get('variableName')
-            double_values = parameter.get('doubleValues')
-            # W/A for 'NaN' values
-            if double_values is not None:
-                double_values = list(map(float, double_values))
-            float_values = parameter.get('floatValues')
-            # W/A for 'NaN' values
-            if float_values is not None:
-                float_values = list(map(float, float_values))
-            int_values = parameter.get('intValues')
-            string_values = parameter.get('stringValues')
-            bool_values = parameter.get('boolValues')
             occurrences = parameter.get('occurrences')
+            keep_values = columns is None or variable_name in columns
+            keep_errors = keep_values or variable_name + '_err' in columns
+            if not keep_errors:
+                continue
 
-            # Only one type of values can be present. So we look for the next occurrence not None. Prevent not found
-            # with an empty list to avoid having StopIteration exception
-            values = next(
-                (values_list for values_list in [double_values, float_values, int_values, string_values, bool_values] if
-                 values_list is not None), [])
-            if occurrences:
-                data[variable_name].extend(self.__transform_values_with_occurrences(values, occurrences))
-            else:
-                data[variable_name].extend(values)
+            # Only one type of values can be present. So we look for the first one not None, an empty column is
+            # used if none is found
+            if keep_values:
+                values, dtype = next(
+                    ((parameter[values_key], dtype) for values_key, dtype in PARAMETER_VALUES_TYPES if
+                     parameter.get(values_key) is not None), ([], np.float64))
+                self.__append_column(data, variable_name, self.to_column(values, dtype), occurrences)
 
             error_values = parameter.get('minErrorValues')  # min or max is symmetric
             if error_values is not None:
-                if occurrences:
-                    data[variable_name + '_err'].extend(
-                        self.__transform_values_with_occurrences(error_values, occurrences))
-                else:
-                    data[variable_name + '_err'].extend(error_values)
+                self.__append_column(data, variable_name + '_err', self.to_column(error_values, np.float64),
+                                     occurrences)
         return data
 
+    @staticmethod
+    def to_column(values: list, dtype: Optional[type] = None) -> np.ndarray:
+        """Internal stuff"""
+        """
+        Convert a list of values into a one-dimensional numpy column in a single typed conversion ('NaN' strings
+        included). Nested or ragged values, and booleans with missing ones, are kept as python objects in an object
+        column.
+        """
+        # numpy would turn a missing boolean into False
+        if dtype is np.bool_ and not isinstance(values, np.ndarray) and any(value is None for value in values):
+            dtype = object
+        try:
+            column = np.asarray(values, dtype=dtype)
+        except (ValueError, TypeError, OverflowError):
+            column = None
+        if column is None or column.ndim != 1:
+            column = np.fromiter(values, dtype=object, count=len(values))
+        return column
+
+    @staticmethod
+    def __append_column(data: dict[str, np.ndarray], variable_name: str, column: np.ndarray,
+                        occurrences: Optional[Union[list[int], np.ndarray]]) -> None:
+        """Internal stuff"""
+        if occurrences is not None and len(occurrences):
+            column = np.repeat(column, occurrences)
+        if variable_name in data:
+            column = np.concatenate((data[variable_name], column))
+        data[variable_name] = column
+
     @staticmethod
     def convert_to_format(data: dict, output_format: Optional[str]) -> Union[
         dict[str, np.ndarray], DataFrame, Table, dict]:
         """Internal stuff"""
 
+        if output_format == 'dict':
+            return defaultdict(list, {key: values if isinstance(values, list) else values.tolist()
+                                      for key, values in data.items()})
+
+        # Columns are decoded once into typed numpy arrays, the other formats wrap them without any copy
+        np_data = {key: values if isinstance(values, np.ndarray) else DaceClass.to_column(values)
+                   for key, values in data.items()}
         if output_format == 'pandas':
-            return DataFrame.from_dict(data)
+            from pandas import DataFrame
+            return DataFrame(np_data, copy=False)
         elif output_format == 'astropy_table':
-            return Table(data)
-        elif output_format == 'dict':
-            return data
+            from astropy.table import Table
+            return Table(np_data, copy=False)
         else:  # or output_format='numpy'
-            np_data = {}
-            for key, values in data.items():
-                if any(map(lambda value: type(value) == list, values)):
-                    np_data[key] = np.array(values, dtype='object')
-                else:
-                    np_data[key] = np.array(values)
             return np_data
 
     def persist_file_on_disk(self, api_name: str, obs_type: str, download_id: str,
                              params: Optional[dict] = None,
                              output_directory: Optional[str] = None,
-                             output_filename: Optional[str] = None) -> None:
+                             output_filename: Optional[str] = None,
+                             extract: Optional[bool] = False,
+                             member_filter: Optional[Union[str, Iterable[str]]] = None) -> Optional[Path]:
         """Internal stuff"""
-        self.download_file(
+        return self.download_file(
             api_name=api_name,
             endpoint=f'download/{obs_type}/{download_id}',
             params=params,
             output_directory=output_directory,
-            output_filename=output_filename
+            output_filename=output_filename,
+            extract=extract,
+            member_filter=member_filter
         )
 
+    def download_batches(self, api_name: str, obs_type: str, files: list[str],
+                         prepare: Callable[[list[str]], Optional[str]],
+                         batch_size: int,
+                         output_directory: Optional[str] = None,
+                         output_filename: Optional[str] = None,
+                         merge: Optional[bool] = False,
+                         max_workers: Optional[int] = None) -> dict:
+        """Internal stuff"""
+        """
+        Split the files into batches of batch_size files, then prepare (prepare returns the download id of a batch) and
+        download the batches concurrently. Each batch is saved as <name>_<index><extension>, or extracted into the
+        output directory when merging. A <name>_manifest.json file records the files and the outcome of every batch.
+        """
+        if batch_size is None or batch_size < 1:
+            raise ValueError('batch_size must be a positive number of files')
+        output_directory = Path.home() if output_directory is None else Path(output_directory)
+        output_directory.mkdir(parents=True, exist_ok=True)
+        name, extension = split_filename(f'{obs_type}.tar.gz' if output_filename is None else output_filename)
+        batches = [(index, files[start:start + batch_size])
+                   for index, start in enumerate(range(0, len(files), batch_size))]
+        digits = len(str(len(batches)))
+
+        def download_batch(batch: tuple[int, list[str]]) -> dict:
+            index, batch_files = batch
+            download_id = prepare(batch_files)
+            if not download_id:
+                raise RequestException('The download could not be prepared')
+            if merge:
+                members = self.extract_file(api_name=api_name, endpoint=f'download/{obs_type}/{download_id}',
+                                            output_directory=str(output_directory))
+                if members is None:
+                    raise RequestException('The file could not be downloaded')
+                return {'members': members}
+            archive_path = self.persist_file_on_disk(api_name=api_name, obs_type=obs_type, download_id=download_id,
+                                                     output_directory=str(output_directory),
+                                                     output_filename=f'{name}_{index:0{digits}d}{extension}')
+            if archive_path is None:
+                raise RequestException('The file could not be downloaded')
+            return {'archive': archive_path.name}
+
+        manifest_batches = [{'index': index, 'files': batch_files} for index, batch_files in batches]
+        for (index, _), result, error in self.run_concurrently(download_batch, batches, max_workers=max_workers):
+            if error is None:
+                manifest_batches[index].update(result)
+            else:
+                self.log.error('Batch %s of %s failed : %s', index + 1, len(batches), error)
+                manifest_batches[index]['error'] = str(error)
+
+        manifest = {'obs_type': obs_type, 'batch_size': batch_size, 'merged': bool(merge), 'batches': manifest_batches}
+        manifest_path = Path(output_directory, f'{name}_manifest.json')
+        manifest_path.write_text(json.dumps(manifest, indent=2))
+        self.log.info('Downloaded %s batches, manifest written on location : %s',
+                      sum('error' not in batch for batch in manifest_batches), manifest_path)
+        return manifest
+
     def request_get(self, api_name: str, endpoint: str, params: Optional[dict] = None,
-                    raw_response: Optional[bool] = False) -> Union[bytes, dict]:
+                    raw_response: Optional[bool] = False,
+                    use_cache: Optional[bool] = True) -> Union[bytes, dict]:
         """Internal stuff"""
 
         """
         This method does an HTTP get to DACE backend. If an apiKey has been found, it will be added in HTTP header
         :param endpoint: the DACE endpoint you want to query
+        :param use_cache: whether the response may be read from and stored in the response cache and the reused
+        query results (if enabled)
         :return: the Json response containing data
         """
-        headers = self.__prepare_request(raw_response)
+        query = None if raw_response else self.__get_reusable_query(use_cache, api_name, endpoint, params)
+        if query is not None:
+            data = self.query_results.find(*query)
+            if data is not None:
+                self.__call_context.api_name, self.__call_context.endpoint = api_name, endpoint
+                with self.__span('request', api_name, endpoint, method='GET', cache='reuse'):
+                    return self.__to_parameters(data)
 
+        headers = self.__prepare_request(raw_response)
+        cache_key = self.__get_cache_key(use_cache, api_name, endpoint, params, raw_response=raw_response,
+                                         accept=headers['Accept'])
         host = self.__cfg['api'][api_name] + endpoint
-        try:
-            response = requests.get(host, headers=headers, params=params)
-            response.raise_for_status()
+        content = self.__read_cache(api_name, endpoint, cache_key)
+        media_type = JSON_MEDIA_TYPE
+        if content is not None and not raw_response:
+            content, media_type = self.__unpack_cached(content)
+        self.__call_context.api_name, self.__call_context.endpoint = api_name, endpoint
+        with self.__span('request', api_name, endpoint, method='GET',
+                         cache=self.__get_cache_status(cache_key, content)) as span:
+            if content is None:
+                try:
+                    response = self.retry.call(
+                        partial(self.__send, api_name, 'GET', host, headers=headers, params=params),
+                        api_name, endpoint, 'GET')
+                    span.update(status_code=response.status_code, time_to_headers=response.elapsed.total_seconds(),
+                                content_encoding=response.headers.get('Content-Encoding'),
+                                bytes_wire=response.raw.tell())
+                    response.raise_for_status()
 
-            if response.ok:
-                if raw_response:
-                    return response.content
-                else:
-                    return response.json()
-            else:
-                self.log.error("Status code %s when calling %s", response.status_code, host)
-                raise RequestException
-        except HTTPError as err_h:
-            return self.__manage_http_errors(err_h)
-        except RequestException as e:
-            raise RequestException('Problem when calling {}'.format(host)) from e
+                    if response.ok:
+                        content = response.content
+                        if raw_response:
+                            self.__write_cache(api_name, cache_key, content)
+                        else:
+                            media_type = get_media_type(response.headers.get('Content-Type'))
+                            self.__write_cache(api_name, cache_key, self.__pack_cached(content, media_type))
+                    else:
+                        self.log.error("Status code %s when calling %s", response.status_code, host)
+                        raise RequestException
+                except HTTPError as err_h:
+                    return self.__manage_http_errors(err_h)
+                except RequestException as e:
+                    raise RequestException('Problem when calling {}'.format(host)) from e
+            span['bytes_in'] = len(content)
+        if raw_response:
+            return content
+        json_data = self.__decode(api_name, endpoint, content, media_type)
+        if query is not None and self.query_results is not None and 'parameters' in json_data:
+            # The results are kept as columns, given back as such to be parsed without any conversion
+            data = self.parse_parameters(json_data)
+            self.query_results.put(*query, data)
+            return self.__to_parameters(data)
+        return json_data
 
     def request_post(self, api_name: str, endpoint: str,
                      json_data: Optional[dict] = None,
                      data: Optional[str] = None,
-                     params: Optional[dict] = None) -> dict:
+                     params: Optional[dict] = None,
+                     use_cache: Optional[bool] = False) -> dict:
 
         """Internal stuff"""
-
+        """
+        Only read-only queries posting their criteria should set use_cache, download preparations must never be cached
+        """
         headers = self.__prepare_request()
+        cache_key = self.__get_cache_key(use_cache, api_name, endpoint, params, json_data=json_data, data=data,
+                                         accept=headers['Accept'])
         host = self.__cfg['api'][api_name] + endpoint
 
-        try:
-            response = requests.post(host, headers=headers, json=json_data, data=data, params=params)
-            response.raise_for_status()
-            if response.ok:
-                return response.json()
-            else:
-                self.log.error("Status code %s when calling %s", response.status_code, host)
-                raise RequestException
-        except HTTPError as err_h:
-            return self.__manage_http_errors(err_h)
-        except RequestException as e:
-            raise RequestException('Problem when calling {}'.format(host)) from e
+        content = self.__read_cache(api_name, endpoint, cache_key)
+        media_type = JSON_MEDIA_TYPE
+        if content is not None:
+            content, media_type = self.__unpack_cached(content)
+        self.__call_context.api_name, self.__call_context.endpoint = api_name, endpoint
+        with self.__span('request', api_name, endpoint, method='POST',
+                         cache=self.__get_cache_status(cache_key, content)) as span:
+            if content is None:
+                try:
+                    response = self.retry.call(
+                        partial(self.__send, api_name, 'POST', host, headers=headers, json=json_data, data=data,
+                                params=params),
+                        api_name, endpoint, 'POST')
+                    span.update(status_code=response.status_code, time_to_headers=response.elapsed.total_seconds(),
+                                content_encoding=response.headers.get('Content-Encoding'),
+                                bytes_wire=response.raw.tell())
+                    response.raise_for_status()
+                    if response.ok:
+                        content = response.content
+                        media_type = get_media_type(response.headers.get('Content-Type'))
+                        self.__write_cache(api_name, cache_key, self.__pack_cached(content, media_type))
+                    else:
+                        self.log.error("Status code %s when calling %s", response.status_code, host)
+                        raise RequestException
+                except HTTPError as err_h:
+                    return self.__manage_http_errors(err_h)
+                except RequestException as e:
+                    raise RequestException('Problem when calling {}'.format(host)) from e
+            span['bytes_in'] = len(content)
+        return self.__decode(api_name, endpoint, content, media_type)
 
     def download_file(self,
                       api_name: str,
                       endpoint: str,
                       params: Optional[dict] = None,
                       output_directory: Optional[str] = None,
-                      output_filename: Optional[str] = None) -> None:
+                      output_filename: Optional[str] = None,
+                      extract: Optional[bool] = False,
+                      member_filter: Optional[Union[str, Iterable[str]]] = None) -> Optional[Path]:
         """Internal stuff"""
+        if output_directory is None:
+            output_directory = Path.home()
+        if extract:
+            members = self.extract_file(api_name, endpoint, params=params, output_directory=output_directory,
+                                        member_filter=member_filter)
+            return None if members is None else Path(output_directory)
         try:
-            if output_directory is None:
-                output_directory = Path.home()
-            with requests.get(self.__cfg['api'][api_name] + endpoint,
-                              params=params,
-                              headers=self.__prepare_request(True),
-                              stream=True) as response:
+            range_download = None
+            with self.get_throttle(api_name).slot(), \
+                    self.get_session(api_name).get(self.__cfg['api'][api_name] + endpoint,
+                                                   params=params,
+                                                   headers=self.__prepare_request(True),
+                                                   stream=True) as response:
                 response.raise_for_status()
                 if output_filename is None:
                     output_filename = re.sub("attachment;\\s*filename\\s*=\\s*", '',
@@ -289,27 +981,147 @@ class DaceClass:
                         raise ValueError('Missing content-disposition. Please contact DACE support')
                 output_full_file_path = Path(output_directory, output_filename)
                 self.log.info("Downloading file on location : %s", output_full_file_path)
-                self.write_stream(output_full_file_path, response)
-                self.log.info('File downloaded on location : %s', output_full_file_path)
+                if self.__use_range_download(response, output_full_file_path):
+                    # The ranges are fetched once this probing request has released its slot
+                    range_download = RangeDownload(
+                        self.get_session(api_name), response.url, output_full_file_path,
+                        total_size=int(response.headers['Content-Length']),
+                        headers=self.__prepare_request(True),
+                        validator=response.headers.get('ETag', response.headers.get('Last-Modified')),
+                        connections=self.download_connections,
+                        chunk_size=self.download_chunk_size,
+                        throttle=self.get_throttle(api_name),
+                        log=self.log)
+                else:
+                    part_path = Path(f'{output_full_file_path}{PART_SUFFIX}')
+                    written = self.write_stream(part_path, response)
+                    if 'Content-Length' in response.headers and 'Content-Encoding' not in response.headers:
+                        expected = int(response.headers['Content-Length'])
+                        if written != expected:
+                            raise DownloadSizeError(f'Downloaded {written} bytes instead of {expected}')
+                    part_path.replace(output_full_file_path)
+            if range_download is not None:
+                range_download.run()
+            self.log.info('File downloaded on location : %s', output_full_file_path)
+            return output_full_file_path
         except HTTPError as err_h:
-            if err_h.response.status_code == 404:
-                self.log.error('The file is not found on DACE')
-            else:
-                self.__manage_http_errors(err_h)
+            self.__manage_download_errors(err_h)
+
+    def extract_file(self,
+                     api_name: str,
+                     endpoint: str,
+                     params: Optional[dict] = None,
+                     output_directory: Optional[str] = None,
+                     member_filter: Optional[Union[str, Iterable[str]]] = None) -> Optional[list[str]]:
+        """Internal stuff"""
+        """
+        Extract a tar archive (compressed or not) into the output directory while it is being downloaded, without ever
+        writing the archive itself. Returns the names of the extracted members.
+        """
+        output_directory = Path.home() if output_directory is None else Path(output_directory)
+        try:
+            with self.get_throttle(api_name).slot(), \
+                    self.get_session(api_name).get(self.__cfg['api'][api_name] + endpoint,
+                                                   params=params,
+                                                   headers=self.__prepare_request(True),
+                                                   stream=True) as response:
+                response.raise_for_status()
+                self.log.info("Extracting files on location : %s", output_directory)
+                # The HTTP content encoding (if any) is decoded before the archive compression
+                response.raw.decode_content = True
+                with tarfile.open(fileobj=response.raw, mode='r|*') as archive:
+                    members = extract_tar(archive, output_directory, member_filter)
+                self.log.info('%s files extracted on location : %s', len(members), output_directory)
+                return members
+        except tarfile.TarError as e:
+            self.log.error('The downloaded file is not a valid archive : %s', e)
+        except HTTPError as err_h:
+            self.__manage_download_errors(err_h)
+        return None
+
+    def download_to_memory(self,
+                           api_name: str,
+                           endpoint: str,
+                           params: Optional[dict] = None,
+                           in_memory: Optional[str] = 'bytes',
+                           member_filter: Optional[Union[str, Iterable[str]]] = None) \
+            -> Optional[Union[bytes, BytesIO, fits.HDUList, Iterator[tuple[str, bytes]]]]:
+        """Internal stuff"""
+        """
+        Download a file without touching the disk. in_memory selects the returned object : 'bytes', 'bytesio', 'fits'
+        (an astropy HDUList) or 'members' (a lazy iterator of (member name, content) over the files of a tar archive,
+        filtered by member_filter).
+        """
+        if in_memory not in IN_MEMORY_TYPES:
+            raise ValueError('in_memory must be one of these values : ' + ','.join(IN_MEMORY_TYPES))
+        if in_memory == 'members':
+            return self.__iter_members(api_name, endpoint, params, member_filter)
+        try:
+            response = self.retry.call(partial(self.__send, api_name, 'GET', self.__cfg['api'][api_name] + endpoint,
+                                               params=params, headers=self.__prepare_request(True)),
+                                       api_name, endpoint, 'GET')
+            response.raise_for_status()
+            content = response.content
+        except HTTPError as err_h:
+            self.__manage_download_errors(err_h)
+            return None
+        if in_memory == 'bytes':
+            return content
+        if in_memory == 'fits':
+            from astropy.io import fits
+            return fits.open(BytesIO(content))
+        return BytesIO(content)
+
+    def __iter_members(self, api_name: str, endpoint: str, params: Optional[dict],
+                       member_filter: Optional[Union[str, Iterable[str]]]) -> Iterator[tuple[str, bytes]]:
+        """Internal stuff"""
+        try:
+            with self.get_throttle(api_name).slot(), \
+                    self.get_session(api_name).get(self.__cfg['api'][api_name] + endpoint,
+                                                   params=params,
+                                                   headers=self.__prepare_request(True),
+                                                   stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                with tarfile.open(fileobj=response.raw, mode='r|*') as archive:
+                    for member in archive:
+                        if member.isfile() and match_member(member.name, member_filter):
+                            yield member.name, archive.extractfile(member).read()
+        except HTTPError as err_h:
+            self.__manage_download_errors(err_h)
+
+    def __use_range_download(self, response: requests.Response, output_full_file_path: Path) -> bool:
+        """Internal stuff"""
+        if self.download_connections is None or self.download_connections < 1 or \
+                not RangeDownload.is_supported(response):
+            return False
+        # Large files are split, and a previously interrupted download is always resumed
+        return int(response.headers['Content-Length']) > self.download_chunk_size or \
+            Path(f'{output_full_file_path}{JOURNAL_SUFFIX}').exists()
 
     @staticmethod
-    def write_stream(output_filename: Union[Path, str], response: requests.Response) -> None:
+    def write_stream(output_filename: Union[Path, str], response: requests.Response) -> int:
         """Internal stuff"""
 
+        written = 0
         with open(output_filename, 'wb') as f:
             chunk_total_size = 0
             for chunk in response.iter_content(chunk_size=8192):
                 if chunk:  # filter out keep-alive new chunks
                     f.write(chunk)
+                    written += len(chunk)
                     chunk_total_size += 8192
                     if chunk_total_size % MB_SIZE == 0:
                         print("\r Download : " + str(chunk_total_size // MB_SIZE) + " MB", end="")
         print("\nDownload done")
+        return written
+
+    def __manage_download_errors(self, err_h) -> None:
+        """Internal stuff"""
+        if err_h.response.status_code == 404:
+            self.log.error('The file is not found on DACE')
+        else:
+            self.__manage_http_errors(err_h)
 
     def __manage_http_errors(self, err_h) -> dict:
         """Internal stuff"""
@@ -327,9 +1139,150 @@ class DaceClass:
             self.log.error('Please contact DACE support')
         return {}
 
+    def __get_throttle_option(self, api_name: str, option: str) -> Optional[float]:
+        """Internal stuff"""
+        if self.__cfg is None:
+            return None
+        for section in (f'throttle.{api_name}', 'throttle'):
+            if self.__cfg.has_option(section, option):
+                return self.__cfg.getfloat(section, option) or None
+        return None
+
+    def __send(self, api_name: str, method: str, url: str, **kwargs) -> requests.Response:
+        """Internal stuff"""
+        with self.get_throttle(api_name).slot():
+            response = self.get_session(api_name).request(method, url, **kwargs)
+            # The body is downloaded before releasing the slot
+            _ = response.content
+        return response
+
+    def __get_cache_key(self, use_cache: bool, api_name: str, endpoint: str, params: Optional[dict],
+                        **extra) -> Optional[str]:
+        """Internal stuff"""
+        if self.cache is None or not use_cache:
+            return None
+        # The user is identified by a digest of its API key, never by the key itself
+        identity = None
+        if self.__dace_rc_config is not None:
+            identity = hashlib.sha256(self.__dace_rc_config['user']['key'].encode('utf-8')).hexdigest()
+        return self.cache.make_key(api_name, endpoint, params, identity, **extra)
+
+    @contextmanager
+    def __span(self, name: str, api_name: Optional[str], endpoint: Optional[str], **attributes) -> Iterator[dict]:
+        """Internal stuff"""
+        """
+        Time the block and send its span to the observers, the block filling in the attributes of the span
+        """
+        if not self.observers:
+            yield attributes
+            return
+        start = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            span = Span(name, api_name, endpoint, time.perf_counter() - start, attributes)
+            for observer in list(self.observers):
+                try:
+                    observer.on_span(span)
+                except Exception as e:
+                    self.log.warning('The observer %s failed : %s', observer, e)
+
+    @staticmethod
+    def __get_cache_status(cache_key: Optional[str], content: Optional[bytes]) -> Optional[str]:
+        """Internal stuff"""
+        if cache_key is None:
+            return None
+        return 'miss' if content is None else 'hit'
+
+    def __decode(self, api_name: str, endpoint: str, content: bytes, media_type: str) -> dict:
+        """Internal stuff"""
+        """
+        Decode a response with the decoder registered for its media type, the json decoder otherwise
+        """
+        decode = self.decoders.get(media_type)
+        decoder_name = self.json_decoder.name if decode is None else media_type
+        with self.__span('json_decode', api_name, endpoint, bytes_in=len(content), decoder=decoder_name):
+            try:
+                return self.json_decoder.decode(content) if decode is None else decode(content)
+            except ValueError as e:
+                raise RequestException('Problem when calling {}'.format(self.__cfg['api'][api_name] + endpoint)) from e
+
+    def __get_reusable_query(self, use_cache: bool, api_name: str, endpoint: str,
+                             params: Optional[dict]) -> Optional[tuple[str, dict, dict, Optional[int]]]:
+        """Internal stuff"""
+        """
+        The key (endpoint and other parameters), filters, sort and limit of a database query whose results may be reused
+        """
+        if self.query_results is None or not use_cache or not params or 'filters' not in params or getattr(
+                self.__cache_bypass, 'enabled', False):
+            return None
+        others = {name: value for name, value in params.items()
+                  if name not in ('filters', 'sort', 'limit') and value is not None}
+        key = json.dumps([api_name, endpoint, others], sort_keys=True, default=str)
+        limit = params.get('limit')
+        return (key, json.loads(params['filters'] or '{}'), json.loads(params.get('sort') or '{}'),
+                None if limit is None else int(limit))
+
+    @staticmethod
+    def __to_parameters(data: dict[str, np.ndarray]) -> dict:
+        """Internal stuff"""
+        """
+        Columns as DACE parameters whose values are the numpy columns themselves, the errors of a column being given
+        back with it so that they are projected with it as well
+        """
+        values_keys = {'f': 'doubleValues', 'b': 'boolValues', 'i': 'intValues', 'u': 'intValues'}
+        parameters = []
+        for name, column in data.items():
+            if name.endswith('_err') and name[:-len('_err')] in data:
+                continue
+            parameter = {'variableName': name, values_keys.get(column.dtype.kind, 'stringValues'): column}
+            if name + '_err' in data:
+                parameter['minErrorValues'] = data[name + '_err']
+            parameters.append(parameter)
+        return {'parameters': parameters}
+
+    @staticmethod
+    def __pack_cached(content: bytes, media_type: str) -> bytes:
+        """Internal stuff"""
+        """
+        The cached responses not in json are prefixed by a NUL byte and their media type, json never starting with it
+        """
+        if media_type == JSON_MEDIA_TYPE:
+            return content
+        return b'\0' + media_type.encode('utf-8') + b'\n' + content
+
+    @staticmethod
+    def __unpack_cached(content: bytes) -> tuple[bytes, str]:
+        """Internal stuff"""
+        if not content.startswith(b'\0'):
+            return content, JSON_MEDIA_TYPE
+        media_type, _, content = content[1:].partition(b'\n')
+        return content, media_type.decode('utf-8')
+
+    def __read_cache(self, api_name: str, endpoint: str, cache_key: Optional[str]) -> Optional[bytes]:
+        """Internal stuff"""
+        if cache_key is None or getattr(self.__cache_bypass, 'enabled', False):
+            return None
+        try:
+            return self.cache.get(api_name, cache_key, endpoint)
+        except OSError as e:
+            self.log.warning('Unable to read the response cache : %s', e)
+            return None
+
+    def __write_cache(self, api_name: str, cache_key: Optional[str], content: bytes) -> None:
+        """Internal stuff"""
+        if cache_key is None:
+            return
+        try:
+            self.cache.put(api_name, cache_key, content)
+        except OSError as e:
+            self.log.warning('Unable to write the response cache : %s', e)
+
     def __prepare_request(self, raw_response: Optional[bool] = False) -> dict:
         """Internal stuff"""
-        headers = {'Accept': 'application/octet-stream'} if raw_response else {'Accept': 'application/json'}
+        headers = {'Accept': 'application/octet-stream' if raw_response else format_accept(self.decoders)}
+        if not raw_response:
+            headers['Accept-Encoding'] = self.accept_encoding
         if self.__dace_rc_config is not None:
             headers['Authorization'] = self.__dace_rc_config['user']['key']
         headers['User-Agent'] = '/'.join([__title__, __version__, __py_version__])
@@ -343,38 +1296,61 @@ class DaceClass:
         drs_versions = data.pop('drs_version', None)
         bib_codes = data.pop('pub_bibcode', None)
 
-        data_by_instrument = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(list))))
-        # Collect and group the data by ins_name / drs_version / ins_mode / parameter
-        for i, ins_name in enumerate(instruments_names):
-            for parameter, values in data.items():
-                bibcode = bib_codes[i] if (bib_codes is not None and i < len(bib_codes)) else None
-                drs_version = drs_versions[i] if (drs_versions is not None and i < len(drs_versions)) else None
-                drs_or_bibcode = bibcode or drs_version or 'default'
-                ins_mode = instruments_modes[i] if (
-                        instruments_modes is not None and i < len(instruments_modes)) else 'default'
-                # print('Value %s,  %s, %s' % (data[parameter][i], parameter, i))
-                data_by_instrument[ins_name][drs_or_bibcode][ins_mode][parameter].append(data[parameter][i])
-
         numpy_data_by_instrument = defaultdict(
             lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(partial(np.ndarray, 0)))))
+        if instruments_names is None or len(instruments_names) == 0:
+            return numpy_data_by_instrument
+
+        # Compute the ins_name / drs_version (or bibcode) / ins_mode key of each row once
+        rows_count = len(instruments_names)
+        bib_codes = DaceClass.__to_key_column(bib_codes, rows_count, None)
+        drs_versions = DaceClass.__to_key_column(drs_versions, rows_count, None)
+        instruments_modes = DaceClass.__to_key_column(instruments_modes, rows_count, 'default')
+        drs_or_bibcodes = np.where(bib_codes.astype(bool), bib_codes,
+                                   np.where(drs_versions.astype(bool), drs_versions, 'default'))
 
-        for ins_key, drs_list in data_by_instrument.items():
-            for drs_key, mode_list in drs_list.items():
-                for mode_key, parameter_list in mode_list.items():
-                    for parameter_key, values in parameter_list.items():
-                        numpy_data_by_instrument[ins_key][drs_key][mode_key][parameter_key] = np.array(values)
+        keys, codes = zip(*(DaceClass.__factorize(key_column) for key_column in
+                            (np.asarray(instruments_names), drs_or_bibcodes, instruments_modes)))
+        dimensions = tuple(map(len, keys))
+        groups, group_of_rows = np.unique(np.ravel_multi_index(codes, dimensions), return_inverse=True)
+
+        # Rows of each group, in their original order, and groups in order of first appearance
+        rows_by_group = np.argsort(group_of_rows, kind='stable')
+        group_starts = np.concatenate(([0], np.cumsum(np.bincount(group_of_rows))[:-1]))
+        group_rows = np.split(rows_by_group, group_starts[1:])
+
+        for group_index in np.argsort(rows_by_group[group_starts], kind='stable'):
+            ins_code, drs_code, mode_code = np.unravel_index(groups[group_index], dimensions)
+            parameters = numpy_data_by_instrument[keys[0][ins_code]][keys[1][drs_code]][keys[2][mode_code]]
+            rows = group_rows[group_index]
+            for parameter, values in data.items():
+                parameters[parameter] = np.asarray(values)[rows]
 
         return numpy_data_by_instrument
 
     @staticmethod
-    def __transform_values_with_occurrences(values: list, occurrences: dict) -> list:
+    def __factorize(key_column: np.ndarray) -> tuple[Any, np.ndarray]:
         """Internal stuff"""
-        full_vector = []
-        for i, occurrence in enumerate(occurrences):
-            for j in range(0, occurrence):
-                full_vector.append(values[i])
+        """
+        The distinct keys of a column and the code of each row. The missing keys (None) are kept as such, as np.unique
+        cannot order them with strings, so the columns holding some are grouped by a dict.
+        """
+        if key_column.dtype != object or not np.equal(key_column, None).any():
+            keys, codes = np.unique(key_column, return_inverse=True)
+            return keys, codes.reshape(-1)
+        index = {}
+        codes = np.fromiter((index.setdefault(key, len(index)) for key in key_column.tolist()), dtype=np.intp,
+                            count=len(key_column))
+        return list(index), codes
 
-        return full_vector
+    @staticmethod
+    def __to_key_column(column: Optional[np.ndarray], rows_count: int, fallback: Optional[str]) -> np.ndarray:
+        """Internal stuff"""
+        key_column = np.full(rows_count, fallback, dtype=object)
+        if column is not None:
+            column = column[:rows_count]
+            key_column[:len(column)] = column
+        return key_column
 
     @staticmethod
     def generate_short_sha1():
@@ -384,5 +1360,5 @@ class DaceClass:
         return hasher.hexdigest()[:10]
 
 
-Dace = DaceClass()
-"""Dace instance"""
+# Dace instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Dace': DaceClass})
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import importlib
+import json
+from typing import Any, Callable, Iterable, Optional, Union
+
+# The json backends, in order of preference when picked automatically
+JSON_DECODERS = ('orjson', 'msgspec', 'json')
+
+JSON_MEDIA_TYPE = 'application/json'
+
+
+class JsonDecoder:
+    """
+    The json decoder of the responses.
+    Uses a fast json library (orjson or msgspec) when one is installed, the standard json module otherwise.
+
+    The fast libraries only accept standard json : a document they reject (e.g. with NaN or Infinity literals) is
+    decoded again by the standard json module.
+
+    >>> from dace_query.decoders import JsonDecoder
+    >>> JsonDecoder().decode(b'{"parameters": []}')
+    {'parameters': []}
+    """
+
+    def __init__(self, backend: Optional[str] = 'auto'):
+        """
+        Create a json decoder using the specified backend.
+
+        :param backend: The json library : 'auto' (the fastest installed), 'orjson', 'msgspec' or 'json'
+        :type backend: Optional[str]
+        :raises ImportError: if the requested library is not installed
+        """
+        if backend not in ('auto', *JSON_DECODERS):
+            raise ValueError('backend must be one of these values : ' + ','.join(('auto', *JSON_DECODERS)))
+        candidates = JSON_DECODERS if backend == 'auto' else (backend,)
+        for candidate in candidates:
+            loads = self.__load_backend(candidate)
+            if loads is not None:
+                self.name = candidate
+                self.__loads, self.__errors = loads
+                return
+        raise ImportError(f'The {backend} library is not installed, install it with : pip install {backend}')
+
+    def decode(self, content: Union[bytes, str]) -> Any:
+        """
+        Decode a json document.
+
+        :param content: The json document
+        :type content: Union[bytes, str]
+        :return: The decoded document
+        """
+        try:
+            return self.__loads(content)
+        except self.__errors:
+            return json.loads(content)
+
+    @staticmethod
+    def __load_backend(name: str) -> Optional[tuple[Callable[[Union[bytes, str]], Any], tuple]]:
+        """Internal stuff"""
+        if name == 'json':
+            return json.loads, ()
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            return None
+        if name == 'orjson':
+            return module.loads, (module.JSONDecodeError,)
+        return module.json.Decoder().decode, (module.DecodeError,)
+
+
+def get_media_type(content_type: Optional[str]) -> str:
+    """
+    Get the media type of a Content-Type header, without its parameters (json when the header is missing).
+
+    :param content_type: The Content-Type header
+    :type content_type: Optional[str]
+    :return: The media type, in lower case
+    :rtype: str
+    """
+    if not content_type:
+        return JSON_MEDIA_TYPE
+    return content_type.split(';', 1)[0].strip().lower()
+
+
+def format_accept(media_types: Iterable[str]) -> str:
+    """
+    Build the Accept header preferring the media types in their order, json being the last resort.
+
+    :param media_types: The media types of the registered decoders, from the most to the least preferred
+    :type media_types: Iterable[str]
+    :return: The Accept header
+    :rtype: str
+    """
+    media_types = [media_type for media_type in media_types if media_type != JSON_MEDIA_TYPE]
+    qualities = [f'{media_type};q={1 - index / 10:g}' if index else media_type
+                 for index, media_type in enumerate(media_types[:9])]
+    return ', '.join(qualities + [f'{JSON_MEDIA_TYPE};q=0.1' if qualities else JSON_MEDIA_TYPE])
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import fnmatch
+import json
+import logging
+import os
+import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import requests
+
+from dace_query.throttle import Throttle
+
+DEFAULT_DOWNLOAD_CONNECTIONS = 4
+
+DEFAULT_DOWNLOAD_CHUNK_SIZE_MB = 8
+
+PART_SUFFIX = '.part'
+
+JOURNAL_SUFFIX = '.part.json'
+
+ARCHIVE_EXTENSIONS = ('.tar.gz', '.tgz', '.tar', '.zip')
+
+# The objects a file downloaded in memory can be returned as
+IN_MEMORY_TYPES = ('bytes', 'bytesio', 'fits', 'members')
+
+
+class DownloadSizeError(Exception):
+    """Raised when a downloaded file does not have the size announced by the server"""
+
+
+class RangeDownload:
+    """
+    A download split into byte ranges fetched concurrently with HTTP Range requests.
+
+    The ranges are written in place into a ``<file>.part`` file while a ``<file>.part.json`` journal records the ones
+    already completed. An interrupted download into the same path resumes from the journal, as long as the server
+    still serves the same file (same size and validator), whatever its url : the prepared downloads get a new url on
+    every run. The file gets its final name once all its ranges have been downloaded.
+    """
+
+    def __init__(self,
+                 session: requests.Session,
+                 url: str,
+                 output_full_file_path: Union[Path, str],
+                 total_size: int,
+                 params: Optional[dict] = None,
+                 headers: Optional[dict] = None,
+                 validator: Optional[str] = None,
+                 connections: Optional[int] = DEFAULT_DOWNLOAD_CONNECTIONS,
+                 chunk_size: Optional[int] = DEFAULT_DOWNLOAD_CHUNK_SIZE_MB * 1048576,
+                 throttle: Optional[Throttle] = None,
+                 log: Optional[logging.Logger] = None):
+        """
+        Prepare the download of a file into the specified path.
+
+        :param session: The HTTP session used for the range requests
+        :type session: requests.Session
+        :param url: The file url
+        :type url: str
+        :param output_full_file_path: The final file path
+        :type output_full_file_path: Union[Path, str]
+        :param total_size: The file size announced by the server
+        :type total_size: int
+        :param params: The query parameters of the url
+        :type params: Optional[dict]
+        :param headers: The HTTP headers sent with every range request
+        :type headers: Optional[dict]
+        :param validator: The ETag or Last-Modified header of the file, used to check it did not change
+        :type validator: Optional[str]
+        :param connections: The number of ranges fetched concurrently
+        :type connections: Optional[int]
+        :param chunk_size: The size of a range, in bytes
+        :type chunk_size: Optional[int]
+        :param throttle: The throttle of the API host, each range being a request
+        :type throttle: Optional[Throttle]
+        :param log: The logger reporting the progress
+        :type log: Optional[logging.Logger]
+        """
+        self.session = session
+        self.url = url
+        self.output_full_file_path = Path(output_full_file_path)
+        self.part_path = Path(f'{self.output_full_file_path}{PART_SUFFIX}')
+        self.journal_path = Path(f'{self.output_full_file_path}{JOURNAL_SUFFIX}')
+        self.total_size = total_size
+        self.params = params
+        self.headers = {} if headers is None else dict(headers)
+        self.validator = validator
+        self.connections = connections
+        self.chunk_size = chunk_size
+        self.throttle = throttle
+        self.log = logging.getLogger(__name__) if log is None else log
+        self.__journal_lock = threading.Lock()
+        self.__completed = set()
+
+    @staticmethod
+    def is_supported(response: requests.Response) -> bool:
+        """Internal stuff"""
+        return response.headers.get('Accept-Ranges', '').lower() == 'bytes' and \
+            'Content-Length' in response.headers and \
+            response.headers.get('Content-Encoding', 'identity').lower() == 'identity'
+
+    def run(self) -> Path:
+        """
+        Download the missing ranges, verify that they cover the whole file and give the file its final name.
+
+        :return: The path of the downloaded file
+        :rtype: Path
+        """
+        chunks = [(start, min(start + self.chunk_size, self.total_size) - 1)
+                  for start in range(0, self.total_size, self.chunk_size)]
+        self.__load_journal()
+        missing_chunks = [chunk for chunk in chunks if chunk[0] not in self.__completed]
+        if len(missing_chunks) < len(chunks):
+            self.log.info('Resuming download : %s/%s parts already downloaded', len(chunks) - len(missing_chunks),
+                          len(chunks))
+
+        with ThreadPoolExecutor(max_workers=self.connections) as executor:
+            # Consume the results to raise the first error, the journal keeps the completed ranges
+            for _ in executor.map(self.__download_chunk, missing_chunks):
+                pass
+
+        # The part file has its final size from the start, only the completed ranges tell what was downloaded
+        downloaded = sum(end - start + 1 for start, end in chunks if start in self.__completed)
+        if downloaded != self.total_size:
+            raise DownloadSizeError(f'Downloaded {downloaded} bytes instead of {self.total_size}')
+        os.replace(self.part_path, self.output_full_file_path)
+        self.journal_path.unlink(missing_ok=True)
+        return self.output_full_file_path
+
+    def __download_chunk(self, chunk: tuple[int, int]) -> None:
+        """Internal stuff"""
+        start, end = chunk
+        headers = {**self.headers, 'Range': f'bytes={start}-{end}'}
+        if self.validator is not None:
+            headers['If-Range'] = self.validator
+        with self.throttle.slot() if self.throttle is not None else nullcontext(), \
+                self.session.get(self.url, params=self.params, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise requests.RequestException('The server did not honor the range request')
+            written = 0
+            with open(self.part_path, 'r+b') as f:
+                f.seek(start)
+                for data in response.iter_content(chunk_size=65536):
+                    f.write(data)
+                    written += len(data)
+        if written != end - start + 1:
+            raise DownloadSizeError(f'Downloaded {written} bytes instead of {end - start + 1} for bytes {start}-{end}')
+        with self.__journal_lock:
+            self.__completed.add(start)
+            self.__write_journal()
+
+    def __load_journal(self) -> None:
+        """Internal stuff"""
+        journal = None
+        if self.journal_path.exists() and self.part_path.exists():
+            try:
+                journal = json.loads(self.journal_path.read_text())
+            except ValueError:
+                journal = None
+        if journal is not None and journal.get('state') == self.__state():
+            self.__completed = set(journal.get('completed', []))
+            return
+        # Start from scratch, the part file is allocated to its final size
+        self.__completed = set()
+        with open(self.part_path, 'wb') as f:
+            f.truncate(self.total_size)
+        self.__write_journal()
+
+    def __write_journal(self) -> None:
+        """Internal stuff"""
+        temporary_path = Path(f'{self.journal_path}.tmp')
+        temporary_path.write_text(json.dumps({'state': self.__state(), 'completed': sorted(self.__completed)}))
+        os.replace(temporary_path, self.journal_path)
+
+    def __state(self) -> dict:
+        """Internal stuff"""
+        # Not the url, which changes with the id of the prepared downloads
+        return {'path': str(self.output_full_file_path.resolve()), 'size': self.total_size,
+                'validator': self.validator, 'chunk_size': self.chunk_size}
+
+
+def split_filename(filename: str) -> tuple[str, str]:
+    """Internal stuff"""
+    for extension in ARCHIVE_EXTENSIONS:
+        if filename.endswith(extension) and len(filename) > len(extension):
+            return filename[:-len(extension)], extension
+    path = Path(filename)
+    return path.stem, path.suffix
+
+
+def match_member(name: str, member_filter: Optional[Union[str, Iterable[str]]] = None) -> bool:
+    """Internal stuff"""
+    if member_filter is None:
+        return True
+    patterns = [member_filter] if isinstance(member_filter, str) else member_filter
+    basename = name.rsplit('/', 1)[-1]
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(basename, pattern) for pattern in patterns)
+
+
+def extract_tar(archive: tarfile.TarFile,
+                output_directory: Union[Path, str],
+                member_filter: Optional[Union[str, Iterable[str]]] = None) -> list[str]:
+    """
+    Extract the regular files of a tar archive, member by member so that it also works on streamed archives.
+
+    Members whose path would escape the output directory (absolute paths, '..') and links are skipped.
+
+    :param archive: The opened tar archive
+    :type archive: tarfile.TarFile
+    :param output_directory: The directory where the files are extracted
+    :type output_directory: Union[Path, str]
+    :param member_filter: Glob pattern(s) matched against the member path or name (e.g. '*_S1D_A.fits')
+    :type member_filter: Optional[Union[str, Iterable[str]]]
+    :return: The names of the extracted members
+    :rtype: list[str]
+    """
+    output_directory = Path(output_directory).resolve()
+    extracted = []
+    for member in archive:
+        if not member.isfile() or not match_member(member.name, member_filter):
+            continue
+        destination = Path(output_directory, member.name).resolve()
+        if output_directory not in destination.parents:
+            continue
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        source = archive.extractfile(member)
+        with open(destination, 'wb') as f:
+            while True:
+                data = source.read(65536)
+                if not data:
+                    break
+                f.write(data)
+        extracted.append(member.name)
+    return extracted
@@ -1 +1,8 @@
-from dace_query.exoplanet.exoplanet import Exoplanet, ExoplanetClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['ExoplanetClass', 'Exoplanet']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'ExoplanetClass': 'dace_query.exoplanet.exoplanet',
+    'Exoplanet': 'dace_query.exoplanet.exoplanet',
+})
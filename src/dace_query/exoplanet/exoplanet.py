@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Union, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from astropy.table import Table
+    from pandas import DataFrame
 
 EXOPLANET_DEFAULT_LIMIT = 10000
 
@@ -40,7 +44,7 @@ class ExoplanetClass:
         self.__EXOPLANET_API = 'exo-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -60,7 +64,8 @@ class ExoplanetClass:
                        limit: Optional[int] = EXOPLANET_DEFAULT_LIMIT,
                        filters: Optional[dict] = None,
                        sort: Optional[dict] = None,
-                       output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+                       output_format: Optional[str] = None,
+                       columns: Optional[list[str]] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
         """
         Query the exoplanet database to retrieve data in the chosen format.
 
@@ -76,6 +81,8 @@ class ExoplanetClass:
         :type sort: Optional[dict]
         :param output_format: Type of data returns
         :type output_format: Optional[str]
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: The desired data in the chosen output format
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -94,11 +101,10 @@ class ExoplanetClass:
                 endpoint='exoplanetDatabase',
                 params={'limit': str(limit),
                         'filters': json.dumps(filters),
-                        'sort': json.dumps(sort)}
-            ), output_format=output_format)
+                        'sort': json.dumps(sort),
+                        'col': columns}
+            ), output_format=output_format, columns=columns)
 
 
-Exoplanet: ExoplanetClass = ExoplanetClass()
-"""
-Exoplanet instance
-"""
+# Exoplanet instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Exoplanet': ExoplanetClass})
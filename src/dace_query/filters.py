@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import numpy as np
+
+# The operations of the DACE filters (see the query options in the documentation)
+FILTER_OPERATIONS = ('contains', 'notContains', 'equal', 'notEqual', 'empty', 'min', 'max', 'is')
+
+# The operations matching the rows not matched by another one, the rows whose value is missing included
+NEGATED_OPERATIONS = {'notContains': 'contains', 'notEqual': 'equal'}
+
+DEFAULT_QUERY_RESULTS_MAX_ENTRIES = 16
+
+DEFAULT_QUERY_RESULTS_TTL = 300
+
+
+def evaluate_filters(data: Any, filters: Optional[dict]) -> np.ndarray:
+    """
+    Evaluate DACE filters on query results, as DACE does on the server (see :doc:`query_options`) : the filters of
+    the different columns and the operations of a column are combined with a logical and, the values of 'contains'
+    and 'equal' with a logical or. The rows whose value is missing (None, NaN or an empty string) only match the
+    'empty' operation and the negated ones, 'notEqual' and 'notContains' matching all the rows not matched by
+    'equal' and 'contains'.
+
+    >>> from dace_query.filters import evaluate_filters
+    >>> mask = evaluate_filters(values, {'obj_id_catname': {'contains': ['HD']}, 'rv': {'min': 0}})
+
+    :param data: The columns of the results, as a dict of numpy arrays, a pandas DataFrame or an astropy Table
+    :type data: Any
+    :param filters: The DACE filters
+    :type filters: Optional[dict]
+    :return: The boolean mask of the matching rows
+    :rtype: np.ndarray
+    :raises ValueError: if a filter operation is unknown
+    :raises KeyError: if a filtered column is missing
+    """
+    mask = np.ones(count_rows(data), dtype=bool)
+    for column_name, operations in (filters or {}).items():
+        column = np.asarray(data[column_name])
+        for operation, value in operations.items():
+            mask &= evaluate_operation(column, operation, value)
+    return mask
+
+
+def evaluate_operation(column: np.ndarray, operation: str, value: Any) -> np.ndarray:
+    """Internal stuff"""
+    if operation in NEGATED_OPERATIONS:
+        return ~evaluate_operation(column, NEGATED_OPERATIONS[operation], value)
+    values = list(value) if isinstance(value, (list, tuple)) else [value]
+    if operation == 'contains':
+        null = is_null(column)
+        strings = column if column.dtype.kind == 'U' else np.where(null, '', column).astype(str)
+        found = np.zeros(len(column), dtype=bool)
+        for substring in values:
+            found |= np.char.find(strings, str(substring)) >= 0
+        return found & ~null
+    if operation == 'equal':
+        # The missing values are left out, None not being comparable with the other values
+        valid = ~is_null(column)
+        found = np.zeros(len(column), dtype=bool)
+        found[valid] = np.isin(column[valid], values)
+        return found
+    if operation == 'empty':
+        null = is_null(column)
+        return null if value else ~null
+    if operation in ('min', 'max'):
+        numbers = column.astype(np.float64) if column.dtype.kind == 'O' else column
+        with np.errstate(invalid='ignore'):
+            return numbers >= value if operation == 'min' else numbers <= value
+    if operation == 'is':
+        return column == bool(value)
+    raise ValueError(f'Unknown filter operation {operation}, must be one of : ' + ','.join(FILTER_OPERATIONS))
+
+
+def is_null(column: np.ndarray) -> np.ndarray:
+    """Internal stuff"""
+    if column.dtype.kind == 'f':
+        return np.isnan(column)
+    if column.dtype.kind in 'US':
+        return column == column.dtype.type()
+    if column.dtype.kind == 'O':
+        return np.fromiter((item is None or item == '' or (isinstance(item, float) and item != item)
+                            for item in column), dtype=bool, count=len(column))
+    return np.zeros(len(column), dtype=bool)
+
+
+def sort_indices(data: Any, sort: Optional[dict], rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Get the indices ordering the rows as a DACE sort (see :doc:`query_options`), the first column being the primary
+    sort key. The sort is stable, the rows sharing the same keys keeping their order, and the missing values (None, NaN)
+    come last, the empty strings being sorted as strings.
+
+    :param data: The columns of the results
+    :type data: Any
+    :param sort: The DACE sort, 'asc' or 'desc' by column
+    :type sort: Optional[dict]
+    :param rows: The indices of the rows to sort (default: all the rows)
+    :type rows: Optional[np.ndarray]
+    :return: The indices of the sorted rows
+    :rtype: np.ndarray
+    """
+    indices = np.arange(count_rows(data)) if rows is None else np.asarray(rows)
+    # From the least to the most significant key, each stable sort keeping the order of the previous ones
+    for column_name, order in reversed(list((sort or {}).items())):
+        column = np.asarray(data[column_name])[indices]
+        # The missing values come last in both orders, and are left out of the ranking, None not being comparable
+        # with the other values
+        missing = is_null(column) if column.dtype.kind in 'fO' else np.zeros(len(column), dtype=bool)
+        if column.dtype.kind == 'O':
+            missing &= np.fromiter((not isinstance(item, str) for item in column), dtype=bool, count=len(column))
+        ranks = np.full(len(column), len(column), dtype=np.intp)
+        _, present_ranks = np.unique(column[~missing], return_inverse=True)
+        present_ranks = present_ranks.reshape(-1)
+        ranks[~missing] = -present_ranks if str(order).lower() == 'desc' else present_ranks
+        indices = indices[np.argsort(ranks, kind='stable')]
+    return indices
+
+
+def apply_query(data: Any, filters: Optional[dict] = None, sort: Optional[dict] = None,
+                limit: Optional[int] = None) -> Any:
+    """
+    Run a query on results already retrieved : keep the rows matching the filters, sort them and keep the first
+    ``limit`` ones.
+
+    >>> from dace_query.exoplanet import Exoplanet
+    >>> from dace_query.filters import apply_query
+    >>> values = Exoplanet.query_database(limit=100000, output_format='pandas')
+    >>> hot_jupiters = apply_query(values, filters={'obj_orb_period_day': {'max': 10}},
+    ...                            sort={'obj_phys_mass_mjup': 'desc'})
+
+    :param data: The columns of the results, as a dict of numpy arrays, a pandas DataFrame or an astropy Table
+    :type data: Any
+    :param filters: The DACE filters
+    :type filters: Optional[dict]
+    :param sort: The DACE sort
+    :type sort: Optional[dict]
+    :param limit: Maximum number of rows to return
+    :type limit: Optional[int]
+    :return: The selected rows, in the type of the results
+    """
+    indices = sort_indices(data, sort, np.flatnonzero(evaluate_filters(data, filters)))[:limit]
+    if isinstance(data, dict):
+        return type(data)({column_name: np.asarray(column)[indices] for column_name, column in data.items()})
+    if hasattr(data, 'iloc'):
+        return data.iloc[indices]
+    return data[indices]
+
+
+def count_rows(data: Any) -> int:
+    """Internal stuff"""
+    if isinstance(data, dict):
+        return len(next(iter(data.values()), ()))
+    return len(data)
+
+
+def get_row_identity(data: Any, row: int) -> tuple:
+    """Internal stuff"""
+    # The representations compare the ragged columns and the missing values as well
+    return tuple(repr(np.asarray(data[name])[row]) for name in sorted(data))
+
+
+def subsumes(broad: Optional[dict], narrow: Optional[dict]) -> bool:
+    """
+    Check that the rows matching the narrow filters all match the broad ones, so that the results of the broad
+    filters can answer the narrow ones. The check is conservative : it may miss some subsumptions (e.g. between
+    filters on different columns), never report a wrong one.
+
+    >>> from dace_query.filters import subsumes
+    >>> subsumes({'obj_orb_period_day': {'max': 10}}, {'obj_orb_period_day': {'min': 2, 'max': 5}})
+    True
+
+    :param broad: The broad filters
+    :type broad: Optional[dict]
+    :param narrow: The narrow filters
+    :type narrow: Optional[dict]
+    :return: Whether the broad filters subsume the narrow ones
+    :rtype: bool
+    """
+    narrow = narrow or {}
+    return all(implies(narrow.get(column_name, {}), operation, value)
+               for column_name, operations in (broad or {}).items()
+               for operation, value in operations.items())
+
+
+def implies(operations: dict, operation: str, value: Any) -> bool:
+    """Internal stuff"""
+    """
+    Whether the operations on a column imply the operation of the broad filters on the same column
+    """
+    values = list(value) if isinstance(value, (list, tuple)) else [value]
+    equal = operations.get('equal')
+    if operation == 'min':
+        return (operations.get('min') is not None and operations['min'] >= value) or (
+            equal is not None and all(isinstance(item, (int, float)) and item >= value for item in equal))
+    if operation == 'max':
+        return (operations.get('max') is not None and operations['max'] <= value) or (
+            equal is not None and all(isinstance(item, (int, float)) and item <= value for item in equal))
+    if operation == 'equal':
+        return equal is not None and set(equal) <= set(values)
+    if operation == 'notEqual':
+        return set(values) <= set(operations.get('notEqual', ())) or (
+            equal is not None and not set(equal) & set(values))
+    if operation == 'contains':
+        # A value containing a narrow substring contains any broad substring found in it
+        contains = operations.get('contains')
+        return (contains is not None and all(any(str(item) in str(substring) for item in values)
+                                             for substring in contains)) or (
+            equal is not None and all(any(str(item) in str(equal_value) for item in values) for equal_value in equal))
+    if operation == 'notContains':
+        not_contains = operations.get('notContains', ())
+        return all(any(str(substring) in str(item) for substring in not_contains) for item in values) or (
+            equal is not None and not any(str(item) in str(equal_value) for item in values for equal_value in equal))
+    if operation in ('is', 'empty'):
+        return operation in operations and bool(operations[operation]) == bool(value)
+    return False
+
+
+class QueryResults:
+    """
+    The results of the last queries, reused to answer the narrower queries without calling DACE (see
+    :meth:`DaceClass.enable_query_reuse`).
+
+    A query is answered from the complete results (fewer rows than their limit) of a previous query on the same
+    endpoint, with the same other parameters, whose filters subsume its filters. The rows are selected, sorted and
+    limited on the client. A query limited to fewer rows than it matches is only answered when its rows are well
+    defined : when it is sorted, or sorted like the previous query. The results expire once older than the TTL, the
+    data of DACE changing over time.
+    """
+
+    def __init__(self, max_entries: Optional[int] = DEFAULT_QUERY_RESULTS_MAX_ENTRIES,
+                 ttl: Optional[float] = DEFAULT_QUERY_RESULTS_TTL):
+        """
+        Create an empty store of query results.
+
+        :param max_entries: The maximum number of results kept, the least recently used ones being dropped
+        :type max_entries: Optional[int]
+        :param ttl: The time to live of the results, in seconds (None to keep them until dropped)
+        :type ttl: Optional[float]
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def put(self, key: Hashable, filters: Optional[dict], sort: Optional[dict], limit: Optional[int],
+            data: dict[str, np.ndarray]) -> None:
+        """
+        Keep the results of a query, if complete.
+
+        :param key: The endpoint and the other parameters of the query
+        :type key: Hashable
+        :param filters: The filters of the query
+        :type filters: Optional[dict]
+        :param sort: The sort of the query
+        :type sort: Optional[dict]
+        :param limit: The limit of the query
+        :type limit: Optional[int]
+        :param data: The results, by column
+        :type data: dict[str, np.ndarray]
+        """
+        if limit is not None and count_rows(data) >= limit:
+            return
+        with self.__lock:
+            entries = self.__entries.setdefault(key, [])
+            entries.append((time.monotonic(), filters or {}, sort or {}, data))
+            self.__entries.move_to_end(key)
+            while sum(len(entries) for entries in self.__entries.values()) > self.max_entries:
+                oldest_key, oldest_entries = next(iter(self.__entries.items()))
+                oldest_entries.pop(0)
+                if not oldest_entries:
+                    del self.__entries[oldest_key]
+
+    def find(self, key: Hashable, filters: Optional[dict], sort: Optional[dict],
+             limit: Optional[int]) -> Optional[dict[str, np.ndarray]]:
+        """
+        Answer a query from the kept results.
+
+        :param key: The endpoint and the other parameters of the query
+        :type key: Hashable
+        :param filters: The filters of the query
+        :type filters: Optional[dict]
+        :param sort: The sort of the query
+        :type sort: Optional[dict]
+        :param limit: The limit of the query
+        :type limit: Optional[int]
+        :return: The results of the query, None if no kept results can answer it
+        :rtype: Optional[dict[str, np.ndarray]]
+        """
+        with self.__lock:
+            entries = self.__entries.get(key, [])
+            if self.ttl is not None:
+                # The expired results, the oldest ones, are dropped
+                entries[:] = [entry for entry in entries if time.monotonic() - entry[0] <= self.ttl]
+            entries = list(entries)
+        for _, broad_filters, broad_sort, data in reversed(entries):
+            # The results of a projection may lack the columns filtered or sorted by the query
+            if not subsumes(broad_filters, filters) or not {*(filters or {}), *(sort or {})} <= set(data):
+                continue
+            rows = np.flatnonzero(evaluate_filters(data, filters))
+            if limit is not None and len(rows) > limit and not sort and broad_sort:
+                continue
+            indices = sort_indices(data, sort, rows)[:limit]
+            return {column_name: column[indices] for column_name, column in data.items()}
+        return None
+
+    def clear(self) -> None:
+        """
+        Forget the kept results.
+        """
+        with self.__lock:
+            self.__entries.clear()
@@ -1 +1,8 @@
-from dace_query.imaging.imaging import Imaging, ImagingClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['ImagingClass', 'Imaging']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'ImagingClass': 'dace_query.imaging.imaging',
+    'Imaging': 'dace_query.imaging.imaging',
+})
@@ -2,19 +2,26 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Union, Optional
+from io import BytesIO
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.coordinates import SkyCoord, Angle
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+from dace_query.mixins import PagesMixin, RegionsMixin
+
+if TYPE_CHECKING:
+    from astropy.coordinates import SkyCoord, Angle
+    from astropy.io import fits
+    from astropy.table import Table
+    from pandas import DataFrame
 
 IMAGING_DEFAULT_LIMIT = 100000
 
 
-class ImagingClass:
+class ImagingClass(PagesMixin, RegionsMixin):
     """
     The imaging class.
     Use to retrieve data from the imaging module.
@@ -24,6 +31,7 @@ class ImagingClass:
     >>> from dace_query.imaging import Imaging
 
     """
+    DEFAULT_LIMIT = IMAGING_DEFAULT_LIMIT
 
     __ACCEPTED_FILE_TYPES = ['ns', 'snr', 'dl', 'hc', 'pa', 'master', 'all']
     __IMAGING_FILENAMES = {'NS': 'ns.fits',
@@ -46,7 +54,7 @@ class ImagingClass:
         self.__OBS_API = 'obs-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -66,7 +74,8 @@ class ImagingClass:
                        limit: Optional[int] = IMAGING_DEFAULT_LIMIT,
                        filters: Optional[dict] = None,
                        sort: Optional[dict] = None,
-                       output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+                       output_format: Optional[str] = None,
+                       columns: Optional[list[str]] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
         """
         Query the imaging database to retrieve data in the chosen format.
 
@@ -78,6 +87,8 @@ class ImagingClass:
         :type sort: Optional[dict]
         :param output_format: Type of data returns
         :type output_format: Optional[str]
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: The desired data in the chosen output format
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -98,8 +109,9 @@ class ImagingClass:
                 params={
                     'limit': str(limit),
                     'filters': json.dumps(filters),
-                    'sort': json.dumps(sort)}
-            ), output_format=output_format)
+                    'sort': json.dumps(sort),
+                    'col': columns}
+            ), output_format=output_format, columns=columns)
 
     def query_region(self,
                      sky_coord: SkyCoord,
@@ -143,7 +155,9 @@ class ImagingClass:
                  file_type: str,
                  filters: Optional[dict] = None,
                  output_directory: Optional[str] = None,
-                 output_filename: Optional[str] = None) -> None:
+                 output_filename: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 merge: Optional[bool] = False) -> Optional[dict]:
         """
         Download specified file type from the imaging module.
 
@@ -168,11 +182,18 @@ class ImagingClass:
         :type output_directory: Optional[str]
         :param output_filename: The filename for the download
         :type output_filename: Optional[str]
-        :return: None
+        :param batch_size: Split the download into archives of at most this number of files, prepared and downloaded
+            concurrently
+        :type batch_size: Optional[int]
+        :param merge: Extract the archives of the batches into the output directory
+        :type merge: Optional[bool]
+        :return: The manifest of the batches when downloading by batches, None otherwise
+        :rtype: Optional[dict]
 
         >>> from dace_query.imaging import Imaging
         >>> filters_to_use = {'file_rootpath':{'contains':'sphere/SPHERE-DRS/DRS-1.0/reduced/2018-08-19/SPHERE_IRDIS.2018-08-19T07:03:54.679_H2.fits' }}
         >>> # Imaging.download(file_type='ns', filters=filters_to_use, output_directory='/tmp', output_filename='files.tar.gz')
+        >>> # Imaging.download(file_type='ns', output_directory='/tmp', batch_size=200)
 
         """
 
@@ -183,6 +204,30 @@ class ImagingClass:
 
         imaging_data = self.query_database(filters=filters, output_format='dict')
         files = imaging_data.get('file_rootpath', [])
+        if batch_size is not None:
+            return self.dace.download_batches(
+                api_name=self.__OBS_API,
+                obs_type='imaging',
+                files=files,
+                prepare=lambda batch_files: self.__prepare_download(file_type, batch_files),
+                batch_size=batch_size,
+                output_directory=output_directory,
+                output_filename=output_filename,
+                merge=merge
+            )
+        download_id = self.__prepare_download(file_type, files)
+        if not download_id:
+            return None
+        self.dace.persist_file_on_disk(
+            api_name=self.__OBS_API,
+            obs_type='imaging',
+            download_id=download_id,
+            output_directory=output_directory,
+            output_filename=output_filename
+        )
+
+    def __prepare_download(self, file_type: str, files: list[str]) -> Optional[str]:
+        """Internal stuff"""
         download_response = self.dace.request_post(
             api_name=self.__OBS_API,
             endpoint='download/prepare/imaging',
@@ -193,23 +238,20 @@ class ImagingClass:
         )
         if not download_response:
             return None
-        download_id = download_response['values'][0]
-        self.dace.persist_file_on_disk(
-            api_name=self.__OBS_API,
-            obs_type='imaging',
-            download_id=download_id,
-            output_directory=output_directory,
-            output_filename=output_filename
-        )
+        return download_response['values'][0]
 
     def get_image(self,
                   fits_file: str,
                   file_type: str,
                   output_directory: Optional[str] = None,
-                  output_filename: Optional[str] = None) -> None:
+                  output_filename: Optional[str] = None,
+                  in_memory: Optional[str] = None) -> Optional[Union[bytes, BytesIO, fits.HDUList]]:
         """
         Download a certain fits imaging files specified by named arguments.
 
+        The file can also be returned in memory, without touching the disk, as raw bytes (``in_memory='bytes'``), a
+        file-like object (``in_memory='bytesio'``) or an astropy HDU list (``in_memory='fits'``).
+
         Available file types are [ 'ns', 'snr', 'dl', 'hc', 'pa', 'master', 'all' ].
 
         * **ns :** non saturated
@@ -228,15 +270,29 @@ class ImagingClass:
         :type output_directory: Optional[str]
         :param output_filename: The filename for the download
         :type output_filename: Optional[str]
-        :return: None
+        :param in_memory: Return the file instead of saving it, as 'bytes', 'bytesio' or 'fits'
+        :type in_memory: Optional[str]
+        :return: The file content when returned in memory, None otherwise
+        :rtype: Optional[Union[bytes, BytesIO, fits.HDUList]]
 
         >>> from dace_query.imaging import Imaging
         >>> fits_file_to_download, file_type = 'sphere/SPHERE-DRS/DRS-1.0/reduced/2018-08-19/SPHERE_IRDIS.2018-08-19T07:03:54.679_H2.fits', 'hc'
         >>> # Imaging.get_image(fits_file=fits_file_to_download, file_type=file_type, output_directory='/tmp', output_filename='imaging.fits')
+        >>> # hdu_list = Imaging.get_image(fits_file=fits_file_to_download, file_type=file_type, in_memory='fits')
         """
 
         file_type = str(file_type).upper()
         # url = '/imaging/file?filepath=' + fits_file + '&filterType=' + file_type
+        if in_memory is not None:
+            return self.dace.download_to_memory(
+                api_name=self.__OBS_API,
+                endpoint='observation/imaging/file',
+                params={
+                    'filepath': fits_file,
+                    'filterType': file_type
+                },
+                in_memory=in_memory
+            )
         self.dace.download_file(
             api_name=self.__OBS_API,
             endpoint='observation/imaging/file',
@@ -249,5 +305,5 @@ class ImagingClass:
         )
 
 
-Imaging: ImagingClass = ImagingClass()
-"""Imaging instance"""
+# Imaging instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Imaging': ImagingClass})
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+
+# The steps of a call reported as spans
+SPAN_NAMES = ('request', 'json_decode', 'parse_parameters', 'convert_to_format')
+
+
+class Span(NamedTuple):
+    """
+    The timing of one step of a call to DACE.
+
+    The attributes depend on the step :
+
+    * **request :** method, status_code, bytes_in (decompressed), bytes_wire (received, before decompression),
+      content_encoding, time_to_headers (connection and server time, in seconds) and cache ('hit', 'miss' or None when
+      the cache is disabled)
+    * **json_decode :** bytes_in, decoder (the json library, or the media type of a registered decoder)
+    * **parse_parameters :** rows, columns
+    * **convert_to_format :** output_format, rows, columns
+    """
+    name: str
+    api_name: Optional[str]
+    endpoint: Optional[str]
+    duration: float
+    attributes: dict
+
+
+class Observer(ABC):
+    """
+    The interface of the observers receiving the spans of a dace instance (see :meth:`DaceClass.add_observer`),
+    implementing ``on_span``.
+
+    The spans are emitted by the thread running the call, an observer shared by several threads must be thread-safe.
+    """
+
+    @abstractmethod
+    def on_span(self, span: Span) -> None:
+        """
+        Receive a span once its step is over.
+
+        :param span: The span
+        :type span: Span
+        """
+
+
+class TimingAggregator(Observer):
+    """
+    An observer aggregating the durations and sizes of the spans by step and endpoint, to find the slow calls.
+
+    >>> from dace_query import Dace
+    >>> from dace_query.instrumentation import TimingAggregator
+    >>> aggregator = TimingAggregator()
+    >>> Dace.add_observer(aggregator)
+    >>> # ... queries ...
+    >>> # print(aggregator.report())
+    """
+
+    def __init__(self, group_by: Optional[Callable[[Span], str]] = None,
+                 percentiles: Optional[tuple[float, ...]] = (50, 90, 99)):
+        """
+        Create an empty aggregator.
+
+        :param group_by: The function giving the group of a span (default: its api name and endpoint)
+        :type group_by: Optional[Callable[[Span], str]]
+        :param percentiles: The percentiles of the durations to report
+        :type percentiles: Optional[tuple[float, ...]]
+        """
+        self.group_by = self.get_endpoint if group_by is None else group_by
+        self.percentiles = percentiles
+        self.__lock = threading.Lock()
+        self.__durations = defaultdict(list)
+        self.__totals = defaultdict(lambda: defaultdict(int))
+
+    @staticmethod
+    def get_endpoint(span: Span) -> str:
+        """Internal stuff"""
+        return f'{span.api_name}/{span.endpoint}'
+
+    def on_span(self, span: Span) -> None:
+        key = (self.group_by(span), span.name)
+        with self.__lock:
+            self.__durations[key].append(span.duration)
+            totals = self.__totals[key]
+            for attribute in ('bytes_in', 'bytes_wire', 'rows'):
+                totals[attribute] += span.attributes.get(attribute) or 0
+            cache = span.attributes.get('cache')
+            if cache is not None:
+                totals[f'cache_{cache}'] += 1
+
+    def get_summary(self) -> dict[str, dict[str, dict[str, float]]]:
+        """
+        Get, by endpoint and step, the number of spans, their mean and percentile durations (in seconds), the bytes
+        received (decompressed and on the wire), the rows decoded and the cache hits and misses.
+
+        :return: The statistics by endpoint and step
+        :rtype: dict[str, dict[str, dict[str, float]]]
+        """
+        with self.__lock:
+            items = [(key, np.asarray(durations), dict(self.__totals[key]))
+                     for key, durations in self.__durations.items()]
+        summary = defaultdict(dict)
+        for (group, name), durations, totals in sorted(items, key=lambda item: item[0]):
+            statistics = {'count': len(durations), 'mean': float(durations.mean())}
+            statistics.update({f'p{percentile:g}': float(value) for percentile, value in
+                               zip(self.percentiles, np.percentile(durations, self.percentiles))})
+            statistics.update(totals)
+            summary[group][name] = statistics
+        return dict(summary)
+
+    def report(self) -> str:
+        """
+        Format the summary as a table, one line by endpoint and step, the durations being in milliseconds.
+
+        :return: The report
+        :rtype: str
+        """
+        columns = ['count', 'mean'] + [f'p{percentile:g}' for percentile in self.percentiles]
+        lines = [f"{'endpoint':<60} {'step':<18}" + ''.join(f'{column:>10}' for column in columns) +
+                 f"{'bytes_in':>14}{'bytes_wire':>14}{'rows':>12}"]
+        for group, steps in self.get_summary().items():
+            for name, statistics in steps.items():
+                lines.append(f'{group:<60} {name:<18}{statistics["count"]:>10}' +
+                             ''.join(f'{statistics[column] * 1000:>10.2f}' for column in columns[1:]) +
+                             f'{statistics.get("bytes_in", 0):>14}{statistics.get("bytes_wire", 0):>14}'
+                             f'{statistics.get("rows", 0):>12}')
+        return '\n'.join(lines)
+
+    def reset(self) -> None:
+        """
+        Forget the aggregated spans.
+        """
+        with self.__lock:
+            self.__durations.clear()
+            self.__totals.clear()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import importlib
+import sys
+import threading
+from typing import Any, Callable, Optional
+
+
+def lazy_attributes(module_name: str, imports: Optional[dict[str, str]] = None,
+                    singletons: Optional[dict[str, Callable[[], Any]]] = None) -> Callable[[str], Any]:
+    """
+    Build the ``__getattr__`` function of a module (PEP 562) resolving some of its attributes on first access only :
+    the attributes imported from other modules and the instances created by a factory. Once resolved, an attribute is
+    stored in the module and found there by the following accesses.
+
+    It keeps ``import dace_query`` from importing the modules of DACE (and their dependencies) and from creating their
+    instances until they are used.
+
+    >>> __getattr__ = lazy_attributes(__name__, imports={'SpectroscopyClass': 'dace_query.spectroscopy.spectroscopy'},
+    ...                               singletons={'Spectroscopy': lambda: SpectroscopyClass()})
+
+    :param module_name: The name of the module
+    :type module_name: str
+    :param imports: The module path of each attribute imported from another module
+    :type imports: Optional[dict[str, str]]
+    :param singletons: The factory of each instance
+    :type singletons: Optional[dict[str, Callable[[], Any]]]
+    :return: The ``__getattr__`` function of the module
+    :rtype: Callable[[str], Any]
+    """
+    imports = {} if imports is None else imports
+    singletons = {} if singletons is None else singletons
+    lock = threading.RLock()
+
+    def __getattr__(name: str) -> Any:
+        if name not in imports and name not in singletons:
+            raise AttributeError(f"module '{module_name}' has no attribute '{name}'")
+        module = sys.modules[module_name]
+        # The instances must be created once, even when first used by several threads
+        with lock:
+            if name not in module.__dict__:
+                if name in imports:
+                    value = getattr(importlib.import_module(imports[name]), name)
+                else:
+                    value = singletons[name]()
+                setattr(module, name, value)
+            return module.__dict__[name]
+
+    return __getattr__
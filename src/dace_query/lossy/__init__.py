@@ -1 +1,8 @@
-from dace_query.lossy.lossy import Lossy, LossyClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['LossyClass', 'Lossy']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'LossyClass': 'dace_query.lossy.lossy',
+    'Lossy': 'dace_query.lossy.lossy',
+})
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Union, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from astropy.table import Table
+    from pandas import DataFrame
 
 LOSSY_DEFAULT_LIMIT = 10000
 
@@ -37,7 +41,7 @@ class LossyClass:
         self.__LOSSY_API = 'lossy-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -119,5 +123,5 @@ class LossyClass:
             output_format=output_format)
 
 
-Lossy: LossyClass = LossyClass()
-"""Lossy instance"""
+# Lossy instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Lossy': LossyClass})
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+from numpy import ndarray
+
+from dace_query.dace import DEFAULT_PAGE_SIZE
+
+if TYPE_CHECKING:
+    from astropy.coordinates import Angle, SkyCoord
+    from astropy.table import Table
+    from pandas import DataFrame
+
+
+class PagesMixin:
+    """
+    The paging of a database.
+    Adds ``iter_query`` to a module class having a ``query_database`` method and a ``dace`` instance, the pages
+    following the ``PAGE_KEY`` column by default.
+    """
+    PAGE_KEY = 'obj_date_bjd'
+
+    def iter_query(self,
+                   filters: Optional[dict] = None,
+                   sort: Optional[dict] = None,
+                   page_size: Optional[int] = DEFAULT_PAGE_SIZE,
+                   output_format: Optional[str] = None) \
+            -> Iterator[Union[dict[str, ndarray], DataFrame, Table, dict]]:
+        """
+        Iterate, page by page, over all the rows of the database matching the filters.
+        Only one page is held in memory at a time, whatever the number of rows matching.
+
+        The pages follow the first sort column (by default ``obj_date_bjd``, or ``date_mjd_start`` for cheops,
+        ascending), which should be a numeric column shared by fewer than ``page_size`` rows per value. The rows
+        missing a value of this column come last.
+
+        Filters and sorting order can be applied to the query via named arguments (see :doc:`query_options`).
+
+        All available formats are defined in this section (see :doc:`output_format`).
+
+        :param filters: Filters to apply to the query
+        :type filters: Optional[dict]
+        :param sort: Sort order to apply to the query
+        :type sort: Optional[dict]
+        :param page_size: Number of rows per page
+        :type page_size: Optional[int]
+        :param output_format: Type of data returns
+        :type output_format: Optional[str]
+        :return: The pages of data in the chosen output format
+        :rtype: Iterator[dict[str, ndarray] or DataFrame or Table or dict]
+
+        >>> from dace_query.spectroscopy import Spectroscopy
+        >>> for page in Spectroscopy.iter_query(filters={'ins_name': {'equal': ['HARPS']}}, page_size=1000):
+        ...     pass
+        """
+        return self.dace.iter_pages(self.query_database, self.PAGE_KEY, filters=filters, sort=sort,
+                                    page_size=page_size, output_format=output_format)
+
+
+class RegionsMixin:
+    """
+    The cone searches of many positions in a database.
+    Adds ``query_regions`` to a module class having a ``query_database`` method and a ``dace`` instance, each cone
+    returning at most ``DEFAULT_LIMIT`` rows by default.
+    """
+    DEFAULT_LIMIT = 10000
+
+    def query_regions(self,
+                      sky_coords: SkyCoord,
+                      radius: Angle,
+                      limit: Optional[int] = None,
+                      filters: Optional[dict] = None,
+                      merge_radius: Optional[Angle] = None,
+                      max_workers: Optional[int] = None,
+                      output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+        """
+        Query the regions around many positions in the database and retrieve the matches in the chosen format.
+
+        The nearby positions are grouped into cones (see :func:`dace_query.regions.group_regions`), queried
+        concurrently, and the rows found are matched with the positions closer than ``radius``. Each match is a row of
+        the results, whose ``source_index`` column is the index of its position in ``sky_coords``.
+
+        Filters can be applied to the query via named arguments (see :doc:`query_options`).
+
+        All available formats are defined in this section (see :doc:`output_format`).
+
+        Requires scipy (``pip install dace-query[regions]``).
+
+        :param sky_coords: Sky coordinates of the positions, from the astropy module
+        :type sky_coords: SkyCoord
+        :param radius: Search radius around each position
+        :type radius: Angle
+        :param limit: Maximum number of rows to return by cone (default: the default limit of ``query_database``)
+        :type limit: Optional[int]
+        :param filters: Filters to apply to the query
+        :type filters: Optional[dict]
+        :param merge_radius: Separation under which positions are searched by the same cone (default: 10 times radius)
+        :type merge_radius: Optional[Angle]
+        :param max_workers: Maximum number of cones queried concurrently (default: the connection pool size)
+        :type max_workers: Optional[int]
+        :param output_format: Type of data returns
+        :type output_format: Optional[str]
+        :return: The matches in the chosen output format
+        :rtype: dict[str, ndarray] or DataFrame or Table or dict
+
+        >>> from dace_query.spectroscopy import Spectroscopy
+        >>> from astropy.coordinates import SkyCoord, Angle
+        >>> sky_coords = SkyCoord(["23h13m16s", "22h23m29s"], ["+57d10m06s", "+32d27m34s"], frame='icrs')
+        >>> values = Spectroscopy.query_regions(sky_coords=sky_coords, radius=Angle('0.045d'))
+        """
+        return self.dace.query_regions(self.query_database, sky_coords, radius,
+                                       limit=self.DEFAULT_LIMIT if limit is None else limit, filters=filters,
+                                       merge_radius=merge_radius, max_workers=max_workers,
+                                       output_format=output_format)
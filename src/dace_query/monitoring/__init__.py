@@ -1 +1,8 @@
-from dace_query.monitoring.monitoring import Monitoring, MonitoringClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['MonitoringClass', 'Monitoring']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'MonitoringClass': 'dace_query.monitoring.monitoring',
+    'Monitoring': 'dace_query.monitoring.monitoring',
+})
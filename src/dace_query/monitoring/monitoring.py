@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from astropy.table import Table
+    from pandas import DataFrame
 
 MONITORING_DEFAULT_LIMIT = 10000
 
@@ -36,7 +40,7 @@ class MonitoringClass:
         self.__MONITORING_API = 'monitoring-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -237,7 +241,5 @@ class MonitoringClass:
         )
 
 
-Monitoring: MonitoringClass = MonitoringClass()
-"""
-Monitoring instance
-"""
+# Monitoring instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Monitoring': MonitoringClass})
@@ -1,2 +1,10 @@
-from dace_query.opacity.atom import Atom, AtomClass
-from dace_query.opacity.molecule import Molecule, MoleculeClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['AtomClass', 'Atom', 'MoleculeClass', 'Molecule']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'AtomClass': 'dace_query.opacity.atom',
+    'Atom': 'dace_query.opacity.atom',
+    'MoleculeClass': 'dace_query.opacity.molecule',
+    'Molecule': 'dace_query.opacity.molecule',
+})
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Union, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from astropy.table import Table
+    from pandas import DataFrame
 
 MOLECULE_DEFAULT_LIMIT = 10000
 
@@ -38,7 +42,7 @@ class MoleculeClass:
         self.__OPACITY_API = 'opa-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -101,7 +105,9 @@ class MoleculeClass:
                  temperature_boundaries: tuple[int, int],
                  pressure_boundaries: tuple[float, float],
                  output_directory: Optional[str] = None,
-                 output_filename: Optional[str] = None) -> None:
+                 output_filename: Optional[str] = None,
+                 extract: Optional[bool] = False,
+                 member_filter: Optional[Union[str, list[str]]] = None) -> None:
         """
         Download data of a specified molecule from the opacity module.
 
@@ -119,6 +125,11 @@ class MoleculeClass:
         :type output_directory: Optional[str]
         :param output_filename: The filename for the download
         :type output_filename: Optional[str]
+        :param extract: Extract the files of the archive into the output directory while downloading it, instead of
+            saving the archive
+        :type extract: Optional[bool]
+        :param member_filter: When extracting, only keep the files matching these glob patterns (e.g. '*.bin')
+        :type member_filter: Optional[Union[str, list[str]]]
         :return: None
 
         >>> from dace_query.opacity import Molecule
@@ -136,7 +147,9 @@ class MoleculeClass:
                 'version': str(version)
             },
             output_directory=output_directory,
-            output_filename=output_filename
+            output_filename=output_filename,
+            extract=extract,
+            member_filter=member_filter
         )
 
     def get_data(self,
@@ -277,5 +290,5 @@ class MoleculeClass:
         )
 
 
-Molecule: MoleculeClass = MoleculeClass()
-"""Molecule instance"""
+# Molecule instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Molecule': MoleculeClass})
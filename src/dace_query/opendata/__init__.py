@@ -1 +1,8 @@
-from dace_query.opendata.opendata import OpenData, OpenDataClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['OpenDataClass', 'OpenData']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'OpenDataClass': 'dace_query.opendata.opendata',
+    'OpenData': 'dace_query.opendata.opendata',
+})
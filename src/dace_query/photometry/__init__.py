@@ -1 +1,8 @@
-from dace_query.photometry.photometry import Photometry, PhotometryClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['PhotometryClass', 'Photometry']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'PhotometryClass': 'dace_query.photometry.photometry',
+    'Photometry': 'dace_query.photometry.photometry',
+})
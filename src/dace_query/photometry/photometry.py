@@ -2,19 +2,24 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Union, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.coordinates import SkyCoord, Angle
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+from dace_query.mixins import PagesMixin, RegionsMixin
+
+if TYPE_CHECKING:
+    from astropy.coordinates import SkyCoord, Angle
+    from astropy.table import Table
+    from pandas import DataFrame
 
 PHOTOMETRY_DEFAULT_LIMIT = 10000
 
 
-class PhotometryClass:
+class PhotometryClass(PagesMixin, RegionsMixin):
     """
     The photometry class.
     Use to retrieve data from the photometry database.
@@ -23,6 +28,7 @@ class PhotometryClass:
 
     >>> from dace_query.photometry import Photometry
     """
+    DEFAULT_LIMIT = PHOTOMETRY_DEFAULT_LIMIT
     __ACCEPTED_FILE_TYPES = ['s1d', 's2d', 'ccf', 'bis', 'all']
 
     def __init__(self, dace_instance: Optional[DaceClass] = None):
@@ -40,7 +46,7 @@ class PhotometryClass:
         self.__PHOTOMETRY_ENDPOINT = self.__OBSERVATION_ENDPOINT + 'photometry/'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -60,7 +66,8 @@ class PhotometryClass:
                        limit: Optional[int] = PHOTOMETRY_DEFAULT_LIMIT,
                        filters: Optional[dict] = None,
                        sort: Optional[dict] = None,
-                       output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+                       output_format: Optional[str] = None,
+                       columns: Optional[list[str]] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
 
         """
         Query the photometry database to retrieve data in the chosen format.
@@ -77,6 +84,8 @@ class PhotometryClass:
         :type sort: Optional[dict]
         :param output_format: Type of data returns
         :type output_format: Optional[str]
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: The desired data in the chosen output format
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -96,9 +105,10 @@ class PhotometryClass:
                 params={
                     'limit': str(limit),
                     'filters': json.dumps(filters),
-                    'sort': json.dumps(sort)
+                    'sort': json.dumps(sort),
+                    'col': columns
                 }
-            ), output_format=output_format
+            ), output_format=output_format, columns=columns
         )
 
     def query_region(self,
@@ -163,5 +173,5 @@ class PhotometryClass:
         return result['observations']
 
 
-Photometry: PhotometryClass = PhotometryClass()
-"""A photometry instance"""
+# A photometry instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Photometry': PhotometryClass})
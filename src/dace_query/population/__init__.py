@@ -1 +1,8 @@
-from dace_query.population.population import Population, PopulationClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['PopulationClass', 'Population']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'PopulationClass': 'dace_query.population.population',
+    'Population': 'dace_query.population.population',
+})
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Union, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from astropy.table import Table
+    from pandas import DataFrame
 
 POPULATION_DEFAULT_LIMIT = 10000
 
@@ -41,7 +45,7 @@ class PopulationClass:
         self.__POPULATION_API = 'evo-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -226,5 +230,5 @@ class PopulationClass:
         )
 
 
-Population: PopulationClass = PopulationClass()
-"""Population instance"""
+# Population instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Population': PopulationClass})
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+import numpy as np
+
+from dace_query.filters import is_null
+
+if TYPE_CHECKING:
+    from astropy.coordinates import Angle, SkyCoord
+
+# The positions closer than this factor times the search radius are searched by the same cone
+DEFAULT_MERGE_FACTOR = 10
+
+
+class Cone(NamedTuple):
+    """A cone of the sky searched by one query, covering the regions of its sources (angles in degrees)"""
+    ra: float
+    dec: float
+    radius: float
+    sources: np.ndarray
+
+
+def import_search_around_sky():
+    """
+    Import the astropy cross-match of two catalogs, which requires scipy.
+
+    :return: The search_around_sky function
+    :raises ImportError: if scipy is not installed
+    """
+    try:
+        import scipy.spatial  # noqa: F401
+    except ImportError as e:
+        raise ImportError('Searching many regions requires scipy, install it with : pip install scipy') from e
+    from astropy.coordinates import search_around_sky
+    return search_around_sky
+
+
+def group_regions(sky_coords: SkyCoord, radius: Angle, merge_radius: Optional[Angle] = None) -> list[Cone]:
+    """
+    Group the regions of radius ``radius`` around the positions into cones, each position being searched by one cone.
+    A cone is centered on the first position not yet grouped, and merges the other positions not yet grouped
+    within ``merge_radius`` of it. Its radius covers the regions of all its positions.
+
+    >>> from astropy.coordinates import Angle, SkyCoord
+    >>> from dace_query.regions import group_regions
+    >>> cones = group_regions(SkyCoord([10, 10.001, 50], [20, 20, -5], unit='deg'), Angle('5arcsec'))
+    >>> len(cones)
+    2
+
+    :param sky_coords: The positions
+    :type sky_coords: SkyCoord
+    :param radius: The search radius around each position
+    :type radius: Angle
+    :param merge_radius: The separation under which positions are merged (default: 10 times the search radius)
+    :type merge_radius: Optional[Angle]
+    :return: The cones
+    :rtype: list[Cone]
+    """
+    search_around_sky = import_search_around_sky()
+    sky_coords = sky_coords.reshape((1,)) if sky_coords.isscalar else sky_coords
+    if len(sky_coords) == 0:
+        return []
+    merge_radius = radius * DEFAULT_MERGE_FACTOR if merge_radius is None else merge_radius
+
+    seeds, neighbours, separations, _ = search_around_sky(sky_coords, sky_coords, merge_radius)
+    order = np.argsort(seeds, kind='stable')
+    neighbours, separations = neighbours[order], separations.degree[order]
+    starts = np.searchsorted(seeds[order], np.arange(len(sky_coords) + 1))
+
+    grouped = np.zeros(len(sky_coords), dtype=bool)
+    seeds, extents, sources = [], [], []
+    for seed in range(len(sky_coords)):
+        if grouped[seed]:
+            continue
+        grouped[seed] = True
+        members = neighbours[starts[seed]:starts[seed + 1]]
+        free = ~grouped[members]
+        members, member_separations = members[free], separations[starts[seed]:starts[seed + 1]][free]
+        grouped[members] = True
+        seeds.append(seed)
+        extents.append(member_separations.max(initial=0))
+        sources.append(np.concatenate(([seed], members)))
+    # Plain floats, indexing the astropy coordinates one by one being slow
+    centers = sky_coords[np.array(seeds)].icrs
+    radii = radius.degree + np.array(extents)
+    return [Cone(*cone) for cone in zip(centers.ra.degree.tolist(), centers.dec.degree.tolist(), radii.tolist(),
+                                        sources)]
+
+
+def match_sources(sky_coords: SkyCoord, cone: Cone, coordinates: np.ndarray,
+                  radius: Angle) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Match the rows found in a cone with its sources, on their exact separation.
+
+    :param sky_coords: The positions of all the sources
+    :type sky_coords: SkyCoord
+    :param cone: The searched cone
+    :type cone: Cone
+    :param coordinates: The coordinates of the rows, as sexagesimal strings ('hh:mm:ss.s +dd:mm:ss.s')
+    :type coordinates: np.ndarray
+    :param radius: The search radius around each source
+    :type radius: Angle
+    :return: The indices of the matched sources and of their rows, one pair by match
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+    search_around_sky = import_search_around_sky()
+    from astropy import units
+    from astropy.coordinates import SkyCoord
+
+    coordinates = np.asarray(coordinates)
+    valid = np.flatnonzero(~is_null(coordinates))
+    if len(valid) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    rows = SkyCoord(coordinates[valid].astype(str), unit=(units.hourangle, units.deg))
+    sources = sky_coords.reshape((1,)) if sky_coords.isscalar else sky_coords
+    matched_sources, matched_rows, _, _ = search_around_sky(sources[cone.sources], rows, radius)
+    return cone.sources[matched_sources], valid[matched_rows]
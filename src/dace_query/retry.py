@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, NamedTuple, Optional
+
+import requests
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+DEFAULT_BACKOFF = 0.5
+
+DEFAULT_MAX_BACKOFF = 30.0
+
+# Transient statuses of the DACE webapps (rate limited, bad gateway, unavailable, gateway timeout)
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# The POST endpoints which only prepare a download and can safely be sent twice ('/' ending patterns are prefixes)
+RETRY_POST_ENDPOINTS = ('download/prepare/', 'download')
+
+
+class RetryAttempt(NamedTuple):
+    """The outcome of one attempt of a request, passed to the attempt listeners"""
+    api_name: str
+    endpoint: str
+    method: str
+    attempt: int
+    status_code: Optional[int]
+    error: Optional[Exception]
+    elapsed: float
+    delay: Optional[float]
+
+
+class RetryPolicy:
+    """
+    The retry policy.
+    Retries the requests failing with a transient error (a connection error, a timeout or one of the
+    :data:`RETRY_STATUSES`), waiting between the attempts for an exponential backoff with full jitter, or for the
+    delay asked by the server through a Retry-After header.
+
+    Only the GET requests and the POST requests preparing a download (:data:`RETRY_POST_ENDPOINTS`) are retried, the
+    other POST requests not being known to be idempotent.
+
+    Every attempt is reported to the listeners, e.g. to count the retries of a long batch job.
+
+    >>> from dace_query.retry import RetryPolicy
+    >>> attempts = []
+    >>> retry_policy = RetryPolicy(max_attempts=5, backoff=1, on_attempt=attempts.append)
+    """
+
+    def __init__(self,
+                 max_attempts: Optional[int] = DEFAULT_MAX_ATTEMPTS,
+                 backoff: Optional[float] = DEFAULT_BACKOFF,
+                 max_backoff: Optional[float] = DEFAULT_MAX_BACKOFF,
+                 on_attempt: Optional[Callable[[RetryAttempt], None]] = None,
+                 log: Optional[logging.Logger] = None):
+        """
+        Create a retry policy.
+
+        :param max_attempts: The maximum number of attempts of a request, 1 disables the retries
+        :type max_attempts: Optional[int]
+        :param backoff: The base delay of the exponential backoff, in seconds
+        :type backoff: Optional[float]
+        :param max_backoff: The maximum delay between two attempts, in seconds
+        :type max_backoff: Optional[float]
+        :param on_attempt: A listener called after each attempt
+        :type on_attempt: Optional[Callable[[RetryAttempt], None]]
+        :param log: The logger reporting the retries
+        :type log: Optional[logging.Logger]
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.listeners = [] if on_attempt is None else [on_attempt]
+        self.log = logging.getLogger(__name__) if log is None else log
+
+    def add_listener(self, listener: Callable[[RetryAttempt], None]) -> None:
+        """
+        Add a listener called after each attempt.
+
+        :param listener: The listener
+        :type listener: Callable[[RetryAttempt], None]
+        """
+        self.listeners.append(listener)
+
+    @staticmethod
+    def is_retryable(method: str, endpoint: str) -> bool:
+        """Internal stuff"""
+        if method == 'GET':
+            return True
+        return method == 'POST' and any(endpoint.startswith(pattern) if pattern.endswith('/') else endpoint == pattern
+                                        for pattern in RETRY_POST_ENDPOINTS)
+
+    def get_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Internal stuff"""
+        retry_after = None if response is None else response.headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def call(self, send: Callable[[], requests.Response], api_name: str, endpoint: str,
+             method: Optional[str] = 'GET') -> requests.Response:
+        """
+        Send a request, and send it again while it fails with a transient error and attempts remain.
+
+        :param send: The function sending the request
+        :type send: Callable[[], requests.Response]
+        :param api_name: The api name of the request
+        :type api_name: str
+        :param endpoint: The endpoint of the request
+        :type endpoint: str
+        :param method: The HTTP method of the request
+        :type method: Optional[str]
+        :return: The last response
+        :rtype: requests.Response
+        """
+        max_attempts = self.max_attempts if self.is_retryable(method, endpoint) else 1
+        for attempt in range(1, max_attempts + 1):
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            elapsed = time.perf_counter() - start
+
+            transient = error is not None or response.status_code in RETRY_STATUSES
+            delay = self.get_delay(attempt, response) if transient and attempt < max_attempts else None
+            self.__notify(RetryAttempt(api_name, endpoint, method, attempt,
+                                       None if response is None else response.status_code, error, elapsed, delay))
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            self.log.warning('Attempt %s of %s failed when calling %s/%s (%s), retrying in %.1f s', attempt,
+                             max_attempts, api_name, endpoint, error if error is not None else response.status_code,
+                             delay)
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+    def __notify(self, attempt: RetryAttempt) -> None:
+        """Internal stuff"""
+        for listener in self.listeners:
+            listener(attempt)
@@ -1 +1,8 @@
-from dace_query.spectroscopy.spectroscopy import Spectroscopy, SpectroscopyClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['SpectroscopyClass', 'Spectroscopy']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'SpectroscopyClass': 'dace_query.spectroscopy.spectroscopy',
+    'Spectroscopy': 'dace_query.spectroscopy.spectroscopy',
+})
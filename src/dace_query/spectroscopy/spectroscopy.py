@@ -2,20 +2,27 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Union, Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Union
 
-from astropy.coordinates import SkyCoord, Angle
-from astropy.table import Table
+import numpy as np
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
-from dace_query.dace import NoDataException
+import dace_query.dace
+from dace_query.dace import DaceClass, NoDataException
+from dace_query.lazy import lazy_attributes
+from dace_query.mixins import PagesMixin, RegionsMixin
+from dace_query.store import TimeseriesStore, merge_newer
+
+if TYPE_CHECKING:
+    from astropy.coordinates import SkyCoord, Angle
+    from astropy.table import Table
+    from pandas import DataFrame
 
 SPECTROSCOPY_DEFAULT_LIMIT = 10000
 
 
-class SpectroscopyClass:
+class SpectroscopyClass(PagesMixin, RegionsMixin):
     """
     The spectroscopy class.
     Use to retrieve data from the spectroscopy module.
@@ -25,6 +32,7 @@ class SpectroscopyClass:
     >>> from dace_query.spectroscopy import Spectroscopy
 
     """
+    DEFAULT_LIMIT = SPECTROSCOPY_DEFAULT_LIMIT
     ACCEPTED_FILE_TYPES = ['s1d', 's2d', 'ccf', 'bis', 'all']
 
     def __init__(self, dace_instance: Optional[DaceClass] = None):
@@ -40,7 +48,7 @@ class SpectroscopyClass:
         self.__OBS_API = 'obs-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -60,7 +68,8 @@ class SpectroscopyClass:
                        limit: Optional[int] = SPECTROSCOPY_DEFAULT_LIMIT,
                        filters: Optional[dict] = None,
                        sort: Optional[dict] = None,
-                       output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+                       output_format: Optional[str] = None,
+                       columns: Optional[list[str]] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
         """
         Query the spectroscopy database to retrieve data in the chosen format.
 
@@ -76,6 +85,8 @@ class SpectroscopyClass:
         :type sort: Optional[dict]
         :param output_format: Type of data returns
         :type output_format: Optional[str]
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: The desired data in the chosen output format
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -95,9 +106,10 @@ class SpectroscopyClass:
                 params={
                     'limit': str(limit),
                     'filters': json.dumps(filters),
-                    'sort': json.dumps(sort)
+                    'sort': json.dumps(sort),
+                    'col': columns
                 }
-            ), output_format=output_format
+            ), output_format=output_format, columns=columns
         )
 
     def query_region(self,
@@ -142,7 +154,9 @@ class SpectroscopyClass:
                  file_type: str,
                  filters: Optional[dict] = None,
                  output_directory: Optional[str] = None,
-                 output_filename: Optional[str] = None):
+                 output_filename: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 merge: Optional[bool] = False) -> Optional[dict]:
         """
         Download Spectroscopy products (S1D, S2D, ...) and save it locally depending on the specified arguments.
 
@@ -158,10 +172,18 @@ class SpectroscopyClass:
         :type output_directory: Optional[str]
         :param output_filename: The filename for the download
         :type output_filename: Optional[str]
+        :param batch_size: Split the download into archives of at most this number of files, prepared and downloaded
+            concurrently
+        :type batch_size: Optional[int]
+        :param merge: Extract the archives of the batches into the output directory
+        :type merge: Optional[bool]
+        :return: The manifest of the batches when downloading by batches, None otherwise
+        :rtype: Optional[dict]
 
         >>> from dace_query.spectroscopy import Spectroscopy
         >>> filters_to_use = {'file_rootpath': {'contains':['HARPS.2010-04-04T03:38:51.386.fits']}}
         >>> # Spectroscopy.download('s1d', filters=filters_to_use, output_filename='files.tar.gz')
+        >>> # Spectroscopy.download('s1d', filters=filters_to_use, output_directory='/tmp', batch_size=500)
         """
         if file_type not in self.ACCEPTED_FILE_TYPES:
             raise ValueError('file_type must be one of these values : ' + ','.join(self.ACCEPTED_FILE_TYPES))
@@ -170,17 +192,20 @@ class SpectroscopyClass:
 
         spectroscopy_data = self.query_database(filters=filters, output_format='dict')
         files = spectroscopy_data.get('file_rootpath', [])
-        download_response = self.dace.request_post(
-            api_name=self.__OBS_API,
-            endpoint='download/prepare/spectroscopy',
-            data=json.dumps({
-                'fileType': file_type,
-                'files': files
-            })
-        )
-        if not download_response:
+        if batch_size is not None:
+            return self.dace.download_batches(
+                api_name=self.__OBS_API,
+                obs_type='spectroscopy',
+                files=files,
+                prepare=lambda batch_files: self.__prepare_download(file_type, batch_files),
+                batch_size=batch_size,
+                output_directory=output_directory,
+                output_filename=output_filename,
+                merge=merge
+            )
+        download_id = self.__prepare_download(file_type, files)
+        if not download_id:
             return None
-        download_id = download_response['values'][0]
 
         self.dace.persist_file_on_disk(
             api_name=self.__OBS_API,
@@ -194,7 +219,9 @@ class SpectroscopyClass:
                        files: list,
                        file_type: Optional[str] = 'all',
                        output_directory: Optional[str] = None,
-                       output_filename: Optional[str] = None):
+                       output_filename: Optional[str] = None,
+                       extract: Optional[bool] = False,
+                       member_filter: Optional[Union[str, list[str]]] = None):
         """
         Download reduction products specified in argument for the list of raw files specified and save it locally.
 
@@ -208,11 +235,17 @@ class SpectroscopyClass:
         :type output_directory: Optional[str]
         :param output_filename: The filename for the download
         :type output_filename: Optional[str]
+        :param extract: Extract the files of the archive into the output directory while downloading it, instead of
+            saving the archive
+        :type extract: Optional[bool]
+        :param member_filter: When extracting, only keep the files matching these glob patterns (e.g. '*_S1D_A.fits')
+        :type member_filter: Optional[Union[str, list[str]]]
         :return: None
 
         >>> from dace_query.spectroscopy import Spectroscopy
         >>> files_to_download = ['harps/DRS-3.5/reduced/2019-07-05/HARPS.2019-07-06T04:00:00.323.fits']
         >>> # Spectroscopy.download_files(files=files_to_download, file_type='all')
+        >>> # Spectroscopy.download_files(files=files_to_download, file_type='s1d', extract=True, member_filter='*_S1D_A.fits')
         """
 
         if files is None:
@@ -220,25 +253,34 @@ class SpectroscopyClass:
 
         files = list(map(lambda file: f'{file}.fits' if not file.endswith('.fits') else file, files))
         # files = [file + '.fits' for file in files if '.fits' not in file]
-        download_response = self.dace.request_post(
-            api_name=self.__OBS_API,
-            endpoint='download/prepare/spectroscopy',
-            data=json.dumps(
-                {'fileType': file_type, 'files': files}
-            )
-        )
-        if not download_response:
+        download_id = self.__prepare_download(file_type, files)
+        if not download_id:
             return None
-        download_id = download_response['values'][0]
 
         self.dace.persist_file_on_disk(
             api_name=self.__OBS_API,
             obs_type='spectroscopy',
             download_id=download_id,
             output_directory=output_directory,
-            output_filename=output_filename
+            output_filename=output_filename,
+            extract=extract,
+            member_filter=member_filter
         )
 
+    def __prepare_download(self, file_type: str, files: list[str]) -> Optional[str]:
+        """Internal stuff"""
+        download_response = self.dace.request_post(
+            api_name=self.__OBS_API,
+            endpoint='download/prepare/spectroscopy',
+            data=json.dumps({
+                'fileType': file_type,
+                'files': files
+            })
+        )
+        if not download_response:
+            return None
+        return download_response['values'][0]
+
     def get_timeseries(self, target: str,
                        sorted_by_instrument: Optional[bool] = True,
                        output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
@@ -271,6 +313,102 @@ class SpectroscopyClass:
             transformed_data = self.dace.transform_to_format(spectroscopy_data, output_format='numpy')
             return self.dace.order_spectroscopy_data_by_instruments(transformed_data)
 
+    def sync_timeseries(self, target: str,
+                        store: Optional[Union[TimeseriesStore, Path, str]] = None,
+                        sorted_by_instrument: Optional[bool] = True,
+                        output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+        """
+        Retrieve the up-to-date spectroscopy time series data for a specified target, keeping a copy in a local store.
+
+        The first call downloads the whole time series. The following calls only ask for the rows from the last
+        stored rjd onwards and append the ones not stored yet to the stored time series, so that only the new points
+        are transferred. The whole time series is downloaded again when its columns have changed.
 
-Spectroscopy: SpectroscopyClass = SpectroscopyClass()
-"""Spectroscopy instance"""
+        All available formats are defined in this section (see :doc:`output_format`).
+
+        :param target: The target to retrieve data from.
+        :type target: str
+        :param store: The local store, or its directory (default ~/.cache/dace-query/timeseries)
+        :type store: Optional[Union[TimeseriesStore, Path, str]]
+        :param sorted_by_instrument: Application of the instrument sorting
+        :type sorted_by_instrument: Optional[bool]
+        :param output_format: Type of data returns
+        :type output_format: Optional[str]
+        :return: The desired data in the chosen output format
+        :rtype: dict[str, ndarray] or DataFrame or Table or dict
+
+        >>> from dace_query.spectroscopy import Spectroscopy
+        >>> target_to_search = "C15-0734"
+        >>> values = Spectroscopy.sync_timeseries(target=target_to_search, store='/tmp/dace-timeseries')
+
+        """
+        if not isinstance(store, TimeseriesStore):
+            store = TimeseriesStore(directory=store)
+        stored = store.load(target)
+        data = None
+        if stored is not None and len(stored.get('rjd', ())):
+            last_rjd = float(np.nanmax(stored['rjd']))
+            received = self.__request_timeseries(target, filters={'rjd': {'min': last_rjd}})
+            data = merge_newer(stored, received, 'rjd')
+            if data is None:
+                self.log.info('The columns of the %s time series have changed, downloading it again', target)
+        if data is None:
+            data = self.__request_timeseries(target)
+        # A failed or empty download is not stored, the next call downloading the whole time series again
+        if data is not stored and len(next(iter(data.values()), ())):
+            store.save(target, data)
+
+        if not sorted_by_instrument:
+            return self.dace.convert_to_format(data, output_format)
+        return self.dace.order_spectroscopy_data_by_instruments(dict(data))
+
+    def __request_timeseries(self, target: str, filters: Optional[dict] = None) -> dict[str, ndarray]:
+        """Internal stuff"""
+        spectroscopy_data = self.dace.request_get(
+            api_name=self.__OBS_API,
+            endpoint=f'observation/radialVelocities/{target}',
+            params=None if filters is None else {'filters': json.dumps(filters)},
+            use_cache=False
+        )
+        return dict(self.dace.transform_to_format(spectroscopy_data, output_format='numpy'))
+
+    def get_timeseries_many(self, targets: Iterable[str],
+                            sorted_by_instrument: Optional[bool] = True,
+                            output_format: Optional[str] = None,
+                            max_workers: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Retrieve the spectroscopy time series data of several targets concurrently.
+
+        The queries run on a bounded pool of threads and each result is yielded as soon as it is available, as a
+        (target, data, error) tuple. A failing target yields its error, with no data, and does not stop the others.
+
+        All available formats are defined in this section (see :doc:`output_format`).
+
+        :param targets: The targets to retrieve data from
+        :type targets: Iterable[str]
+        :param sorted_by_instrument: Application of the instrument sorting
+        :type sorted_by_instrument: Optional[bool]
+        :param output_format: Type of data returns
+        :type output_format: Optional[str]
+        :param max_workers: The maximum number of concurrent queries (default: the dace connection pool size)
+        :type max_workers: Optional[int]
+        :return: The (target, data, error) tuples, in order of completion
+        :rtype: Iterator[tuple[str, dict or DataFrame or Table or None, Optional[Exception]]]
+
+        >>> from dace_query.spectroscopy import Spectroscopy
+        >>> targets_to_search = ['HD40307', 'HD10700']
+        >>> for target, values, error in Spectroscopy.get_timeseries_many(targets_to_search, max_workers=2):
+        ...     pass
+        """
+        for target, data, error in self.dace.run_concurrently(
+                lambda target_to_search: self.get_timeseries(target_to_search,
+                                                             sorted_by_instrument=sorted_by_instrument,
+                                                             output_format=output_format),
+                targets, max_workers=max_workers):
+            if error is not None:
+                self.log.error('Problem when retrieving the time series of %s : %s', target, error)
+            yield target, data, error
+
+
+# Spectroscopy instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Spectroscopy': SpectroscopyClass})
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from dace_query.filters import NEGATED_OPERATIONS, get_row_identity
+
+TIMESERIES_FILE_SUFFIX = '.npz'
+
+PARQUET_STORE_FORMATS = ('parquet', 'feather')
+
+
+class TimeseriesStore:
+    """
+    The local store of the time series.
+    Keeps the columns of the time series of each target in a numpy archive, so that a time series is updated with its
+    newest rows only (see :meth:`SpectroscopyClass.sync_timeseries`).
+
+    >>> from dace_query.store import TimeseriesStore
+    >>> store = TimeseriesStore(directory='/tmp/dace-timeseries')
+    """
+
+    def __init__(self, directory: Optional[Union[Path, str]] = None):
+        """
+        Create a store of time series kept in the specified directory.
+
+        :param directory: The store directory (default ~/.cache/dace-query/timeseries)
+        :type directory: Optional[Union[Path, str]]
+        """
+        self.directory = Path(Path.home(), '.cache', 'dace-query', 'timeseries') if directory is None else Path(
+            directory).expanduser()
+        self.__lock = threading.Lock()
+
+    def load(self, key: str) -> Optional[dict[str, np.ndarray]]:
+        """
+        Load the columns of a time series.
+
+        :param key: The time series key (e.g. the target name)
+        :type key: str
+        :return: The columns, None if the time series is not stored
+        :rtype: Optional[dict[str, np.ndarray]]
+        """
+        path = self.get_path(key)
+        if not path.is_file():
+            return None
+        # The ragged columns are pickled object arrays, written by the store itself
+        with np.load(path, allow_pickle=True) as archive:
+            return {name: archive[name] for name in archive.files}
+
+    def save(self, key: str, data: dict[str, np.ndarray]) -> None:
+        """
+        Store the columns of a time series, replacing the previous ones.
+
+        :param key: The time series key (e.g. the target name)
+        :type key: str
+        :param data: The columns
+        :type data: dict[str, np.ndarray]
+        """
+        path = self.get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+        with open(temporary_path, 'wb') as file:
+            np.savez(file, **data)
+        with self.__lock:
+            os.replace(temporary_path, path)
+
+    def remove(self, key: str) -> None:
+        """
+        Remove a stored time series.
+
+        :param key: The time series key
+        :type key: str
+        """
+        self.get_path(key).unlink(missing_ok=True)
+
+    def get_path(self, key: str) -> Path:
+        """Internal stuff"""
+        # Readable file names, a digest telling apart the keys differing in their special characters only
+        name = re.sub(r'[^\w.+-]', '_', key)
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:8]
+        return Path(self.directory, f'{name}-{digest}{TIMESERIES_FILE_SUFFIX}')
+
+
+def merge_newer(stored: dict[str, np.ndarray], received: dict[str, np.ndarray],
+                column: str) -> Optional[dict[str, np.ndarray]]:
+    """
+    Append to the stored columns the received rows from the last stored one onwards. The received rows tied with the
+    last stored value which are already stored (identical in every column) are dropped, so that the rows added at this
+    value since the last merge are kept, and the merge is right even when the server ignored the filter and sent rows
+    already stored.
+
+    :param stored: The stored columns
+    :type stored: dict[str, np.ndarray]
+    :param received: The received columns
+    :type received: dict[str, np.ndarray]
+    :param column: The column ordering the rows (e.g. 'rjd')
+    :type column: str
+    :return: The merged columns, None if the received columns differ from the stored ones
+    :rtype: Optional[dict[str, np.ndarray]]
+    """
+    if not received or len(next(iter(received.values()))) == 0:
+        return stored
+    if set(stored) != set(received) or column not in stored:
+        return None
+    last = np.nanmax(stored[column]) if len(stored[column]) else -np.inf
+    newer = received[column] >= last
+    stored_at_last = Counter(get_row_identity(stored, row) for row in np.flatnonzero(stored[column] == last))
+    for row in np.flatnonzero(received[column] == last):
+        identity = get_row_identity(received, row)
+        if stored_at_last[identity]:
+            stored_at_last[identity] -= 1
+            newer[row] = False
+    return {name: np.concatenate((values, received[name][newer])) for name, values in stored.items()}
+
+
+def import_pyarrow():
+    """
+    Import pyarrow and its dataset and compute modules, an optional dependency of the :class:`ParquetStore`.
+
+    :return: The pyarrow module
+    :raises ImportError: if pyarrow is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+    except ImportError as e:
+        raise ImportError('The parquet store requires pyarrow, install it with : pip install pyarrow') from e
+    return pyarrow
+
+
+class ParquetStore:
+    """
+    The local archive of query results.
+    Writes the results of ``query_database`` (of any module) as Parquet or Feather datasets, optionally partitioned
+    by some columns, and queries them again offline with the same ``filters`` and ``sort`` syntax as DACE (see
+    :doc:`query_options`). Only the requested columns are read, and the filters are pushed down to the dataset scan,
+    skipping the partitions and row groups they exclude.
+
+    Requires pyarrow (``pip install dace-query[parquet]``).
+
+    >>> from dace_query.spectroscopy import Spectroscopy
+    >>> from dace_query.store import ParquetStore
+    >>> store = ParquetStore('/tmp/dace-archive')
+    >>> store.write('spectroscopy', Spectroscopy.query_database(limit=100000, output_format='numpy'),
+    ...             partition_by='ins_name')
+    >>> values = store.query('spectroscopy', filters={'ins_name': {'equal': ['HARPS']}}, columns=['obj_date_bjd'])
+    """
+
+    def __init__(self, directory: Union[Path, str], file_format: Optional[str] = 'parquet'):
+        """
+        Create an archive of query results kept in the specified directory, one dataset by name.
+
+        :param directory: The archive directory
+        :type directory: Union[Path, str]
+        :param file_format: The file format of the datasets, 'parquet' or 'feather'
+        :type file_format: Optional[str]
+        """
+        if file_format not in PARQUET_STORE_FORMATS:
+            raise ValueError('file_format must be one of these values : ' + ','.join(PARQUET_STORE_FORMATS))
+        self.directory = Path(directory).expanduser()
+        self.file_format = file_format
+
+    def write(self, name: str, data: dict[str, np.ndarray],
+              partition_by: Optional[Union[str, list[str]]] = None,
+              append: Optional[bool] = False) -> Path:
+        """
+        Write query results (in the 'numpy' or 'dict' output format) as a dataset.
+
+        :param name: The dataset name (e.g. 'spectroscopy')
+        :type name: str
+        :param data: The query results, by column
+        :type data: dict[str, np.ndarray]
+        :param partition_by: The column(s) partitioning the dataset (e.g. 'ins_name' or 'prog_id')
+        :type partition_by: Optional[Union[str, list[str]]]
+        :param append: Whether to add the results to the dataset instead of replacing it
+        :type append: Optional[bool]
+        :return: The dataset directory
+        :rtype: Path
+        """
+        pyarrow = import_pyarrow()
+        path = Path(self.directory, name)
+        if not append and path.exists():
+            shutil.rmtree(path)
+        partitioning = [partition_by] if isinstance(partition_by, str) else partition_by
+        table = pyarrow.table({column: pyarrow.array(values) for column, values in data.items()})
+        pyarrow.dataset.write_dataset(table, str(path), format=self.file_format, partitioning=partitioning,
+                                      partitioning_flavor='hive' if partitioning else None,
+                                      basename_template=f'part-{uuid.uuid4().hex}-{{i}}.{self.file_format}',
+                                      existing_data_behavior='overwrite_or_ignore')
+        return path
+
+    def query(self, name: str,
+              filters: Optional[dict] = None,
+              sort: Optional[dict] = None,
+              columns: Optional[list[str]] = None,
+              limit: Optional[int] = None,
+              output_format: Optional[str] = None):
+        """
+        Query a dataset with the DACE filters and sort.
+
+        All available formats are defined in this section (see :doc:`output_format`).
+
+        :param name: The dataset name
+        :type name: str
+        :param filters: Filters to apply to the query
+        :type filters: Optional[dict]
+        :param sort: Sort order to apply to the query
+        :type sort: Optional[dict]
+        :param columns: The columns to read (default: all of them)
+        :type columns: Optional[list[str]]
+        :param limit: Maximum number of rows to return
+        :type limit: Optional[int]
+        :param output_format: Type of data returns
+        :type output_format: Optional[str]
+        :return: The desired data in the chosen output format
+        :rtype: dict[str, ndarray] or DataFrame or Table or dict
+        """
+        pyarrow = import_pyarrow()
+        from dace_query.dace import DaceClass
+
+        path = Path(self.directory, name)
+        if not path.is_dir():
+            raise FileNotFoundError(f'The dataset {name} is not in the archive {self.directory}')
+        dataset = pyarrow.dataset.dataset(str(path), format=self.file_format, partitioning='hive')
+        expression = filters_to_expression(filters, dataset.schema)
+        if sort or limit is not None:
+            # The sort columns are read with the projection, and dropped once sorted
+            read_columns = None if columns is None else list(dict.fromkeys([*columns, *(sort or {})]))
+            table = dataset.to_table(columns=read_columns, filter=expression)
+            if sort:
+                table = table.sort_by([(column, 'descending' if str(order).lower() == 'desc' else 'ascending')
+                                       for column, order in sort.items()])
+            if limit is not None:
+                table = table.slice(0, limit)
+            if columns is not None:
+                table = table.select(columns)
+        else:
+            table = dataset.to_table(columns=columns, filter=expression)
+        data = {column: table.column(column).to_numpy() for column in table.column_names}
+        return DaceClass.convert_to_format(data, output_format)
+
+
+def filters_to_expression(filters: Optional[dict], schema):
+    """
+    Translate DACE filters into a pyarrow dataset expression (see :doc:`query_options`), the filters of the different
+    columns and the operations of a column being combined with a logical and. The rows are matched as by
+    :func:`dace_query.filters.evaluate_filters`, the missing values included.
+
+    :param filters: The DACE filters
+    :type filters: Optional[dict]
+    :param schema: The pyarrow schema of the filtered dataset
+    :return: The pyarrow expression, None without filters
+    :raises ValueError: if a filter operation is unknown
+    """
+    pyarrow = import_pyarrow()
+    compute = pyarrow.compute
+    expression = None
+    for column, operations in (filters or {}).items():
+        if column not in schema.names:
+            raise ValueError(f'Unknown filtered column {column}')
+        field = compute.field(column)
+        column_type = schema.field(column).type
+        is_string = pyarrow.types.is_string(column_type) or pyarrow.types.is_large_string(column_type)
+        # The missing values only match the 'empty' operation and the negated ones, as evaluate_filters
+        missing = field.is_null()
+        if pyarrow.types.is_floating(column_type):
+            # Not is_null(nan_is_null=True), which the statistics of the parquet files wrongly rule out
+            missing = missing | compute.is_nan(field)
+        if is_string:
+            missing = missing | (field == '')
+        for operation, value in operations.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            positive_operation = NEGATED_OPERATIONS.get(operation, operation)
+            if positive_operation == 'contains':
+                condition = None
+                for substring in values:
+                    match = compute.match_substring(field, substring)
+                    condition = match if condition is None else condition | match
+                condition = condition & ~missing
+            elif positive_operation == 'equal':
+                condition = field.isin(values) & ~missing
+            elif operation == 'min':
+                condition = field >= value
+            elif operation == 'max':
+                condition = field <= value
+            elif operation == 'is':
+                condition = field == bool(value)
+            elif operation == 'empty':
+                condition = missing if value else ~missing
+            else:
+                raise ValueError(f'Unknown filter operation {operation} on {column}')
+            if operation in NEGATED_OPERATIONS:
+                condition = ~condition
+            expression = condition if expression is None else expression & condition
+    return expression
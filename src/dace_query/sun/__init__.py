@@ -1 +1,8 @@
-from dace_query.sun.sun import Sun, SunClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['SunClass', 'Sun']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'SunClass': 'dace_query.sun.sun',
+    'Sun': 'dace_query.sun.sun',
+})
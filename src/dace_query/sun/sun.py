@@ -2,20 +2,24 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
-from dace_query.dace import NoDataException
-from dace_query.spectroscopy import Spectroscopy
+import dace_query.dace
+from dace_query.dace import DaceClass, NoDataException
+from dace_query.lazy import lazy_attributes
+from dace_query.mixins import PagesMixin
+from dace_query.spectroscopy.spectroscopy import SpectroscopyClass
+
+if TYPE_CHECKING:
+    from astropy.table import Table
+    from pandas import DataFrame
 
 SUN_DEFAULT_LIMIT = 200000
 
 
-class SunClass:
+class SunClass(PagesMixin):
     """
     The sun class.
     Use to retrieve data from the sun module.
@@ -40,7 +44,7 @@ class SunClass:
         self.__OBS_API = 'obs-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -60,7 +64,8 @@ class SunClass:
                        limit: Optional[int] = SUN_DEFAULT_LIMIT,
                        filters: Optional[dict] = None,
                        sort: Optional[dict] = None,
-                       output_format: Optional[str] = None):
+                       output_format: Optional[str] = None,
+                       columns: Optional[list[str]] = None):
         """
         Query the sun database to retrieve data in the chosen format.
 
@@ -76,6 +81,8 @@ class SunClass:
         :type sort: Optional[dict]
         :param output_format: Type of data returns
         :type output_format: Optional[str]
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: The desired data in the chosen output format
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -95,9 +102,10 @@ class SunClass:
                 params={
                     'limit': str(limit),
                     'filters': json.dumps(filters),
-                    'sort': json.dumps(sort)
+                    'sort': json.dumps(sort),
+                    'col': columns
                 }
-            ), output_format=output_format
+            ), output_format=output_format, columns=columns
         )
 
     def get_timeseries(self, output_format: Optional[str] = None):
@@ -124,7 +132,9 @@ class SunClass:
                  file_type: str,
                  filters: Optional[dict] = None,
                  output_directory: Optional[str] = None,
-                 output_filename: Optional[str] = None) -> None:
+                 output_filename: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 merge: Optional[bool] = False) -> Optional[dict]:
         """
         Download Sun spectroscopy products (S1D, S2D, ...).
 
@@ -137,33 +147,42 @@ class SunClass:
         :type output_directory: Optional[str]
         :param output_filename: The filename for the download
         :type output_filename: Optional[str]
-        :return: None
+        :param batch_size: Split the download into archives of at most this number of files, prepared and downloaded
+            concurrently
+        :type batch_size: Optional[int]
+        :param merge: Extract the archives of the batches into the output directory
+        :type merge: Optional[bool]
+        :return: The manifest of the batches when downloading by batches, None otherwise
+        :rtype: Optional[dict]
 
         >>> from dace_query.sun import Sun
         >>> filters_to_use = {'file_rootpath': {'contains': ['r.HARPN.2016-01-03T15-36-20.496.fits']}}
         >>> # Sun.download('s1d', filters=filters_to_use, output_directory='/tmp', output_filename='sun_spectroscopy_data.tar.gz')
+        >>> # Sun.download('s1d', output_directory='/tmp', batch_size=1000, merge=True)
         """
 
-        if file_type not in Spectroscopy.ACCEPTED_FILE_TYPES:
-            raise ValueError('file_type must be one of these values : ' + ','.join(Spectroscopy.ACCEPTED_FILE_TYPES))
+        if file_type not in SpectroscopyClass.ACCEPTED_FILE_TYPES:
+            raise ValueError(
+                'file_type must be one of these values : ' + ','.join(SpectroscopyClass.ACCEPTED_FILE_TYPES))
         if filters is None:
             filters = {}
 
         sun_spectroscopy_data = self.query_database(filters=filters, output_format='dict')
         files = sun_spectroscopy_data.get('file_rootpath', [])
-
-        download_response = self.dace.request_post(
-            api_name=self.__OBS_API,
-            endpoint='download/prepare/sun',
-            data=json.dumps({
-                'fileType': file_type,
-                'files': files
-            })
-
-        )
-        if not download_response:
+        if batch_size is not None:
+            return self.dace.download_batches(
+                api_name=self.__OBS_API,
+                obs_type='sun',
+                files=files,
+                prepare=lambda batch_files: self.__prepare_download(file_type, batch_files),
+                batch_size=batch_size,
+                output_directory=output_directory,
+                output_filename=output_filename,
+                merge=merge
+            )
+        download_id = self.__prepare_download(file_type, files)
+        if not download_id:
             return None
-        download_id = download_response['values'][0]
         self.dace.persist_file_on_disk(
             api_name=self.__OBS_API,
             obs_type='sun',
@@ -202,6 +221,19 @@ class SunClass:
 
         files = list(map(lambda file: f'{file}.fits' if not file.endswith('.fits') else file, files))
 
+        download_id = self.__prepare_download(file_type, files)
+        if not download_id:
+            return None
+        self.dace.persist_file_on_disk(
+            api_name=self.__OBS_API,
+            obs_type='sun',
+            download_id=download_id,
+            output_directory=output_directory,
+            output_filename=output_filename
+        )
+
+    def __prepare_download(self, file_type: str, files: list[str]) -> Optional[str]:
+        """Internal stuff"""
         download_response = self.dace.request_post(
             api_name=self.__OBS_API,
             endpoint='download/prepare/sun',
@@ -212,20 +244,15 @@ class SunClass:
         )
         if not download_response:
             return None
-        download_id = download_response['values'][0]
-        self.dace.persist_file_on_disk(
-            api_name=self.__OBS_API,
-            obs_type='sun',
-            download_id=download_id,
-            output_directory=output_directory,
-            output_filename=output_filename
-        )
+        return download_response['values'][0]
 
     def download_public_release_all(self,
                                     year: str,
                                     month: str,
                                     output_directory: Optional[str] = None,
-                                    output_filename: Optional[str] = None) -> None:
+                                    output_filename: Optional[str] = None,
+                                    extract: Optional[bool] = False,
+                                    member_filter: Optional[Union[str, list[str]]] = None) -> None:
         """
         Download public sun data of year and month specified in arguments.
 
@@ -237,10 +264,16 @@ class SunClass:
         :type output_directory: Optional[str]
         :param output_filename: The filename for the download
         :type output_filename: Optional[str]
+        :param extract: Extract the files of the archive into the output directory while downloading it, instead of
+            saving the archive
+        :type extract: Optional[bool]
+        :param member_filter: When extracting, only keep the files matching these glob patterns (e.g. '*_S1D_A.fits')
+        :type member_filter: Optional[Union[str, list[str]]]
         :return: None
 
         >>> from dace_query.sun import Sun
         >>> # Sun.download_public_release_all('2015','12', output_directory='/tmp', output_filename='release_all_2015-12.tar.gz')
+        >>> # Sun.download_public_release_all('2015','12', output_directory='/tmp', extract=True, member_filter='*_S1D_A.fits')
 
         """
         year_and_month = str(year) + '-' + str(month)
@@ -248,7 +281,9 @@ class SunClass:
             api_name=self.__OBS_API,
             endpoint=f'sun/download/release/all/{year_and_month}',
             output_directory=output_directory,
-            output_filename=output_filename
+            output_filename=output_filename,
+            extract=extract,
+            member_filter=member_filter
         )
 
     def download_public_release_ccf(self,
@@ -303,5 +338,5 @@ class SunClass:
         )
 
 
-Sun: SunClass = SunClass()
-"""Sun instance"""
+# Sun instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Sun': SunClass})
@@ -1 +1,8 @@
-from dace_query.target.target import Target, TargetClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['TargetClass', 'Target']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'TargetClass': 'dace_query.target.target',
+    'Target': 'dace_query.target.target',
+})
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from astropy.table import Table
+    from pandas import DataFrame
 
 TARGET_DEFAULT_LIMIT = 10000
 
@@ -38,7 +42,7 @@ class TargetClass:
         self.__OBS_API = 'obs-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -58,7 +62,8 @@ class TargetClass:
                        limit: Optional[int] = TARGET_DEFAULT_LIMIT,
                        filters: Optional[dict] = None,
                        sort: Optional[dict] = None,
-                       output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+                       output_format: Optional[str] = None,
+                       columns: Optional[list[str]] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
         """
         Query the target database to retrieve data in the chosen format.
 
@@ -74,6 +79,8 @@ class TargetClass:
         :type sort: Optional[dict]
         :param output_format: Type of data returns
         :type output_format: Optional[str]
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: The desired data in the chosen output format
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -91,11 +98,12 @@ class TargetClass:
                 params={
                     'limit': str(limit),
                     'filters': json.dumps(filters),
-                    'sort': json.dumps(sort)
+                    'sort': json.dumps(sort),
+                    'col': columns
                 }
-            ), output_format=output_format
+            ), output_format=output_format, columns=columns
         )
 
 
-Target: TargetClass = TargetClass()
-"""Target instance"""
+# Target instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Target': TargetClass})
@@ -1 +1,8 @@
-from dace_query.tess.tess import Tess, TessClass
+from dace_query.lazy import lazy_attributes
+
+__all__ = ['TessClass', 'Tess']
+
+__getattr__ = lazy_attributes(__name__, imports={
+    'TessClass': 'dace_query.tess.tess',
+    'Tess': 'dace_query.tess.tess',
+})
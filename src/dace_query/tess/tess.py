@@ -2,19 +2,24 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Union, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
-from astropy.coordinates import SkyCoord, Angle
-from astropy.table import Table
 from numpy import ndarray
-from pandas import DataFrame
 
-from dace_query import Dace, DaceClass
+import dace_query.dace
+from dace_query.dace import DaceClass
+from dace_query.lazy import lazy_attributes
+from dace_query.mixins import PagesMixin, RegionsMixin
+
+if TYPE_CHECKING:
+    from astropy.coordinates import SkyCoord, Angle
+    from astropy.table import Table
+    from pandas import DataFrame
 
 TESS_DEFAULT_LIMIT = 10000
 
 
-class TessClass:
+class TessClass(PagesMixin, RegionsMixin):
     """
     The tess class.
     Use to retrieve data from the tess module.
@@ -23,6 +28,7 @@ class TessClass:
 
     >>> from dace_query.tess import Tess
     """
+    DEFAULT_LIMIT = TESS_DEFAULT_LIMIT
 
     def __init__(self, dace_instance: Optional[DaceClass] = None):
         """
@@ -37,7 +43,7 @@ class TessClass:
         self.__TESS_API = 'tess-webapp'
 
         if dace_instance is None:
-            self.dace = Dace
+            self.dace = dace_query.dace.Dace
         elif isinstance(dace_instance, DaceClass):
             self.dace = dace_instance
         else:
@@ -57,7 +63,8 @@ class TessClass:
                        limit: Optional[int] = TESS_DEFAULT_LIMIT,
                        filters: Optional[dict] = None,
                        sort: Optional[dict] = None,
-                       output_format: Optional[str] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
+                       output_format: Optional[str] = None,
+                       columns: Optional[list[str]] = None) -> Union[dict[str, ndarray], DataFrame, Table, dict]:
         """
         Query the tess database to retrieve data in the chosen format.
 
@@ -73,6 +80,8 @@ class TessClass:
         :type sort: Optional[dict]
         :param output_format: The desired data in the chosen output format
         :type output_format: Optional[str]
+        :param columns: The parameters to retrieve (default: all of them)
+        :type columns: Optional[list[str]]
         :return: A dict containing lists of values for each visit
         :rtype: dict[str, ndarray] or DataFrame or Table or dict
 
@@ -91,9 +100,10 @@ class TessClass:
                 params={
                     'limit': str(limit),
                     'filters': json.dumps(filters),
-                    'sort': json.dumps(sort)
+                    'sort': json.dumps(sort),
+                    'col': columns
                 }
-            ), output_format=output_format
+            ), output_format=output_format, columns=columns
         )
 
     def query_region(self,
@@ -182,7 +192,8 @@ class TessClass:
         res = self.dace.request_post(
             api_name=self.__TESS_API,
             endpoint=f'flux/{target}',
-            json_data=json.loads(json.dumps(options))
+            json_data=json.loads(json.dumps(options)),
+            use_cache=True
         )
         formatted_res = {}
         for key in res:
@@ -191,5 +202,5 @@ class TessClass:
         return formatted_res
 
 
-Tess: TessClass = TessClass()
-"""Tess instance"""
+# Tess instance, created on first use
+__getattr__ = lazy_attributes(__name__, singletons={'Tess': TessClass})
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket, letting through ``rate`` requests per second on average and bursts of up to ``burst``
+    requests.
+
+    A request short of tokens reserves the next one and sleeps until it is available, so the waiting requests are let
+    through in their arrival order.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Create a full token bucket.
+
+        :param rate: The number of requests per second
+        :type rate: float
+        :param burst: The maximum number of requests let through at once (default: one second of requests)
+        :type burst: Optional[float]
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst or rate)
+        self.__tokens = self.burst
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting for it if needed.
+
+        :return: The time waited, in seconds
+        :rtype: float
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            self.__tokens -= 1
+            wait = -self.__tokens / self.rate if self.__tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class Throttle:
+    """
+    The throttle of an API host.
+    Combines a token bucket limiting the request rate and a semaphore limiting the number of requests in flight, and
+    records the time spent waiting for them.
+
+    >>> from dace_query.throttle import Throttle
+    >>> throttle = Throttle(rate=10, burst=20, max_in_flight=4)
+    >>> with throttle.slot():
+    ...     pass
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 max_in_flight: Optional[int] = None):
+        """
+        Create a throttle, a missing or zero limit meaning no limit.
+
+        :param rate: The maximum number of requests per second
+        :type rate: Optional[float]
+        :param burst: The maximum number of requests let through at once by the rate limit
+        :type burst: Optional[float]
+        :param max_in_flight: The maximum number of concurrent requests
+        :type max_in_flight: Optional[int]
+        """
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.semaphore = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self.__lock = threading.Lock()
+        self.__requests = 0
+        self.__in_flight = 0
+        self.__total_wait = 0.0
+        self.__max_wait = 0.0
+
+    @contextmanager
+    def slot(self) -> Iterator[float]:
+        """
+        Wait for a token and a free slot, and hold the slot while the request runs.
+
+        :return: The time waited, in seconds
+        :rtype: Iterator[float]
+        """
+        start = time.perf_counter()
+        if self.semaphore is not None:
+            self.semaphore.acquire()
+        try:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            wait = time.perf_counter() - start
+            with self.__lock:
+                self.__requests += 1
+                self.__in_flight += 1
+                self.__total_wait += wait
+                self.__max_wait = max(self.__max_wait, wait)
+            try:
+                yield wait
+            finally:
+                with self.__lock:
+                    self.__in_flight -= 1
+        finally:
+            if self.semaphore is not None:
+                self.semaphore.release()
+
+    def get_metrics(self) -> dict[str, float]:
+        """
+        Get the number of requests, the requests in flight and the time they waited.
+
+        :return: The requests, in_flight, total_wait, mean_wait and max_wait metrics (times in seconds)
+        :rtype: dict[str, float]
+        """
+        with self.__lock:
+            return {
+                'requests': self.__requests,
+                'in_flight': self.__in_flight,
+                'total_wait': self.__total_wait,
+                'mean_wait': self.__total_wait / self.__requests if self.__requests else 0.0,
+                'max_wait': self.__max_wait
+            }
@@ -0,0 +1,194 @@
+import gzip
+import io
+import json
+import os
+import re
+import tarfile
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dace_query import DaceClass
+
+# Row counts of the synthetic payloads, e.g. DACE_BENCHMARK_ROWS=1000,100000,1000000
+BENCHMARK_ROWS = [int(rows) for rows in os.environ.get('DACE_BENCHMARK_ROWS', '1000,100000').split(',')]
+
+BENCHMARK_APIS = ['evo-webapp', 'exo-webapp', 'lossy-webapp', 'obs-webapp', 'opa-webapp', 'open-webapp',
+                  'tess-webapp', 'cheops-webapp', 'monitoring-webapp', 'astrom-webapp']
+
+INSTRUMENTS = [('HARPS', '3.5', 'HARPS'), ('HARPS', '3.0.0', 'HARPS'), ('CORALIE', '3.4', 'CORALIE14'),
+               ('ESPRESSO', '3.0.0', 'SINGLEHR11'), ('HARPN', '2.3.5', 'HARPN')]
+
+FILE_SIZE = 32 * 1048576
+
+
+def run_lengths(rows, rng):
+    """Split the rows into runs of consecutive identical values, as DACE occurrences"""
+    lengths = rng.integers(1, 50, size=rows // 25 + 1)
+    lengths = lengths[np.cumsum(lengths) <= rows]
+    return np.append(lengths, rows - lengths.sum()).tolist()
+
+
+@lru_cache(maxsize=8)
+def make_parameters(rows, seed=0):
+    """DACE-shaped parameters of a spectroscopy time series : doubles with NaNs and errors, strings and ints
+    with occurrences, booleans and a ragged column"""
+    rng = np.random.default_rng(seed)
+
+    def doubles(nan_fraction=0.01):
+        values = rng.normal(size=rows).round(6).astype(object)
+        values[rng.random(rows) < nan_fraction] = 'NaN'
+        return values.tolist()
+
+    occurrences = run_lengths(rows, rng)
+    instruments = rng.integers(0, len(INSTRUMENTS), size=len(occurrences))
+    parameters = [
+        {'variableName': 'rjd', 'doubleValues': (50000 + np.sort(rng.random(rows)) * 10000).round(6).tolist()},
+        {'variableName': 'rv', 'doubleValues': doubles(), 'minErrorValues': doubles()},
+        {'variableName': 'fwhm', 'doubleValues': doubles(), 'minErrorValues': doubles()},
+        {'variableName': 'contrast', 'doubleValues': doubles(), 'minErrorValues': doubles()},
+        {'variableName': 'berv', 'doubleValues': doubles(0)},
+        {'variableName': 'ins_name', 'stringValues': [INSTRUMENTS[index][0] for index in instruments],
+         'occurrences': occurrences},
+        {'variableName': 'drs_version', 'stringValues': [INSTRUMENTS[index][1] for index in instruments],
+         'occurrences': occurrences},
+        {'variableName': 'ins_mode', 'stringValues': [INSTRUMENTS[index][2] for index in instruments],
+         'occurrences': occurrences},
+        {'variableName': 'texp', 'intValues': rng.integers(60, 3600, size=len(occurrences)).tolist(),
+         'occurrences': occurrences},
+        {'variableName': 'public', 'boolValues': (rng.random(rows) < 0.8).tolist()},
+        {'variableName': 'spectral_domains', 'stringValues': [['blue', 'red'] if index % 3 else ['blue']
+                                                              for index in range(rows)]},
+    ]
+    return {'parameters': parameters}
+
+
+@lru_cache(maxsize=8)
+def make_parameters_payload(rows):
+    """The parameters serialized in json"""
+    return json.dumps(make_parameters(rows)).encode('utf-8')
+
+
+@lru_cache(maxsize=8)
+def make_compressed_payload(rows):
+    """The json parameters compressed with gzip"""
+    return gzip.compress(make_parameters_payload(rows), compresslevel=6)
+
+
+@lru_cache(maxsize=4)
+def make_tarball(files, file_size, seed=0):
+    """A tar.gz archive of files filled with random (incompressible) bytes"""
+    rng = np.random.default_rng(seed)
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz', compresslevel=1) as archive:
+        for index in range(files):
+            info = tarfile.TarInfo(f'harps/reduced/HARPS.{index:05d}_S1D_A.fits')
+            info.size = file_size
+            archive.addfile(info, io.BytesIO(rng.bytes(file_size)))
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=1)
+def make_file():
+    return np.random.default_rng(0).bytes(FILE_SIZE)
+
+
+class MockDaceHandler(BaseHTTPRequestHandler):
+    """A local stand-in of the DACE webapps. Queries are answered with the synthetic parameters of a number of rows
+    read from a 'rows-<n>' path segment (default 1000), 'download/file' serves a large file (with range requests) and
+    'download/tarball-<files>' a tar.gz archive. The parameters are encoded in columns or compressed with gzip when
+    the client accepts it"""
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, Nagle's algorithm would delay the small bodies
+    disable_nagle_algorithm = True
+    columns_codec = None
+
+    def do_GET(self):
+        tarball = re.search(r'download/tarball-(\d+)', self.path)
+        if tarball is not None:
+            return self.send_body(make_tarball(int(tarball.group(1)), 1048576), 'application/gzip')
+        if 'download/file' in self.path:
+            return self.send_body(make_file(), 'application/octet-stream', ranges=True)
+        rows = re.search(r'rows-(\d+)', self.path)
+        rows = 1000 if rows is None else int(rows.group(1))
+        media_type, encode, _ = self.columns_codec
+        if media_type in self.headers.get('Accept', ''):
+            return self.send_body(self.encode_parameters(rows, encode), media_type)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            return self.send_body(make_compressed_payload(rows), 'application/json', content_encoding='gzip')
+        self.send_body(make_parameters_payload(rows), 'application/json')
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def encode_parameters(rows, encode):
+        return encode(make_parameters(rows))
+
+    def send_body(self, body, content_type, ranges=False, content_encoding=None):
+        status = 200
+        range_header = self.headers.get('Range')
+        if ranges and range_header is not None:
+            start, end = (int(bound) for bound in range_header[len('bytes='):].split('-'))
+            content_range = f'bytes {start}-{end}/{len(body)}'
+            body, status = body[start:end + 1], 206
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if content_encoding is not None:
+            self.send_header('Content-Encoding', content_encoding)
+        self.send_header('Content-Disposition', 'attachment; filename="file.bin"')
+        if ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', '"benchmark"')
+        if status == 206:
+            self.send_header('Content-Range', content_range)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(params=BENCHMARK_ROWS, ids=lambda rows: f'{rows}rows')
+def rows(request):
+    """The row count of the synthetic payloads"""
+    return request.param
+
+
+@pytest.fixture()
+def serialized_payload(rows):
+    """The synthetic parameters, as served by the mock server"""
+    return make_parameters_payload(rows)
+
+
+@pytest.fixture()
+def json_payload(serialized_payload):
+    """The synthetic parameters, once decoded"""
+    return json.loads(serialized_payload)
+
+
+@pytest.fixture(scope='session')
+def mock_dace_server(columns_codec):
+    """Local http server standing in for the DACE webapps"""
+    MockDaceHandler.columns_codec = columns_codec
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockDaceHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def mock_dace_instance(tmp_path, mock_dace_server):
+    """Dace instance whose endpoints point to the mock server"""
+    fp_config = Path(tmp_path, 'config.ini')
+    fp_config.write_text('[api]\n' + ''.join(f'{api_name} = {mock_dace_server}\n' for api_name in BENCHMARK_APIS))
+    dace_instance = DaceClass(config_path=fp_config, dace_rc_config_path=Path(tmp_path, 'missing.dacerc'))
+    dace_instance.log.setLevel('WARNING')
+    yield dace_instance
+    dace_instance.close()
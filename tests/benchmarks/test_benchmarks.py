@@ -0,0 +1,115 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from dace_query import DaceClass
+from dace_query.decoders import JSON_DECODERS, JsonDecoder
+from dace_query.instrumentation import TimingAggregator
+from dace_query.spectroscopy import SpectroscopyClass
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.mark.parametrize('backend', JSON_DECODERS)
+def test_benchmark_json_decode(benchmark, serialized_payload, backend):
+    pytest.importorskip(backend)
+    decoded = benchmark(JsonDecoder(backend).decode, serialized_payload)
+    assert decoded == json.loads(serialized_payload)
+
+
+@pytest.mark.parametrize('columns', [None, ('rjd', 'rv', 'ins_name')], ids=['all', 'projection'])
+def test_benchmark_parse_parameters(benchmark, mock_dace_instance, json_payload, rows, columns):
+    data = benchmark(mock_dace_instance.parse_parameters, json_payload, columns)
+    assert len(data['rv']) == rows
+
+
+@pytest.mark.parametrize('output_format', ['numpy', 'pandas', 'astropy', 'dict'])
+def test_benchmark_convert_to_format(benchmark, mock_dace_instance, json_payload, output_format):
+    data = mock_dace_instance.parse_parameters(json_payload)
+    benchmark(DaceClass.convert_to_format, data, output_format)
+
+
+def test_benchmark_order_by_instruments(benchmark, mock_dace_instance, json_payload):
+    data = mock_dace_instance.parse_parameters(json_payload)
+    # The grouping pops the instrument columns, each round gets its own copy of the columns
+    grouped = benchmark.pedantic(mock_dace_instance.order_spectroscopy_data_by_instruments,
+                                 setup=lambda: ((dict(data),), {}), rounds=20)
+    assert 'HARPS' in grouped
+
+
+def test_benchmark_get_timeseries(benchmark, mock_dace_instance, rows):
+    spectroscopy = SpectroscopyClass(dace_instance=mock_dace_instance)
+    data = benchmark(spectroscopy.get_timeseries, f'rows-{rows}', sorted_by_instrument=False)
+    assert len(data['rv']) == rows
+
+
+@pytest.mark.parametrize('encoding', ['json', 'columns'])
+def test_benchmark_get_timeseries_encoding(benchmark, mock_dace_instance, columns_codec, rows, encoding):
+    if encoding == 'columns':
+        media_type, _, decode = columns_codec
+        mock_dace_instance.register_decoder(media_type, decode)
+    spectroscopy = SpectroscopyClass(dace_instance=mock_dace_instance)
+    data = benchmark(spectroscopy.get_timeseries, f'rows-{rows}', sorted_by_instrument=False)
+    assert len(data['rv']) == rows
+
+
+@pytest.mark.parametrize('accept_encoding', ['identity', 'gzip, deflate'])
+def test_benchmark_get_timeseries_compression(benchmark, mock_dace_instance, rows, accept_encoding):
+    # The bytes received on the wire and once decompressed are reported in the extra info of the benchmark
+    aggregator = TimingAggregator(group_by=lambda span: span.api_name)
+    mock_dace_instance.add_observer(aggregator)
+    mock_dace_instance.accept_encoding = accept_encoding
+    spectroscopy = SpectroscopyClass(dace_instance=mock_dace_instance)
+    data = benchmark(spectroscopy.get_timeseries, f'rows-{rows}', sorted_by_instrument=False)
+    assert len(data['rv']) == rows
+    statistics = aggregator.get_summary()['obs-webapp']['request']
+    benchmark.extra_info.update(bytes_in=statistics['bytes_in'] // statistics['count'],
+                                bytes_wire=statistics['bytes_wire'] // statistics['count'])
+
+
+@pytest.mark.parametrize('connections', [0, 4])
+def test_benchmark_download_file(benchmark, mock_dace_instance, tmp_path, connections):
+    mock_dace_instance.download_connections = connections
+    mock_dace_instance.download_chunk_size = 4 * 1048576
+
+    def download():
+        output_path = mock_dace_instance.download_file('obs-webapp', 'download/file', output_directory=tmp_path)
+        output_path.unlink()
+
+    benchmark.pedantic(download, rounds=5)
+
+
+def test_benchmark_extract_tarball(benchmark, mock_dace_instance, tmp_path):
+    output_directory = Path(tmp_path, 'output')
+    members = benchmark.pedantic(mock_dace_instance.extract_file, args=('obs-webapp', 'download/tarball-16'),
+                                 kwargs={'output_directory': output_directory, 'member_filter': '*_S1D_A.fits'},
+                                 rounds=5)
+    assert len(members) == 16
+
+
+@pytest.mark.parametrize('max_workers', [1, 8])
+def test_benchmark_concurrent_timeseries(benchmark, mock_dace_instance, max_workers):
+    spectroscopy = SpectroscopyClass(dace_instance=mock_dace_instance)
+    targets = [f'target-{index}-rows-1000' for index in range(32)]
+
+    def get_all_timeseries():
+        return list(spectroscopy.get_timeseries_many(targets, max_workers=max_workers))
+
+    results = benchmark.pedantic(get_all_timeseries, rounds=3)
+    assert all(error is None for _, _, error in results)
+
+
+@pytest.mark.parametrize('statement', [
+    'import dace_query.spectroscopy',
+    'from dace_query.spectroscopy import Spectroscopy',
+    'from dace_query.spectroscopy import Spectroscopy; Spectroscopy.dace.convert_to_format({}, "pandas")',
+], ids=['import', 'instance', 'pandas'])
+def test_benchmark_startup(benchmark, statement):
+    # The import time of a fresh interpreter, the lazy imports and instances being resolved by the statement only
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    benchmark.pedantic(subprocess.run, args=([sys.executable, '-c', statement],),
+                       kwargs={'check': True, 'env': env, 'capture_output': True}, rounds=5)
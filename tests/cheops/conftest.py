@@ -0,0 +1,42 @@
+import json
+import urllib.parse
+
+import numpy as np
+import pytest
+
+from dace_query.filters import apply_query
+
+# The visits served by the local server, in no particular order : their index and start (the last two missing it)
+VISITS = {'row': np.arange(22),
+          'date_mjd_start': np.append(np.random.default_rng(0).permutation(59000 + np.arange(20) / 2), [np.nan] * 2)}
+
+
+def send_visits(handler):
+    """The searches of the visits get the VISITS matching their filters, sorted and limited, as DACE would"""
+    url = urllib.parse.urlparse(handler.path)
+    if url.path != '/search':
+        return False
+    query = urllib.parse.parse_qs(url.query)
+    visits = apply_query(VISITS, filters=json.loads(query['filters'][0]), sort=json.loads(query['sort'][0]),
+                         limit=int(query['limit'][0]))
+    payload = {
+        'parameters': [
+            {'variableName': 'row', 'intValues': visits['row'].tolist()},
+            {'variableName': 'date_mjd_start',
+             'doubleValues': ['NaN' if np.isnan(value) else value for value in visits['date_mjd_start'].tolist()]},
+        ]
+    }
+    handler.send_body(json.dumps(payload).encode('utf-8'))
+    return True
+
+
+@pytest.fixture()
+def visits():
+    """The visits served by the local server"""
+    return VISITS
+
+
+@pytest.fixture()
+def local_routes():
+    """The searches of the visits"""
+    return [send_visits]
@@ -1,5 +1,7 @@
+import urllib.parse
 from pathlib import Path
 
+import numpy as np
 import pytest
 from astropy.coordinates import SkyCoord, Angle
 
@@ -230,3 +232,29 @@ def test_cheops_download_specific_files(instance, files, request):
     )
     assert Path(output_directory, output_filename).exists()
     Path(output_directory, output_filename).unlink(missing_ok=True)
+
+
+
+@pytest.mark.parametrize('in_memory', ['fits', 'members', 'unknown'])
+def test_cheops_download_diagnostic_movie_in_memory(local_dace_instance, local_calls, in_memory):
+    instance = CheopsClass(dace_instance=local_dace_instance)
+    # A movie is neither a FITS file nor an archive
+    with pytest.raises(ValueError):
+        instance.download_diagnostic_movie(file_key='CH_PR100018_TG027204_V0200', in_memory=in_memory)
+    assert local_calls == []
+
+def test_cheops_iter_query_page_key(local_dace_instance, local_calls, visits):
+    instance = CheopsClass(dace_instance=local_dace_instance)
+
+    pages = list(instance.iter_query(page_size=5))
+    # The pages follow the cheops visits start, each one asking for the starts from the last one seen, whose row is
+    # not repeated
+    starts = [page['date_mjd_start'] for page in pages]
+    assert [len(page) for page in starts] == [5, 4, 4, 4, 3, 2]
+    assert all(previous.max() < page.min() for previous, page in zip(starts[:-2], starts[1:-1]))
+    # The rows missing it are yielded last
+    assert np.isnan(starts[-1]).all()
+    # No row is repeated or dropped
+    rows = np.concatenate([page['row'] for page in pages]).tolist()
+    assert sorted(rows) == visits['row'].tolist()
+    assert all('date_mjd_start' in urllib.parse.unquote_plus(call) for call in local_calls)
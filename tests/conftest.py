@@ -1,5 +1,12 @@
+import gzip
+import io
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from dace_query import DaceClass
@@ -20,3 +27,132 @@ def anon_dace_instance():
     fp_config = Path(Path(__file__).parent, 'config.ini')
     dace_instance = DaceClass(config_path=fp_config)
     return dace_instance
+
+
+PARAMETERS_PAYLOAD = {
+    'parameters': [
+        {'variableName': 'rv', 'doubleValues': [1.5, 'NaN', 3.0], 'minErrorValues': [0.1, 0.2, 'NaN']},
+        {'variableName': 'ins_name', 'stringValues': ['HARPS', 'CORALIE'], 'occurrences': [2, 1]},
+        {'variableName': 'texp', 'intValues': [900], 'occurrences': [3]},
+        {'variableName': 'public', 'boolValues': [True, False, True]},
+        {'variableName': 'spectral_domains', 'stringValues': [['a', 'b'], ['c'], []]},
+    ]
+}
+
+
+LOCAL_APIS = ['evo-webapp', 'exo-webapp', 'lossy-webapp', 'obs-webapp', 'opa-webapp', 'open-webapp', 'tess-webapp',
+              'cheops-webapp', 'monitoring-webapp', 'astrom-webapp']
+
+
+# A binary columnar encoding of the parameters standing in for the native encoding of DACE, whose schema is not public
+COLUMNS_MEDIA_TYPE = 'application/x-dace-columns'
+
+
+def encode_columns(payload):
+    """Encode each field of each parameter as an array of a npz archive"""
+    arrays = {}
+    for index, parameter in enumerate(payload['parameters']):
+        for key, values in parameter.items():
+            if key in ('doubleValues', 'minErrorValues'):
+                values = np.asarray(values, dtype=np.float64)
+            arrays[f'{index}/{key}'] = DaceClass.to_column(values) if isinstance(values, list) else np.asarray(values)
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def decode_columns(content):
+    """Decode the parameters, their values being numpy arrays"""
+    parameters = defaultdict(dict)
+    with np.load(io.BytesIO(content), allow_pickle=True) as arrays:
+        for name in arrays.files:
+            index, key = name.split('/')
+            parameters[int(index)][key] = arrays[name].item() if key == 'variableName' else arrays[name]
+    return {'parameters': [parameters[index] for index in sorted(parameters)]}
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    """Answers every request with a small DACE-like json payload (or a broken one for 'broken' paths), compressed
+    with gzip when the client accepts it, and records the paths requested. The routes of the tests are tried first,
+    each one answering the requests it recognizes (see the local_routes fixture)"""
+    calls = []
+    routes = []
+
+    def do_GET(self):
+        self.calls.append(self.path)
+        if any(route(self) for route in self.routes):
+            return
+        self.send_body(b'{broken' if 'broken' in self.path else json.dumps(PARAMETERS_PAYLOAD).encode('utf-8'))
+
+    def do_POST(self):
+        self.calls.append(self.path)
+        if not any(route(self) for route in self.routes):
+            self.send_error(404)
+
+    def send_body(self, body, content_type='application/json'):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def parameters_payload():
+    """The payload served by the local server"""
+    return PARAMETERS_PAYLOAD
+
+
+@pytest.fixture()
+def local_routes():
+    """The routes of the local server, functions answering the requests they recognize and returning whether they
+    did, overridden by the conftest of the tests needing them"""
+    return []
+
+
+@pytest.fixture()
+def local_calls():
+    """Paths requested to the local server since the beginning of the test"""
+    return LocalHandler.calls
+
+
+@pytest.fixture(scope='session')
+def local_http_server():
+    """Local http server standing in for the DACE webapps"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), LocalHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def local_server(local_http_server, local_routes):
+    """Url of the local server, serving the routes of the test"""
+    LocalHandler.calls.clear()
+    LocalHandler.routes = local_routes
+    yield local_http_server
+    LocalHandler.routes = []
+
+
+@pytest.fixture()
+def local_dace_instance(tmp_path, local_server):
+    """Dace instance whose endpoints point to the local server"""
+    fp_config = Path(tmp_path, 'config.ini')
+    fp_config.write_text('[api]\n' + ''.join(f'{api_name} = {local_server}\n' for api_name in LOCAL_APIS))
+    dace_instance = DaceClass(config_path=fp_config, dace_rc_config_path=Path(tmp_path, 'missing.dacerc'))
+    yield dace_instance
+    dace_instance.close()
+
+
+@pytest.fixture(scope='session')
+def columns_codec():
+    """The media type, the encoder and the decoder of the columnar encoding of the local servers"""
+    return COLUMNS_MEDIA_TYPE, encode_columns, decode_columns
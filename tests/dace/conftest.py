@@ -0,0 +1,109 @@
+import io
+import json
+import tarfile
+
+import pytest
+
+DOWNLOAD_CONTENT = bytes(range(256)) * 4096
+
+
+class DownloadRoutes:
+    """Serves files under 'download/', with range requests unless the path contains 'noranges'. Posting files to
+    'download/prepare/' builds a tar.gz archive of them (each member holding its own name) and returns its download
+    id"""
+
+    def __init__(self):
+        self.ranges = []
+        self.failing_range_starts = set()
+        self.archives = {}
+
+    def send_file(self, handler):
+        if handler.command != 'GET' or not handler.path.startswith('/download/'):
+            return False
+        content = self.archives.get(handler.path.rsplit('/', 1)[-1], DOWNLOAD_CONTENT)
+        accept_ranges = 'noranges' not in handler.path
+        range_header = handler.headers.get('Range')
+        if accept_ranges and range_header is not None:
+            start, end = (int(bound) for bound in range_header[len('bytes='):].split('-'))
+            self.ranges.append((start, end))
+            if start in self.failing_range_starts:
+                handler.send_error(500)
+                return True
+            body = content[start:end + 1]
+            handler.send_response(206)
+            handler.send_header('Content-Range', f'bytes {start}-{end}/{len(content)}')
+        else:
+            body = content
+            handler.send_response(200)
+        handler.send_header('Content-Disposition', 'attachment; filename="file.tar.gz"')
+        handler.send_header('Content-Length', str(len(body)))
+        if accept_ranges:
+            handler.send_header('Accept-Ranges', 'bytes')
+            handler.send_header('ETag', '"v1"')
+        handler.end_headers()
+        handler.wfile.write(body)
+        return True
+
+    def prepare_archive(self, handler):
+        if handler.command != 'POST' or not handler.path.startswith('/download/prepare/'):
+            return False
+        files = json.loads(handler.rfile.read(int(handler.headers['Content-Length'])))['files']
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+            for file in files:
+                info = tarfile.TarInfo(file)
+                info.size = len(file)
+                archive.addfile(info, io.BytesIO(file.encode('utf-8')))
+        download_id = str(len(self.archives))
+        self.archives[download_id] = buffer.getvalue()
+        handler.send_body(json.dumps({'values': [download_id]}).encode('utf-8'))
+        return True
+
+
+def fail_transiently(handler):
+    """Paths containing 'flaky' fail twice with a 503 before succeeding"""
+    if 'flaky' not in handler.path or handler.calls.count(handler.path) > 2:
+        return False
+    handler.send_response(503)
+    handler.send_header('Retry-After', '0')
+    handler.send_header('Content-Length', '0')
+    handler.end_headers()
+    return True
+
+
+@pytest.fixture()
+def download_routes():
+    """The downloads of the local server"""
+    return DownloadRoutes()
+
+
+@pytest.fixture()
+def local_routes(download_routes, columns_codec, parameters_payload):
+    """The transient failures, the downloads and the parameters encoded in columns when the client accepts it"""
+    media_type, encode, _ = columns_codec
+
+    def send_columns(handler):
+        if media_type not in handler.headers.get('Accept', '') or 'broken' in handler.path:
+            return False
+        handler.send_body(encode(parameters_payload), media_type)
+        return True
+
+    return [fail_transiently, download_routes.send_file, download_routes.prepare_archive, send_columns]
+
+
+@pytest.fixture()
+def download_content():
+    """The file served by the local server"""
+    return DOWNLOAD_CONTENT
+
+
+@pytest.fixture()
+def local_ranges(download_routes):
+    """Byte ranges requested to the local server since the beginning of the test"""
+    return download_routes.ranges
+
+
+@pytest.fixture()
+def failing_range_starts(download_routes):
+    """Starts of the byte ranges the local server fails to serve"""
+    return download_routes.failing_range_starts
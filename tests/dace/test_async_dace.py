@@ -0,0 +1,56 @@
+import asyncio
+import inspect
+
+import pytest
+
+from dace_query.async_dace import AsyncDaceClass
+
+
+def test_async_dace_get_timeseries(local_dace_instance, local_calls):
+    targets = [f'TARGET-{index}' for index in range(20)]
+
+    async def get_all_timeseries():
+        async with AsyncDaceClass(dace_instance=local_dace_instance, max_concurrency=4) as async_dace:
+            return await asyncio.gather(*(
+                async_dace.spectroscopy.get_timeseries(target, sorted_by_instrument=False, output_format='dict')
+                for target in targets))
+
+    results = asyncio.run(get_all_timeseries())
+
+    assert len(results) == len(targets)
+    assert all(result['ins_name'] == ['HARPS', 'HARPS', 'CORALIE'] for result in results)
+    assert sorted(local_calls) == sorted(f'/observation/radialVelocities/{target}' for target in targets)
+
+
+def test_async_dace_iterating_method(local_dace_instance, local_calls):
+    targets = [f'TARGET-{index}' for index in range(6)]
+
+    async def get_many_timeseries():
+        async with AsyncDaceClass(dace_instance=local_dace_instance, max_concurrency=2) as async_dace:
+            iterator = async_dace.spectroscopy.get_timeseries_many(targets, sorted_by_instrument=False)
+            # An asynchronous iterator, never a blocking generator handed to the event loop
+            assert inspect.isasyncgen(iterator)
+            return [target async for target, data, error in iterator if error is None]
+
+    assert sorted(asyncio.run(get_many_timeseries())) == sorted(targets)
+    assert len(local_calls) == len(targets)
+
+
+
+def test_async_dace_successive_event_loops(local_dace_instance, local_calls):
+    async_dace = AsyncDaceClass(dace_instance=local_dace_instance, max_concurrency=2)
+
+    async def get_all_timeseries(targets):
+        return await asyncio.gather(*(async_dace.spectroscopy.get_timeseries(target, sorted_by_instrument=False)
+                                      for target in targets))
+
+    # The client is not tied to the event loop of its first use
+    assert len(asyncio.run(get_all_timeseries(['TARGET-0', 'TARGET-1', 'TARGET-2']))) == 3
+    assert len(asyncio.run(get_all_timeseries(['TARGET-3', 'TARGET-4', 'TARGET-5']))) == 3
+    asyncio.run(async_dace.close())
+    assert len(local_calls) == 6
+
+def test_async_dace_unknown_module(local_dace_instance):
+    async_dace = AsyncDaceClass(dace_instance=local_dace_instance)
+    with pytest.raises(AttributeError):
+        async_dace.unknown_module
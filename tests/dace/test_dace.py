@@ -0,0 +1,741 @@
+import json
+import os
+import subprocess
+import sys
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pytest
+from requests import RequestException
+
+import dace_query.spectroscopy
+from dace_query import DaceClass
+from dace_query.decoders import JsonDecoder
+from dace_query.filters import QueryResults, apply_query, evaluate_filters, subsumes
+from dace_query.instrumentation import Observer, TimingAggregator
+from dace_query.store import ParquetStore, TimeseriesStore, merge_newer
+
+
+def test_dace_session_reused_per_api(local_dace_instance):
+    session = local_dace_instance.get_session('obs-webapp')
+    assert local_dace_instance.get_session('obs-webapp') is session
+    assert local_dace_instance.get_session('cheops-webapp') is not session
+
+
+def test_dace_session_pool_size(tmp_path):
+    fp_config = Path(tmp_path, 'config.ini')
+    fp_config.write_text('[api]\nobs-webapp = http://127.0.0.1:9/\n\n[http]\npool_size = 3\n')
+    dace_instance = DaceClass(config_path=fp_config)
+    adapter = dace_instance.get_session('obs-webapp').get_adapter('http://127.0.0.1:9/')
+    assert dace_instance.pool_size == 3
+    assert adapter._pool_maxsize == 3
+    assert DaceClass(config_path=fp_config, pool_size=7).pool_size == 7
+
+
+def test_dace_close_releases_sessions(local_dace_instance):
+    session = local_dace_instance.get_session('obs-webapp')
+    local_dace_instance.close()
+    assert local_dace_instance.get_session('obs-webapp') is not session
+
+
+def test_dace_parse_parameters_typed_columns(local_dace_instance, parameters_payload):
+    data = local_dace_instance.parse_parameters(parameters_payload)
+
+    assert data['rv'].dtype == np.float64
+    assert np.isnan(data['rv'][1])
+    assert np.isnan(data['rv_err'][2])
+    assert data['ins_name'].tolist() == ['HARPS', 'HARPS', 'CORALIE']
+    assert data['texp'].tolist() == [900, 900, 900]
+    assert data['public'].dtype == np.bool_
+    assert data['spectral_domains'].dtype == object
+    assert data['spectral_domains'][0] == ['a', 'b']
+
+
+
+def test_dace_parse_parameters_missing_values(local_dace_instance):
+    data = local_dace_instance.parse_parameters({'parameters': [
+        {'variableName': 'public', 'boolValues': [True, None, False]},
+        {'variableName': 'texp', 'intValues': [1, None, 3]},
+    ]})
+    # The missing values are kept, in object columns
+    assert data['public'].dtype == object and data['public'].tolist() == [True, None, False]
+    assert data['texp'].dtype == object and data['texp'].tolist() == [1, None, 3]
+
+def test_dace_parse_parameters_columns(local_dace_instance, parameters_payload):
+    data = local_dace_instance.parse_parameters(parameters_payload, columns=['rv', 'ins_name'])
+    assert list(data) == ['rv', 'rv_err', 'ins_name']
+    assert data['ins_name'].tolist() == ['HARPS', 'HARPS', 'CORALIE']
+
+    # The errors of a parameter can be retrieved without its values
+    data = local_dace_instance.parse_parameters(parameters_payload, columns=['rv_err', 'texp'])
+    assert list(data) == ['rv_err', 'texp']
+
+
+def test_dace_parse_parameters_without_parameters(local_dace_instance):
+    data = local_dace_instance.parse_parameters({})
+    assert not data
+    assert len(data['pub_bibcode']) == 0
+
+
+@pytest.mark.parametrize('output_format', [None, 'numpy', 'dict', 'pandas', 'astropy_table'])
+def test_dace_transform_to_format(local_dace_instance, parameters_payload, output_format):
+    result = local_dace_instance.transform_to_format(parameters_payload, output_format=output_format)
+
+    assert len(result['rv']) == 3
+    assert list(result['ins_name']) == ['HARPS', 'HARPS', 'CORALIE']
+    if output_format == 'dict':
+        assert result['texp'] == [900, 900, 900]
+
+
+@pytest.mark.parametrize('output_format', ['numpy', 'pandas', 'astropy_table'])
+def test_dace_convert_to_format_without_copy(output_format):
+    data = {'rv': np.arange(5, dtype=np.float64), 'texp': np.full(5, 900)}
+    result = DaceClass.convert_to_format(data, output_format=output_format)
+
+    assert np.shares_memory(np.asarray(result['rv']), data['rv'])
+    assert np.shares_memory(np.asarray(result['texp']), data['texp'])
+
+
+def test_dace_order_spectroscopy_data_by_instruments():
+    data = {
+        'ins_name': np.array(['HARPS', 'CORALIE', 'HARPS', 'HARPS']),
+        'ins_mode': np.array(['HAM', '', 'HAM', 'EGGS']),
+        'drs_version': np.array(['3.5', '2.0', '3.5', '3.5']),
+        'pub_bibcode': np.array(['', '', '2020A&A', '']),
+        'rv': np.array([1.0, 2.0, 3.0, 4.0]),
+    }
+    result = DaceClass.order_spectroscopy_data_by_instruments(data)
+
+    assert list(result) == ['HARPS', 'CORALIE']
+    assert list(result['HARPS']) == ['3.5', '2020A&A']
+    assert result['HARPS']['3.5']['HAM']['rv'].tolist() == [1.0]
+    assert result['HARPS']['3.5']['EGGS']['rv'].tolist() == [4.0]
+    assert result['HARPS']['2020A&A']['HAM']['rv'].tolist() == [3.0]
+    assert result['CORALIE']['2.0']['']['rv'].tolist() == [2.0]
+    assert 'ins_name' not in result['HARPS']['3.5']['HAM']
+
+
+def test_dace_order_spectroscopy_data_by_instruments_missing_keys():
+    # DACE returns None for a missing mode or drs version
+    data = {
+        'ins_name': np.array(['HARPS', 'HARPS', 'HARPS', 'CORALIE'], dtype=object),
+        'ins_mode': np.array(['HAM', None, None, 'HAM'], dtype=object),
+        'drs_version': np.array(['3.5', None, '3.5', None], dtype=object),
+        'rv': np.array([1.0, 2.0, 3.0, 4.0]),
+    }
+    result = DaceClass.order_spectroscopy_data_by_instruments(data)
+
+    assert result['HARPS']['3.5']['HAM']['rv'].tolist() == [1.0]
+    assert result['HARPS']['default'][None]['rv'].tolist() == [2.0]
+    assert result['HARPS']['3.5'][None]['rv'].tolist() == [3.0]
+    assert result['CORALIE']['default']['HAM']['rv'].tolist() == [4.0]
+
+
+def test_dace_response_cache(local_dace_instance, local_calls, parameters_payload, tmp_path):
+    local_dace_instance.enable_cache(directory=Path(tmp_path, 'cache'))
+    params = {'limit': '10', 'filters': '{}'}
+
+    first = local_dace_instance.request_get('obs-webapp', 'observation/search/spectroscopy', params=params)
+    second = local_dace_instance.request_get('obs-webapp', 'observation/search/spectroscopy',
+                                             params=dict(reversed(params.items())))
+    assert first == second == parameters_payload
+    assert len(local_calls) == 1
+
+    # Other parameters, bypass and invalidation all call the server again
+    local_dace_instance.request_get('obs-webapp', 'observation/search/spectroscopy', params={'limit': '5'})
+    with local_dace_instance.bypass_cache():
+        local_dace_instance.request_get('obs-webapp', 'observation/search/spectroscopy', params=params)
+    local_dace_instance.request_get('obs-webapp', 'observation/search/spectroscopy', params=params, use_cache=False)
+    assert len(local_calls) == 4
+
+    local_dace_instance.cache.invalidate('obs-webapp')
+    local_dace_instance.request_get('obs-webapp', 'observation/search/spectroscopy', params=params)
+    assert len(local_calls) == 5
+
+
+def test_dace_response_cache_ttl_and_eviction(tmp_path):
+    from dace_query.cache import ResponseCache
+
+    cache = ResponseCache(directory=tmp_path, ttl=3600, api_ttls={'obs-webapp': 60, 'obs-webapp/catalog': 0},
+                          max_size_mb=2 / 1048576)
+    assert cache.get_ttl('obs-webapp', 'catalog/gaia') == 0
+    assert cache.get_ttl('obs-webapp', 'observation/search/spectroscopy') == 60
+    assert cache.get_ttl('exo-webapp', 'exoplanetDatabase') == 3600
+
+    cache.put('obs-webapp', 'a', b'a')
+    cache.put('obs-webapp', 'b', b'b')
+    assert cache.get('obs-webapp', 'a') == b'a'
+    cache.put('obs-webapp', 'c', b'c')
+    # b is the least recently used entry
+    assert cache.get('obs-webapp', 'b') is None
+    assert cache.get('obs-webapp', 'a') == b'a'
+    assert cache.get('obs-webapp', 'c', endpoint='catalog/gaia') is None
+
+
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+def test_dace_iter_pages(local_dace_instance, direction):
+    table = {'obj_date_bjd': np.repeat(np.arange(20, dtype=np.float64), 3), 'row': np.arange(60)}
+
+    def query(limit, filters, sort, output_format):
+        return apply_query(table, filters, sort, limit)
+
+    pages = list(local_dace_instance.iter_pages(query, 'obj_date_bjd', sort={'obj_date_bjd': direction},
+                                                page_size=7))
+
+    assert all(len(page['row']) <= 7 for page in pages)
+    assert sorted(np.concatenate([page['row'] for page in pages]).tolist()) == list(range(60))
+
+    with pytest.raises(ValueError):
+        list(local_dace_instance.iter_pages(query, 'obj_date_bjd', page_size=2))
+
+
+def test_dace_iter_pages_ties_across_pages(local_dace_instance):
+    # The rows sharing a key straddle the page boundaries, and come in a different order at each query
+    table = {'obj_date_bjd': np.repeat(np.arange(10, dtype=np.float64), 3), 'row': np.arange(30)}
+    rng = np.random.default_rng(0)
+
+    def query(limit, filters, sort, output_format):
+        shuffled = rng.permutation(30)
+        return apply_query({column: values[shuffled] for column, values in table.items()}, filters, sort, limit)
+
+    pages = list(local_dace_instance.iter_pages(query, 'obj_date_bjd', page_size=4))
+    assert sorted(np.concatenate([page['row'] for page in pages]).tolist()) == list(range(30))
+
+
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+def test_dace_iter_pages_missing_keys(local_dace_instance, direction):
+    table = {'obj_date_bjd': np.array([np.nan, 1.0, 2.0, np.nan, 3.0, 4.0]), 'row': np.arange(6)}
+
+    def query(limit, filters, sort, output_format):
+        return apply_query(table, filters, sort, limit)
+
+    # The rows missing their key come last
+    pages = list(local_dace_instance.iter_pages(query, 'obj_date_bjd', sort={'obj_date_bjd': direction},
+                                                page_size=3))
+    rows = np.concatenate([page['row'] for page in pages]).tolist()
+    assert sorted(rows[:4]) == [1, 2, 4, 5] and rows[4:] == [0, 3]
+    with pytest.raises(ValueError, match='miss'):
+        list(local_dace_instance.iter_pages(query, 'obj_date_bjd', page_size=2))
+
+
+def test_dace_download_file_ranges(local_dace_instance, local_ranges, download_content, tmp_path):
+    local_dace_instance.download_chunk_size = 100000
+    local_dace_instance.download_file('obs-webapp', 'download/spectroscopy/1', output_directory=tmp_path)
+    assert Path(tmp_path, 'file.tar.gz').read_bytes() == download_content
+    assert len(local_ranges) == 11
+    assert not Path(tmp_path, 'file.tar.gz.part').exists()
+    assert not Path(tmp_path, 'file.tar.gz.part.json').exists()
+
+
+def test_dace_download_file_resume(local_dace_instance, local_ranges, failing_range_starts, download_content,
+                                   tmp_path):
+    local_dace_instance.download_chunk_size = 100000
+    local_dace_instance.download_connections = 1
+    failing_range_starts.add(500000)
+    local_dace_instance.download_file('obs-webapp', 'download/spectroscopy/1', output_directory=tmp_path)
+    assert not Path(tmp_path, 'file.tar.gz').exists()
+    assert Path(tmp_path, 'file.tar.gz.part.json').exists()
+
+    # A prepared download gets a new url on every run, the same file into the same path being resumed
+    failing_range_starts.clear()
+    local_ranges.clear()
+    local_dace_instance.download_file('obs-webapp', 'download/spectroscopy/2', output_directory=tmp_path)
+    assert Path(tmp_path, 'file.tar.gz').read_bytes() == download_content
+    assert min(start for start, _ in local_ranges) == 500000
+    assert len(local_ranges) < 11
+
+
+def test_dace_download_file_without_ranges(local_dace_instance, local_ranges, download_content, tmp_path):
+    local_dace_instance.download_chunk_size = 100000
+    local_dace_instance.download_file('obs-webapp', 'download/noranges/1', output_directory=tmp_path)
+    assert Path(tmp_path, 'file.tar.gz').read_bytes() == download_content
+    assert local_ranges == []
+
+
+def prepare_local_download(dace_instance, files):
+    return dace_instance.request_post('obs-webapp', 'download/prepare/spectroscopy',
+                                      data=json.dumps({'fileType': 's1d', 'files': files}))['values'][0]
+
+
+@pytest.mark.parametrize('merge', [False, True])
+def test_dace_download_batches(local_dace_instance, tmp_path, merge):
+    files = [f'harps/reduced/HARPS.{index}_S1D_A.fits' for index in range(10)]
+    manifest = local_dace_instance.download_batches(
+        'obs-webapp', 'spectroscopy', files, partial(prepare_local_download, local_dace_instance), batch_size=4,
+        output_directory=tmp_path, output_filename='files.tar.gz', merge=merge)
+
+    assert [batch['files'] for batch in manifest['batches']] == [files[0:4], files[4:8], files[8:10]]
+    assert json.loads(Path(tmp_path, 'files_manifest.json').read_text()) == manifest
+    if merge:
+        assert all(Path(tmp_path, file).read_text() == file for file in files)
+        assert [batch['members'] for batch in manifest['batches']] == [files[0:4], files[4:8], files[8:10]]
+    else:
+        assert [batch['archive'] for batch in manifest['batches']] == \
+               ['files_0.tar.gz', 'files_1.tar.gz', 'files_2.tar.gz']
+        assert all(Path(tmp_path, batch['archive']).exists() for batch in manifest['batches'])
+
+
+def test_dace_download_file_extract(local_dace_instance, tmp_path):
+    files = ['harps/reduced/HARPS.1_S1D_A.fits', 'harps/reduced/HARPS.1_S2D_A.fits', '../escaped_S1D_A.fits']
+    download_id = prepare_local_download(local_dace_instance, files)
+    output_directory = Path(tmp_path, 'output')
+    local_dace_instance.download_file('obs-webapp', f'download/spectroscopy/{download_id}',
+                                      output_directory=output_directory, extract=True, member_filter='*_S1D_A.fits')
+
+    assert [str(path.relative_to(output_directory)) for path in output_directory.rglob('*') if path.is_file()] == \
+           ['harps/reduced/HARPS.1_S1D_A.fits']
+    assert not Path(tmp_path, 'escaped_S1D_A.fits').exists()
+
+
+def test_dace_extract_file_not_an_archive(local_dace_instance, tmp_path):
+    assert local_dace_instance.extract_file('obs-webapp', 'download/spectroscopy/1', output_directory=tmp_path) is None
+
+
+def test_dace_download_to_memory(local_dace_instance, download_content, tmp_path):
+    files = ['harps/reduced/HARPS.1_S1D_A.fits', 'harps/reduced/HARPS.1_S2D_A.fits']
+    download_id = prepare_local_download(local_dace_instance, files)
+    endpoint = f'download/spectroscopy/{download_id}'
+
+    assert local_dace_instance.download_to_memory('obs-webapp', 'download/spectroscopy/x') == download_content
+    assert local_dace_instance.download_to_memory('obs-webapp', 'download/spectroscopy/x',
+                                                  in_memory='bytesio').read() == download_content
+    assert list(local_dace_instance.download_to_memory('obs-webapp', endpoint, in_memory='members',
+                                                       member_filter='*_S1D_A.fits')) == \
+           [(files[0], files[0].encode('utf-8'))]
+    assert list(tmp_path.iterdir()) == [Path(tmp_path, 'config.ini')]
+    with pytest.raises(ValueError):
+        local_dace_instance.download_to_memory('obs-webapp', endpoint, in_memory='file')
+
+
+def test_dace_retry_transient_errors(local_dace_instance, local_calls, parameters_payload):
+    attempts = []
+    local_dace_instance.retry.add_listener(attempts.append)
+
+    assert local_dace_instance.request_get('obs-webapp', 'flaky/search') == parameters_payload
+    assert [(attempt.attempt, attempt.status_code, attempt.delay) for attempt in attempts] == \
+           [(1, 503, 0.0), (2, 503, 0.0), (3, 200, None)]
+    assert local_dace_instance.request_post(
+        'obs-webapp', 'download/prepare/flaky', data=json.dumps({'files': []})) == {'values': ['0']}
+    assert local_calls.count('/download/prepare/flaky') == 3
+
+
+def test_dace_retry_not_idempotent_post(local_dace_instance, local_calls):
+    assert local_dace_instance.request_post('obs-webapp', 'flaky/search', data=json.dumps({'files': []})) == {}
+    assert local_calls == ['/flaky/search']
+
+
+def test_dace_retry_exhausted(local_dace_instance, local_calls):
+    local_dace_instance.retry.max_attempts = 2
+    assert local_dace_instance.request_get('obs-webapp', 'flaky/search') == {}
+    assert local_calls == ['/flaky/search', '/flaky/search']
+
+
+def test_dace_throttle_max_in_flight(local_dace_instance):
+    throttle = local_dace_instance.set_throttle('obs-webapp', max_in_flight=2)
+    in_flight = []
+    throttle_slot = throttle.slot
+
+    def recording_slot():
+        in_flight.append(throttle.get_metrics()['in_flight'])
+        return throttle_slot()
+
+    throttle.slot = recording_slot
+    results = list(local_dace_instance.run_concurrently(
+        lambda index: local_dace_instance.request_get('obs-webapp', f'search/{index}'), range(20), max_workers=8))
+
+    assert all(error is None for _, _, error in results)
+    assert max(in_flight) <= 2
+    metrics = local_dace_instance.get_throttle_metrics()['obs-webapp']
+    assert metrics['requests'] == 20 and metrics['in_flight'] == 0
+
+
+def test_dace_throttle_rate(local_dace_instance):
+    local_dace_instance.set_throttle('obs-webapp', rate=50, burst=1)
+    for index in range(6):
+        local_dace_instance.request_get('obs-webapp', f'search/{index}')
+
+    metrics = local_dace_instance.get_throttle_metrics()['obs-webapp']
+    assert metrics['total_wait'] >= 0.08
+    assert metrics['max_wait'] > 0
+
+
+def test_dace_throttle_config(tmp_path, local_server):
+    fp_config = Path(tmp_path, 'config.ini')
+    fp_config.write_text(f'[api]\nobs-webapp = {local_server}\ncheops-webapp = {local_server}\n'
+                         '[throttle]\nrate = 5\nmax_in_flight = 0\n'
+                         '[throttle.obs-webapp]\nrate = 0\nmax_in_flight = 3\n')
+    dace_instance = DaceClass(config_path=fp_config, dace_rc_config_path=Path(tmp_path, 'missing.dacerc'))
+
+    assert dace_instance.get_throttle('obs-webapp').bucket is None
+    assert dace_instance.get_throttle('obs-webapp').semaphore is not None
+    assert dace_instance.get_throttle('cheops-webapp').bucket.rate == 5
+    assert dace_instance.get_throttle('cheops-webapp').semaphore is None
+
+
+def test_dace_observer_spans(local_dace_instance, tmp_path):
+    spans = []
+
+    class SpanRecorder(Observer):
+        def on_span(self, span):
+            spans.append(span)
+
+    observer = SpanRecorder()
+    local_dace_instance.add_observer(observer)
+    local_dace_instance.enable_cache(directory=tmp_path)
+
+    for _ in range(2):
+        local_dace_instance.transform_to_format(local_dace_instance.request_get('obs-webapp', 'search'), 'pandas')
+
+    assert [(span.name, span.endpoint) for span in spans[:4]] == [
+        ('request', 'search'), ('json_decode', 'search'), ('parse_parameters', 'search'),
+        ('convert_to_format', 'search')]
+    assert [span.attributes['cache'] for span in spans if span.name == 'request'] == ['miss', 'hit']
+    assert spans[0].attributes['status_code'] == 200 and spans[0].attributes['bytes_in'] > 0
+    assert spans[3].attributes == {'output_format': 'pandas', 'rows': 3, 'columns': 6}
+
+    local_dace_instance.remove_observer(observer)
+    local_dace_instance.request_get('obs-webapp', 'search')
+    assert len(spans) == 8
+
+
+
+def test_dace_observer_interface():
+    # An observer must implement on_span
+    with pytest.raises(TypeError):
+        Observer()
+
+def test_dace_timing_aggregator(local_dace_instance):
+    aggregator = TimingAggregator()
+    local_dace_instance.add_observer(aggregator)
+    for index in range(3):
+        local_dace_instance.transform_to_format(local_dace_instance.request_get('obs-webapp', 'search'))
+    with pytest.raises(RequestException):
+        local_dace_instance.request_get('exo-webapp', 'broken')
+
+    summary = aggregator.get_summary()
+    assert set(summary) == {'obs-webapp/search', 'exo-webapp/broken'}
+    assert set(summary['obs-webapp/search']) == {'request', 'json_decode', 'parse_parameters', 'convert_to_format'}
+    statistics = summary['obs-webapp/search']['parse_parameters']
+    assert statistics['count'] == 3 and statistics['rows'] == 9
+    assert statistics['p50'] <= statistics['p90'] <= statistics['p99']
+    assert 'obs-webapp/search' in aggregator.report()
+
+
+@pytest.mark.parametrize('backend', ['auto', 'orjson', 'json'])
+def test_dace_json_decoder(backend, parameters_payload):
+    if backend == 'orjson':
+        pytest.importorskip('orjson')
+    decoder = JsonDecoder(backend)
+    assert decoder.decode(json.dumps(parameters_payload).encode('utf-8')) == parameters_payload
+    # Non-standard NaN literals are decoded by the standard json module
+    assert np.isnan(decoder.decode(b'{"values": [NaN]}')['values'][0])
+    with pytest.raises(ValueError):
+        decoder.decode(b'{broken')
+
+
+def test_dace_json_decoder_not_installed(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'msgspec', None)
+    with pytest.raises(ImportError):
+        JsonDecoder('msgspec')
+    with pytest.raises(ValueError):
+        JsonDecoder('yaml')
+
+
+def test_dace_json_decoder_config(tmp_path, local_server, parameters_payload):
+    fp_config = Path(tmp_path, 'config.ini')
+    fp_config.write_text(f'[api]\nobs-webapp = {local_server}\n[json]\ndecoder = json\n')
+    dace_instance = DaceClass(config_path=fp_config, dace_rc_config_path=Path(tmp_path, 'missing.dacerc'))
+    assert dace_instance.json_decoder.name == 'json'
+    assert dace_instance.request_get('obs-webapp', 'search') == parameters_payload
+
+
+def test_dace_register_decoder(local_dace_instance, parameters_payload, columns_codec):
+    media_type, _, decode = columns_codec
+    expected = local_dace_instance.parse_parameters(local_dace_instance.request_get('obs-webapp', 'search'))
+    aggregator = TimingAggregator(group_by=lambda span: span.attributes.get('decoder', ''))
+    local_dace_instance.add_observer(aggregator)
+    local_dace_instance.register_decoder(media_type, decode)
+
+    response = local_dace_instance.request_get('obs-webapp', 'search')
+    assert isinstance(response['parameters'][0]['doubleValues'], np.ndarray)
+    data = local_dace_instance.parse_parameters(response)
+    assert data.keys() == expected.keys()
+    for key, column in expected.items():
+        assert len(column) == len(data[key])
+        assert all(value == other or value != value for value, other in zip(column.tolist(), data[key].tolist()))
+    assert media_type in aggregator.get_summary()
+
+    # The server answers in json once the encoding is not accepted anymore
+    local_dace_instance.unregister_decoder(media_type)
+    assert local_dace_instance.request_get('obs-webapp', 'search') == parameters_payload
+    with pytest.raises(ValueError):
+        local_dace_instance.register_decoder('application/json; charset=utf-8', decode)
+
+
+def test_dace_register_decoder_cache(local_dace_instance, local_calls, tmp_path, columns_codec):
+    media_type, _, decode = columns_codec
+    local_dace_instance.enable_cache(directory=Path(tmp_path, 'cache'))
+    local_dace_instance.register_decoder(media_type, decode)
+    local_dace_instance.request_get('obs-webapp', 'search')
+    cached = local_dace_instance.request_get('obs-webapp', 'search')
+    assert len(local_calls) == 1
+    assert isinstance(cached['parameters'][0]['doubleValues'], np.ndarray)
+    # The responses cached in another encoding are not reused
+    local_dace_instance.unregister_decoder(media_type)
+    assert isinstance(local_dace_instance.request_get('obs-webapp', 'search')['parameters'][0]['doubleValues'], list)
+    assert len(local_calls) == 2
+
+
+@pytest.mark.parametrize('accept_encoding', ['gzip, deflate', 'identity'])
+def test_dace_accept_encoding(local_dace_instance, parameters_payload, accept_encoding):
+    aggregator = TimingAggregator()
+    local_dace_instance.add_observer(aggregator)
+    local_dace_instance.accept_encoding = accept_encoding
+    assert local_dace_instance.request_get('obs-webapp', 'search') == parameters_payload
+    statistics = aggregator.get_summary()['obs-webapp/search']['request']
+    assert statistics['bytes_in'] == len(json.dumps(parameters_payload))
+    if accept_encoding == 'identity':
+        assert statistics['bytes_wire'] == statistics['bytes_in']
+    else:
+        assert 0 < statistics['bytes_wire'] < statistics['bytes_in']
+
+
+def test_dace_lazy_import():
+    # A fresh interpreter, the modules imported by the other tests being already loaded
+    code = ('import sys, dace_query, dace_query.spectroscopy\n'
+            'from dace_query.spectroscopy import SpectroscopyClass\n'
+            'assert not {"pandas", "astropy", "astroquery"} & set(sys.modules), sys.modules.keys()\n'
+            'assert "Dace" not in vars(sys.modules["dace_query.dace"])\n'
+            'from dace_query.spectroscopy import Spectroscopy\n'
+            'assert Spectroscopy.dace is dace_query.Dace\n'
+            'assert dace_query.spectroscopy.Spectroscopy is Spectroscopy\n')
+    subprocess.run([sys.executable, '-c', code], check=True,
+                   env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)})
+    with pytest.raises(AttributeError):
+        _ = dace_query.spectroscopy.Unknown
+
+
+def test_dace_timeseries_store(tmp_path):
+    store = TimeseriesStore(directory=tmp_path)
+    stored = {'rjd': np.array([1.0, 2.0]), 'domains': np.array([['a'], ['b', 'c']], dtype=object)}
+    store.save('HD 10700/b', stored)
+    loaded = store.load('HD 10700/b')
+    assert loaded['rjd'].tolist() == [1.0, 2.0] and loaded['domains'].tolist() == [['a'], ['b', 'c']]
+    assert store.load('HD 10700_b') is None
+
+    received = {'rjd': np.array([2.0, 3.0]), 'domains': np.array([['b', 'c'], []], dtype=object)}
+    assert merge_newer(loaded, received, 'rjd')['domains'].tolist() == [['a'], ['b', 'c'], []]
+    # The rows tied with the last stored one are kept unless already stored
+    received = {'rjd': np.array([2.0, 2.0, 3.0]), 'domains': np.array([['b', 'c'], ['d'], []], dtype=object)}
+    assert merge_newer(loaded, received, 'rjd')['domains'].tolist() == [['a'], ['b', 'c'], ['d'], []]
+    assert merge_newer(loaded, loaded, 'rjd')['rjd'].tolist() == [1.0, 2.0]
+    # Columns which changed cannot be merged
+    assert merge_newer(loaded, {'rjd': np.array([3.0])}, 'rjd') is None
+    store.remove('HD 10700/b')
+    assert store.load('HD 10700/b') is None
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'feather'])
+def test_dace_parquet_store(tmp_path, file_format):
+    pytest.importorskip('pyarrow')
+    store = ParquetStore(tmp_path, file_format=file_format)
+    data = {'ins_name': np.array(['HARPS', 'CORALIE', 'HARPS', 'ESPRESSO']),
+            'obj_id_catname': np.array(['HD 1', 'TOI-2', 'HD 3', '']),
+            'rv': np.array([1.0, 2.0, np.nan, 4.0]),
+            'public': np.array([True, False, True, True])}
+    store.write('spectroscopy', data, partition_by='ins_name')
+
+    values = store.query('spectroscopy', filters={'ins_name': {'equal': ['HARPS']}}, columns=['obj_id_catname'])
+    assert list(values) == ['obj_id_catname'] and sorted(values['obj_id_catname'].tolist()) == ['HD 1', 'HD 3']
+    values = store.query('spectroscopy', filters={'rv': {'min': 1.5}, 'public': {'is': True}})
+    assert values['rv'].tolist() == [4.0]
+    values = store.query('spectroscopy', filters={'obj_id_catname': {'contains': ['HD', 'TOI'], 'notEqual': ['HD 3']}},
+                         sort={'rv': 'desc'}, columns=['obj_id_catname'])
+    assert values['obj_id_catname'].tolist() == ['TOI-2', 'HD 1']
+    values = store.query('spectroscopy', filters={'obj_id_catname': {'empty': True}}, output_format='dict')
+    assert values['ins_name'] == ['ESPRESSO']
+
+    # The results can be added to a dataset
+    store.write('spectroscopy', {key: column[:1] for key, column in data.items()}, partition_by='ins_name', append=True)
+    assert len(store.query('spectroscopy', columns=['rv'])['rv']) == 5
+    with pytest.raises(ValueError):
+        store.query('spectroscopy', filters={'rv': {'between': [1, 2]}})
+
+
+def test_dace_parquet_store_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    with pytest.raises(ImportError, match='pip install pyarrow'):
+        ParquetStore(tmp_path).write('spectroscopy', {'rv': np.array([1.0])})
+
+
+def test_dace_evaluate_filters():
+    data = {'ins_name': np.array(['HARPS', 'CORALIE', 'HARPS', 'ESPRESSO']),
+            'obj_id_catname': np.array(['HD 1', 'TOI-2', 'HD 3', '']),
+            'rv': np.array([1.0, 2.0, np.nan, 4.0]),
+            'public': np.array([True, False, True, True])}
+
+    assert evaluate_filters(data, None).all()
+    assert evaluate_filters(data, {'rv': {'min': 1.5}, 'public': {'is': True}}).tolist() == [False, False, False, True]
+    assert evaluate_filters(data, {'obj_id_catname': {'contains': ['HD', 'TOI'], 'notEqual': ['HD 3']}}).tolist() == [
+        True, True, False, False]
+    assert evaluate_filters(data, {'obj_id_catname': {'empty': True}}).tolist() == [False, False, False, True]
+    # The missing values match neither a minimum nor a maximum
+    assert evaluate_filters(data, {'rv': {'max': 10}}).tolist() == [True, True, False, True]
+    with pytest.raises(ValueError):
+        evaluate_filters(data, {'rv': {'between': [1, 2]}})
+
+    values = apply_query(data, filters={'ins_name': {'notEqual': ['CORALIE']}}, sort={'ins_name': 'asc', 'rv': 'desc'},
+                         limit=2)
+    assert values['obj_id_catname'].tolist() == ['', 'HD 1']
+    pandas = pytest.importorskip('pandas')
+    values = apply_query(pandas.DataFrame(data), filters={'public': {'is': True}}, sort={'rv': 'desc'})
+    assert values['ins_name'].tolist() == ['ESPRESSO', 'HARPS', 'HARPS']
+
+
+# The rows matched and their order, whether the results are filtered in memory or in a local archive
+NULL_VALUES_DATA = {'row': np.arange(4),
+                    'obj_id_catname': np.array(['HD 1', 'TOI-2', '', None], dtype=object),
+                    'rv': np.array([1.0, np.nan, 3.0, 4.0])}
+NULL_VALUES_CASES = [
+    ({'obj_id_catname': {'equal': ['HD 1']}}, None, [0]),
+    ({'obj_id_catname': {'notEqual': ['HD 1']}}, None, [1, 2, 3]),
+    ({'obj_id_catname': {'contains': ['']}}, None, [0, 1]),
+    ({'obj_id_catname': {'notContains': ['HD']}}, None, [1, 2, 3]),
+    ({'obj_id_catname': {'empty': True}}, None, [2, 3]),
+    ({'obj_id_catname': {'empty': False}}, None, [0, 1]),
+    ({'rv': {'equal': [1.0, 3.0]}}, None, [0, 2]),
+    ({'rv': {'notEqual': [1.0]}}, None, [1, 2, 3]),
+    ({'rv': {'min': 2}}, None, [2, 3]),
+    ({'rv': {'max': 2}}, None, [0]),
+    ({'rv': {'empty': True}}, None, [1]),
+    ({'obj_id_catname': {'notEqual': ['TOI-2']}, 'rv': {'min': 0}}, None, [0, 2, 3]),
+    (None, {'obj_id_catname': 'asc'}, [2, 0, 1, 3]),
+    (None, {'obj_id_catname': 'desc'}, [1, 0, 2, 3]),
+    (None, {'rv': 'desc'}, [3, 2, 0, 1]),
+]
+
+
+@pytest.mark.parametrize('filters, sort, expected', NULL_VALUES_CASES)
+def test_dace_apply_query_null_values(filters, sort, expected):
+    values = apply_query(NULL_VALUES_DATA, filters=filters, sort=sort)
+    assert values['row'].tolist() == expected if sort else sorted(values['row'].tolist()) == expected
+
+
+@pytest.mark.parametrize('filters, sort, expected', NULL_VALUES_CASES)
+def test_dace_parquet_store_null_values(tmp_path, filters, sort, expected):
+    pytest.importorskip('pyarrow')
+    store = ParquetStore(tmp_path)
+    store.write('spectroscopy', NULL_VALUES_DATA)
+    values = store.query('spectroscopy', filters=filters, sort=sort)
+    assert values['row'].tolist() == expected if sort else sorted(values['row'].tolist()) == expected
+
+
+@pytest.mark.parametrize('broad, narrow, expected', [
+    ({}, {'rv': {'min': 1}}, True),
+    ({'rv': {'max': 10}}, {'rv': {'min': 2, 'max': 5}}, True),
+    ({'rv': {'max': 10}}, {'rv': {'min': 2}}, False),
+    ({'rv': {'min': 1}}, {'rv': {'equal': [2, 3]}}, True),
+    ({'ins_name': {'equal': ['HARPS', 'CORALIE']}}, {'ins_name': {'equal': ['HARPS']}}, True),
+    ({'ins_name': {'equal': ['HARPS']}}, {'ins_name': {'equal': ['HARPS', 'CORALIE']}}, False),
+    ({'obj_id_catname': {'contains': ['HD']}}, {'obj_id_catname': {'contains': ['HD 1']}}, True),
+    ({'obj_id_catname': {'contains': ['HD 1']}}, {'obj_id_catname': {'contains': ['HD']}}, False),
+    ({'ins_name': {'notEqual': ['HARPS']}}, {'ins_name': {'equal': ['CORALIE']}}, True),
+    ({'public': {'is': True}}, {'public': {'is': True}, 'rv': {'min': 1}}, True),
+    ({'public': {'is': True}}, {'rv': {'min': 1}}, False),
+])
+def test_dace_filters_subsumes(broad, narrow, expected):
+    assert subsumes(broad, narrow) is expected
+
+
+def test_dace_query_reuse(local_dace_instance, local_calls):
+    results = local_dace_instance.enable_query_reuse()
+    assert isinstance(results, QueryResults)
+    endpoint = 'observation/search/spectroscopy'
+
+    first = local_dace_instance.transform_to_format(local_dace_instance.request_get(
+        'obs-webapp', endpoint, params={'limit': '10', 'filters': '{}'}))
+    assert len(first['rv']) == 3
+    # The narrower queries are answered from the complete results
+    narrow = local_dace_instance.transform_to_format(local_dace_instance.request_get(
+        'obs-webapp', endpoint, params={'limit': '1', 'filters': json.dumps({'ins_name': {'equal': ['HARPS']}}),
+                                        'sort': json.dumps({'rv': 'desc'})}))
+    assert narrow['rv'].tolist() == [1.5] and narrow['rv_err'].tolist() == [0.1]
+    assert narrow['spectral_domains'][0] == ['a', 'b']
+    assert len(local_calls) == 1
+
+    # Other parameters and bypass call the server again, incomplete results are not kept
+    local_dace_instance.request_get('obs-webapp', endpoint, params={'limit': '10', 'filters': '{}', 'col': 'rv'})
+    with local_dace_instance.bypass_cache():
+        local_dace_instance.request_get('obs-webapp', endpoint, params={'limit': '10', 'filters': '{}'})
+    results.clear()
+    local_dace_instance.request_get('obs-webapp', endpoint, params={'limit': '3', 'filters': '{}'})
+    local_dace_instance.request_get('obs-webapp', endpoint, params={'limit': '3', 'filters': '{"rv": {"min": 2}}'})
+    assert len(local_calls) == 5
+
+    local_dace_instance.disable_query_reuse()
+    local_dace_instance.request_get('obs-webapp', endpoint, params={'limit': '10', 'filters': '{}'})
+    assert local_dace_instance.query_results is None and len(local_calls) == 6
+
+
+@pytest.mark.parametrize('columns', [None, ['rv'], ['rv_err'], ['ins_name', 'texp']])
+def test_dace_query_reuse_projection(local_dace_instance, local_calls, columns):
+    endpoint = 'observation/search/spectroscopy'
+    # The columns are sent as repeated col parameters, as the modules do
+    params = {'limit': '10', 'filters': '{}', 'col': columns}
+
+    def query():
+        return local_dace_instance.transform_to_format(
+            local_dace_instance.request_get('obs-webapp', endpoint, params=params), columns=columns)
+
+    expected = query()
+    local_dace_instance.enable_query_reuse()
+    try:
+        # The results kept, then reused, are projected like the server responses
+        for data in (query(), query()):
+            assert list(data) == list(expected)
+            for name, column in expected.items():
+                np.testing.assert_equal(data[name].tolist(), column.tolist())
+        assert len(local_calls) == 2
+        assert all(''.join(f'&col={column}' for column in columns or ()) in call for call in local_calls)
+    finally:
+        local_dace_instance.disable_query_reuse()
+
+
+def test_dace_query_results_eviction():
+    results = QueryResults(max_entries=2)
+    for index in range(3):
+        results.put('key', {'rv': {'min': index}}, {}, None, {'rv': np.arange(index, 5.0)})
+    assert results.find('key', {'rv': {'min': 0.5}}, {}, None) is None
+    assert results.find('key', {'rv': {'min': 1.5}}, {}, None)['rv'].tolist() == [2.0, 3.0, 4.0]
+    assert results.find('other', {'rv': {'min': 1.5}}, {}, None) is None
+
+
+
+def test_dace_query_results_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('dace_query.filters.time.monotonic', lambda: now[0])
+    results = QueryResults(ttl=60)
+    results.put('key', {}, {}, None, {'rv': np.arange(3.0)})
+    now[0] += 30
+    assert results.find('key', {'rv': {'min': 1}}, {}, None)['rv'].tolist() == [1.0, 2.0]
+    # The expired results are not reused any more
+    now[0] += 31
+    assert results.find('key', {'rv': {'min': 1}}, {}, None) is None
+
+def test_dace_group_regions():
+    pytest.importorskip('scipy')
+    from astropy.coordinates import Angle, SkyCoord
+    from dace_query.regions import group_regions
+
+    sky_coords = SkyCoord([10.0, 10.01, 10.02, 50.0], [20.0, 20.0, 20.0, -5.0], unit='deg')
+    cones = group_regions(sky_coords, Angle('5arcsec'))
+    assert [cone.sources.tolist() for cone in cones] == [[0, 1], [2], [3]]
+    # The cone covers the regions of all its positions
+    assert (cones[0].ra, cones[0].dec) == (10.0, 20.0)
+    assert cones[0].radius * 3600 == pytest.approx(5 + sky_coords[0].separation(sky_coords[1]).arcsec)
+    assert cones[2].radius * 3600 == pytest.approx(5)
+
+    cones = group_regions(sky_coords, Angle('5arcsec'), merge_radius=Angle('2arcmin'))
+    assert [cone.sources.tolist() for cone in cones] == [[0, 1, 2], [3]]
+    assert [cone.sources.tolist() for cone in group_regions(sky_coords[0], Angle('5arcsec'))] == [[0]]
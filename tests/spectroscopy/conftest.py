@@ -0,0 +1,91 @@
+import json
+import urllib.parse
+
+import numpy as np
+import pytest
+
+# The observations served for the cone searches : name, right ascension and declination (deg) and their sexagesimal
+# coordinates (an empty one being missing)
+REGION_ROWS = [
+    ('A', 10.0, 20.0, '00:40:00.00 +20:00:00.0'),
+    ('B', 10.0 + 0.1 / 240, 20.0, '00:40:00.10 +20:00:00.0'),
+    ('C', 50.0, -5.0, '03:20:00.00 -05:00:00.0'),
+    ('D', 50.0, -5.0 - 10 / 3600, '03:20:00.00 -05:00:10.0'),
+    ('E', 10.0, 20.0, ''),
+]
+
+
+def make_timeseries_payload(rows, min_rjd=None):
+    """A time series of rows observed once a day, from the minimum rjd if any"""
+    rjd = [50000.5 + index for index in range(rows) if min_rjd is None or 50000.5 + index >= min_rjd]
+    return {
+        'parameters': [
+            {'variableName': 'rjd', 'doubleValues': rjd},
+            {'variableName': 'rv', 'doubleValues': [value - 50000 for value in rjd]},
+            {'variableName': 'ins_name', 'stringValues': ['HARPS'], 'occurrences': [len(rjd)]},
+            {'variableName': 'ins_mode', 'stringValues': ['HARPS'], 'occurrences': [len(rjd)]},
+            {'variableName': 'drs_version', 'stringValues': ['3.5'], 'occurrences': [len(rjd)]},
+        ]
+    }
+
+
+def make_region_payload(cone):
+    """The observations within a cone (ra, dec and radius in degrees)"""
+    ra, dec = np.radians([row[1] for row in REGION_ROWS]), np.radians([row[2] for row in REGION_ROWS])
+    center_ra, center_dec = np.radians(cone['ra']), np.radians(cone['dec'])
+    separations = np.degrees(np.arccos(np.clip(np.sin(dec) * np.sin(center_dec) + np.cos(dec) * np.cos(
+        center_dec) * np.cos(ra - center_ra), -1, 1)))
+    rows = [row for row, separation in zip(REGION_ROWS, separations) if separation <= cone['radius']]
+    return {
+        'parameters': [
+            {'variableName': 'obj_id_catname', 'stringValues': [row[0] for row in rows]},
+            {'variableName': 'obj_pos_coordinates_hms_dms', 'stringValues': [row[3] for row in rows]},
+        ]
+    }
+
+
+class TimeseriesRoute:
+    """Serves the time series of the 'sync-' targets, of rows rows, filtered on the minimum rjd unless the path
+    contains 'ignorefilters'"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, handler):
+        if 'radialVelocities/sync-' not in handler.path:
+            return False
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(handler.path).query)
+        filters = json.loads(query.get('filters', ['{}'])[0])
+        min_rjd = None if 'ignorefilters' in handler.path else filters.get('rjd', {}).get('min')
+        handler.send_body(json.dumps(make_timeseries_payload(self.rows, min_rjd)).encode('utf-8'))
+        return True
+
+
+def send_regions(handler):
+    """The queries filtered on coordinates get the REGION_ROWS within their cone"""
+    if 'obj_pos_coordinates_hms_dms' not in urllib.parse.unquote_plus(handler.path):
+        return False
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(handler.path).query)
+    cone = json.loads(query['filters'][0])['obj_pos_coordinates_hms_dms']
+    handler.send_body(json.dumps(make_region_payload(cone)).encode('utf-8'))
+    return True
+
+
+@pytest.fixture()
+def timeseries_route():
+    """The time series of the local server"""
+    return TimeseriesRoute()
+
+
+@pytest.fixture()
+def local_routes(timeseries_route):
+    """The time series to synchronize and the cone searches"""
+    return [timeseries_route, send_regions]
+
+
+@pytest.fixture()
+def set_timeseries_rows(timeseries_route):
+    """Set the number of rows of the time series served by the local server"""
+    def set_rows(rows):
+        timeseries_route.rows = rows
+    return set_rows
@@ -5,6 +5,7 @@ from astropy.coordinates import Angle, SkyCoord
 
 from dace_query import DaceClass
 from dace_query.spectroscopy import SpectroscopyClass
+from dace_query.store import TimeseriesStore
 
 
 @pytest.mark.parametrize("instance", [pytest.param("anon_dace_instance")])
@@ -248,3 +249,89 @@ def test_spectroscopy_get_timeseries_auth_error(anon_dace_instance):
         "SW0604-1658", sorted_by_instrument=False, output_format="dict"
     )
     assert not result
+
+
+def test_spectroscopy_query_database_columns(local_dace_instance, local_calls):
+    instance = SpectroscopyClass(dace_instance=local_dace_instance)
+
+    results = instance.query_database(limit=10, columns=["ins_name", "texp"], output_format="pandas")
+    assert list(results.columns) == ["ins_name", "texp"]
+    # The projection is sent to the server
+    assert "col=ins_name&col=texp" in local_calls[-1]
+
+
+def test_spectroscopy_query_regions(local_dace_instance, local_calls):
+    pytest.importorskip("scipy")
+    instance = SpectroscopyClass(dace_instance=local_dace_instance)
+    # The first two positions are merged into one cone, the last one has no match
+    sky_coords = SkyCoord([10.0, 10.0002, 50.0, 120.0], [20.0, 20.0, -5.0, 0.0], unit="deg")
+
+    results = instance.query_regions(sky_coords, Angle("3arcsec"), filters={"ins_name": {"equal": ["HARPS"]}})
+    assert results["source_index"].tolist() == [0, 0, 1, 1, 2]
+    assert results["obj_id_catname"].tolist() == ["A", "B", "A", "B", "C"]
+    assert len(local_calls) == 3 and all("HARPS" in call for call in local_calls)
+
+    results = instance.query_regions(sky_coords[3:], Angle("3arcsec"), output_format="pandas")
+    assert results.empty and "source_index" in results
+
+
+def test_spectroscopy_get_timeseries_many(local_dace_instance, local_calls):
+    instance = SpectroscopyClass(dace_instance=local_dace_instance)
+    targets = [f"TARGET-{index}" for index in range(12)] + ["broken-target"]
+
+    results = {
+        target: (data, error)
+        for target, data, error in instance.get_timeseries_many(targets, max_workers=4)
+    }
+
+    assert set(results) == set(targets)
+    # A failing target is reported without aborting the batch
+    data, error = results["broken-target"]
+    assert data is None and error is not None
+    data, error = results["TARGET-0"]
+    assert error is None
+    assert data["HARPS"]["default"]["default"]["rv"].shape == (2,)
+    assert len(local_calls) == len(targets)
+
+
+def test_spectroscopy_sync_timeseries_query_reuse(local_dace_instance, local_calls, set_timeseries_rows, tmp_path):
+    instance = SpectroscopyClass(dace_instance=local_dace_instance)
+    store = Path(tmp_path, "timeseries")
+    local_dace_instance.enable_query_reuse()
+
+    # The synchronisations always call DACE, whose newer rows are not hidden by the reused results
+    set_timeseries_rows(2)
+    instance.sync_timeseries("sync-target", store=store, sorted_by_instrument=False)
+    instance.sync_timeseries("sync-target", store=store, sorted_by_instrument=False)
+    set_timeseries_rows(3)
+    data = instance.sync_timeseries("sync-target", store=store, sorted_by_instrument=False)
+    assert data["rjd"].tolist() == [50000.5, 50001.5, 50002.5]
+    assert len(local_calls) == 3
+
+
+@pytest.mark.parametrize("target", ["sync-target", "sync-target-ignorefilters"])
+def test_spectroscopy_sync_timeseries(local_dace_instance, local_calls, set_timeseries_rows, tmp_path, target):
+    instance = SpectroscopyClass(dace_instance=local_dace_instance)
+    store = Path(tmp_path, "timeseries")
+
+    # An empty time series is not stored
+    set_timeseries_rows(0)
+    data = instance.sync_timeseries(target, store=store, sorted_by_instrument=False)
+    assert data["rjd"].tolist() == []
+    assert TimeseriesStore(directory=store).load(target) is None
+
+    set_timeseries_rows(3)
+    data = instance.sync_timeseries(target, store=store, sorted_by_instrument=False)
+    assert data["rjd"].tolist() == [50000.5, 50001.5, 50002.5]
+    assert "?filters=" not in local_calls[-1]
+
+    # Only the rows from the last stored rjd are requested, the merge keeping the newer ones
+    set_timeseries_rows(5)
+    data = instance.sync_timeseries(target, store=store, sorted_by_instrument=False)
+    assert data["rjd"].tolist() == [50000.5, 50001.5, 50002.5, 50003.5, 50004.5]
+    assert data["rv"].tolist() == [0.5, 1.5, 2.5, 3.5, 4.5]
+    assert "?filters=" in local_calls[-1] and "50002.5" in local_calls[-1]
+
+    data = instance.sync_timeseries(target, store=store)
+    assert data["HARPS"]["3.5"]["HARPS"]["rv"].shape == (5,)
+    assert len(local_calls) == 4